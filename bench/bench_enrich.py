@@ -0,0 +1,70 @@
+"""Benchmark serial vs concurrent per-ticker enrichment against a local stub.
+
+yfinance is replaced by an in-process stub whose ``.info`` / ``.news`` sleep for a
+fixed simulated round-trip, so the numbers isolate the enrichment stage's scheduling
+from Yahoo's actual latency and rate limits. No network access is needed.
+
+    python bench/bench_enrich.py
+    python bench/bench_enrich.py --latency 0.05 --workers 16 --sizes 30 100 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import scrape_tickers  # noqa: E402
+
+
+class StubTicker:
+    """Minimal stand-in for yf.Ticker: fixed latency, deterministic payloads."""
+
+    latency = 0.05
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        time.sleep(self.latency)
+        return {"sector": f"Sector-{self.symbol}", "industry": f"Industry-{self.symbol}"}
+
+    @property
+    def news(self):
+        time.sleep(self.latency)
+        return [{"content": {"title": f"{self.symbol} headline",
+                             "pubDate": "2026-06-24T15:55:32Z",
+                             "summary": "", "canonicalUrl": {"url": f"https://x/{self.symbol}"}}}]
+
+
+def run(symbols, workers):
+    t0 = time.perf_counter()
+    out = scrape_tickers.enrich_tickers(symbols, max_workers=workers)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 200])
+    ap.add_argument("--workers", type=int, default=scrape_tickers.DEFAULT_WORKERS)
+    ap.add_argument("--latency", type=float, default=0.05,
+                    help="simulated seconds per .info / .news call")
+    args = ap.parse_args()
+
+    StubTicker.latency = args.latency
+    scrape_tickers.yf.Ticker = StubTicker
+
+    print(f"stub latency={args.latency * 1000:.0f}ms/call  workers={args.workers}")
+    print(f"  {'tickers':>7} {'serial s':>9} {'pooled s':>9} {'speedup':>8}")
+    for n in args.sizes:
+        symbols = [f"T{i:03d}" for i in range(n)]
+        t_serial, ref = run(symbols, 1)
+        t_pool, out = run(symbols, args.workers)
+        assert out == ref, "concurrent enrichment changed the output order/content"
+        print(f"  {n:7d} {t_serial:9.2f} {t_pool:9.2f} {t_serial / t_pool:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Equivalence check and scaling benchmark for the per-ticker feature kernels.
+
+``reference()`` is the groupby implementation add_features used before
+kernels.py: groupby shifts for the lags/momentum and three
+``groupby(...).rolling(5)`` passes for pc_vol_5 / volume_z.
+``add_ticker_features`` computes the same columns from one Segments pass.
+On synthetic boards (irregular snapshot times, missing and zero prices,
+constant-volume stretches) the lag/momentum/count columns must match exactly
+and the rolling ones within floating-point tolerance. pandas' running sums
+drift on raw volumes (volume_z can be off by 1e-4 relative where a window is
+nearly constant), so the rolling columns are checked against an
+extended-precision per-window reference: the kernels must be at least as close
+to it as pandas. Then both are timed up to a 10M-row archive.
+
+    python bench/bench_features.py
+    python bench/bench_features.py --sizes 1000000 10000000 --reference-max 10000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# These kernels score no headlines, but importing build_dataset imports
+# ml/sentiment.py: keep it off ml/sentiment_cache.db all the same.
+os.environ.setdefault("SENTIMENT_CACHE", os.path.join(tempfile.gettempdir(),
+                                                      "bench_sentiment_cache.db"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+from bench_targets import synthetic  # noqa: E402
+from build_dataset import add_ticker_features  # noqa: E402
+
+COLUMNS = ["t_prev", "time_since_last_h", "novelty", "appearances_so_far", "pct_change_prev",
+           "mom_1", "mom_3", "mom_5", "pc_vol_5", "volume_z"]
+ROLLING = ["pc_vol_5", "volume_z"]
+
+
+def reference(df):
+    """The groupby / groupby-rolling code add_features ran before the kernels."""
+    out = pd.DataFrame(index=df.index)
+    g = df.groupby("ticker_symbol", sort=False)
+    out["t_prev"] = g["utc_timestamp"].shift(1)
+    out["time_since_last_h"] = (df["utc_timestamp"] - out["t_prev"]).dt.total_seconds() / 3600.0
+    out["novelty"] = out["t_prev"].isna().astype(int)
+    out["appearances_so_far"] = g.cumcount()
+    out["pct_change_prev"] = g["percent_change"].shift(1)
+    for k in (1, 3, 5):
+        out[f"mom_{k}"] = df["last_price"] / g["last_price"].shift(k) - 1.0
+    prior_pc = g["percent_change"].shift(1)
+    out["pc_vol_5"] = prior_pc.groupby(df["ticker_symbol"]).rolling(5, min_periods=2)\
+        .std().reset_index(level=0, drop=True)
+    prior_vol = g["volume"].shift(1)
+    roll_mean = prior_vol.groupby(df["ticker_symbol"]).rolling(5, min_periods=2)\
+        .mean().reset_index(level=0, drop=True)
+    roll_std = prior_vol.groupby(df["ticker_symbol"]).rolling(5, min_periods=2)\
+        .std().reset_index(level=0, drop=True)
+    out["volume_z"] = (df["volume"] - roll_mean) / roll_std
+    return out
+
+
+def exact(df):
+    """pc_vol_5 / volume_z from long-double two-pass window stats."""
+    g = df.groupby("ticker_symbol", sort=False)
+    out = {}
+    for col in ("percent_change", "volume"):
+        prior = np.column_stack([g[col].shift(k).to_numpy() for k in range(1, 6)]).astype(np.longdouble)
+        n = (~np.isnan(prior)).sum(axis=1)
+        mean = np.nansum(prior, axis=1) / n
+        var = np.nansum((prior - mean[:, None]) ** 2, axis=1) / (n - 1)
+        std = np.where(n >= 2, np.sqrt(var), np.nan)
+        std[np.nanmax(prior, axis=1) == np.nanmin(prior, axis=1)] = 0.0
+        out[col] = mean, std
+    mean, std = out["volume"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (df["volume"].to_numpy(np.longdouble) - mean) / std
+    return {"pc_vol_5": out["percent_change"][1], "volume_z": z}
+
+
+def frame(rows, seed=0):
+    df = synthetic(rows, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    pc = rng.normal(0, 3, len(df))
+    pc[rng.random(len(df)) < 0.03] = np.nan
+    df["percent_change"] = pc
+    vol = np.exp(rng.normal(14, 1.5, len(df))).round()
+    vol[rng.random(len(df)) < 0.2] = 1e6  # stretches of equal volume -> zero std
+    df["volume"] = vol
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    ap.add_argument("--reference-max", type=int, default=2_000_000,
+                    help="skip the (slow, memory-hungry) groupby reference above this many rows")
+    args = ap.parse_args()
+
+    print(f"  {'rows':>11} {'groupby s':>10} {'kernels s':>10} {'speedup':>8}  check")
+    for n in args.sizes:
+        df = frame(n)
+        t0 = time.perf_counter()
+        got = add_ticker_features(df.copy())
+        t_new = time.perf_counter() - t0
+        if len(df) > args.reference_max:
+            print(f"  {len(df):11,} {'-':>10} {t_new:10.3f} {'-':>8}  (reference skipped)")
+            continue
+        t0 = time.perf_counter()
+        ref = reference(df)
+        t_ref = time.perf_counter() - t0
+        lagged = [c for c in COLUMNS if c not in ROLLING]
+        pd.testing.assert_frame_equal(got[lagged], ref[lagged], check_exact=True)
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows
+            best = exact(df)
+        worst = {}
+        for c in ROLLING:
+            a, b, x = got[c].to_numpy(), ref[c].to_numpy(), best[c]
+            assert np.array_equal(np.isnan(a), np.isnan(b)), c
+            assert np.array_equal(np.isinf(a), np.isinf(b)), c
+            fin = np.isfinite(b)
+            scale = np.maximum(np.abs(x[fin]), 1.0)
+            err_new = float(np.max(np.abs(a[fin] - x[fin]) / scale))
+            err_ref = float(np.max(np.abs(b[fin] - x[fin]) / scale))
+            assert err_new <= max(err_ref, 1e-12), (c, err_new, err_ref)
+            worst[c] = err_new, err_ref
+        errs = "  ".join(f"{c} err {e:.0e} (groupby {r:.0e})" for c, (e, r) in worst.items())
+        print(f"  {len(df):11,} {t_ref:10.2f} {t_new:10.3f} {t_ref / t_new:7.1f}x  lags exact; {errs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Exercise http_client against a local fake Yahoo that rate-limits.
+
+Starts a threaded HTTP server on 127.0.0.1 that allows ``--server-rate``
+requests/second (server-side token bucket) and answers anything beyond that with
+HTTP 429, then fetches ``--requests`` URLs from a thread pool two ways:
+
+  * naive    -- bare session.get, no limiter/retry (what the scraper used to do)
+  * adaptive -- http_client.YahooClient (shared session, token bucket, AIMD on 429,
+                jittered backoff)
+
+and reports successes, 429s and effective throughput. No network access needed.
+
+    python bench/bench_http.py
+    python bench/bench_http.py --server-rate 20 --requests 300 --workers 16
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import http_client  # noqa: E402
+
+
+class FakeYahoo(BaseHTTPRequestHandler):
+    rate = 10.0
+    tokens = 10.0
+    updated = time.monotonic()
+    lock = threading.Lock()
+    served = 0
+    rejected = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            now = time.monotonic()
+            cls.tokens = min(cls.rate, cls.tokens + (now - cls.updated) * cls.rate)
+            cls.updated = now
+            ok = cls.tokens >= 1
+            if ok:
+                cls.tokens -= 1
+                cls.served += 1
+            else:
+                cls.rejected += 1
+        body = b"<html><table class='bd'></table></html>" if ok else b"Too Many Requests"
+        self.send_response(200 if ok else 429)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(fetch, n, workers):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        codes = list(pool.map(fetch, range(n)))
+    return time.perf_counter() - t0, codes
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--server-rate", type=float, default=15.0)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--client-rate", type=float, default=http_client.DEFAULT_RATE)
+    args = ap.parse_args()
+
+    FakeYahoo.rate = FakeYahoo.tokens = args.server_rate
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeYahoo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/quote"
+
+    naive_session = http_client.new_session(args.workers)
+    client = http_client.YahooClient(rate=args.client_rate, max_rate=4 * args.server_rate,
+                                     retries=8, pool_size=args.workers)
+
+    def naive(i):
+        return naive_session.get(f"{url}?i={i}", timeout=10).status_code
+
+    def adaptive(i):
+        try:
+            return client.get(f"{url}?i={i}").status_code
+        except http_client.RateLimited:
+            return 429
+
+    print(f"fake server: {args.server_rate:.0f} req/s  |  {args.requests} requests, "
+          f"{args.workers} workers")
+    print(f"  {'mode':9} {'ok':>5} {'failed':>7} {'429s seen':>10} {'wall s':>7} {'ok/s':>6}")
+    for name, fetch in (("naive", naive), ("adaptive", adaptive)):
+        time.sleep(1.0)  # let the server bucket refill between modes
+        FakeYahoo.rejected = 0
+        wall, codes = run(fetch, args.requests, args.workers)
+        ok = sum(c == 200 for c in codes)
+        print(f"  {name:9} {ok:5d} {len(codes) - ok:7d} {FakeYahoo.rejected:10d} "
+              f"{wall:7.2f} {ok / wall:6.1f}")
+    print(f"  adaptive limiter settled at {client.bucket.rate:.1f} req/s "
+          f"({client.throttled} throttles, {client.retried} retries)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark build_dataset.load() over many archive files.
+
+Writes --archives synthetic monthly archives (consecutive time ranges, a board
+of --board tickers per hourly snapshot), checks that the threaded, filtered
+load returns exactly what an unfiltered load filtered in pandas returns, then
+reports wall time and peak traced memory (tracemalloc) for:
+
+  * every row: one file at a time vs on a thread pool;
+  * the last --days days and a few columns: load everything and filter in
+    pandas (what callers used to do) vs since= / columns= pushed into SQL.
+
+    python bench/bench_load.py
+    python bench/bench_load.py --archives 12 --snapshots 720 --board 300 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+import ticker_db  # noqa: E402
+from synth_db import HOUR_US, boards, insert  # noqa: E402
+from build_dataset import load  # noqa: E402
+
+COLUMNS = ["last_price", "percent_change", "volume"]
+
+
+def measure(fn):
+    """(seconds, peak traced MB, result) -- timed untraced, then traced once."""
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    tracemalloc.start()
+    out = fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return seconds, peak, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--archives", type=int, default=8)
+    ap.add_argument("--snapshots", type=int, default=720, help="hourly snapshots per archive")
+    ap.add_argument("--board", type=int, default=100)
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--workers", type=int, default=None,
+                    help="threads for the parallel load (default: load()'s own choice)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snaps = list(boards(args.archives * args.snapshots, args.board, args.board // 10,
+                            args.board * 10))
+        paths = []
+        for a in range(args.archives):
+            path = os.path.join(tmp, f"archive-{a:02d}.db")
+            conn = ticker_db.connect(path)
+            with conn:
+                insert(conn, snaps[a * args.snapshots:(a + 1) * args.snapshots])
+            ticker_db.close(conn)
+            paths.append(path)
+        pattern = os.path.join(tmp, "archive-*.db")
+        since = snaps[-1][0] - args.days * 24 * HOUR_US
+        print(f"{args.archives} archives x {args.snapshots * args.board:,} rows "
+              f"({len(snaps) * args.board:,} total), cpu_count={os.cpu_count()}")
+
+        def filtered_in_pandas():
+            df = load(pattern, workers=1)
+            df = df[df["utc_timestamp"] > pd.Timestamp(since, unit="us")]
+            return df[["utc_timestamp", "ticker_symbol"] + COLUMNS].reset_index(drop=True)
+
+        t_serial, m_serial, full = measure(lambda: load(pattern, workers=1))
+        t_par, m_par, full_par = measure(lambda: load(pattern, workers=args.workers))
+        pd.testing.assert_frame_equal(full, full_par)
+        t_pd, m_pd, ref = measure(filtered_in_pandas)
+        t_sql, m_sql, got = measure(lambda: load(pattern, since=since, columns=COLUMNS,
+                                                 workers=args.workers))
+        pd.testing.assert_frame_equal(ref, got)
+        print("  threaded / filtered results match the serial / pandas-filtered ones")
+        print(f"  {'':34} {'seconds':>8} {'peak MB':>9} {'rows':>10}")
+        for name, t, m, n in (("all rows, one file at a time", t_serial, m_serial, len(full)),
+                              ("all rows, thread pool", t_par, m_par, len(full_par)),
+                              (f"last {args.days}d, filtered in pandas", t_pd, m_pd, len(ref)),
+                              (f"last {args.days}d, filtered in SQL", t_sql, m_sql, len(got))):
+            print(f"  {name:34} {t:8.3f} {m:9.1f} {n:10,}")
+
+
+if __name__ == "__main__":
+    main()
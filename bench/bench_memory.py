@@ -0,0 +1,134 @@
+"""Peak memory of a full dataset build: default vs --lean.
+
+Writes a synthetic archive with the string columns a real one carries (company
+names, sectors, industries, headlines in ``news``), then runs
+build_dataset.build() + dataset_store.write() once per mode, each in a fresh
+child process so every peak RSS is its own. Checks that the lean dataset is
+exactly the default one passed through compact(), then prints each stage's
+peak RSS and wall time side by side.
+
+    python bench/bench_memory.py
+    python bench/bench_memory.py --snapshots 4000 --board 300 --universe 6000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+import ticker_db  # noqa: E402
+from synth_db import HOUR_US, boards  # noqa: E402
+from build_dataset import compact  # noqa: E402
+import dataset_store  # noqa: E402
+
+ML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml")
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Consumer Cyclical", "Energy",
+           "Industrials", "Communication Services", "Consumer Defensive", "Utilities",
+           "Real Estate", "Basic Materials"]
+WORDS = ["Apex", "Blue", "Cedar", "Delta", "Summit", "Harbor", "Nova", "Pioneer", "Quantum",
+         "River", "Solar", "Titan", "Vertex", "Granite", "Atlas", "Beacon"]
+EVENTS = ["shares surge after earnings beat", "stock slumps as guidance disappoints",
+          "jumps on upgrade from analysts", "falls amid probe into accounting",
+          "rallies to record high on strong demand", "announces layoffs as growth slows",
+          "wins approval for new product", "drops after missing revenue estimates"]
+
+# Child process: one build + write, then its stage report as the last line.
+CHILD = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import build_dataset, dataset_store
+report = [("startup", *build_dataset._rss_mb()[::-1])]
+df, _ = build_dataset.build(sys.argv[2], lean=sys.argv[4] == "lean", report=report)
+with build_dataset._stage("writing", report):
+    dataset_store.write(df, sys.argv[3])
+print(json.dumps(report))
+"""
+
+
+def archive(path, snapshots, board, universe, seed=0):
+    """A typed DB with ~snapshots x board rows; each ticker has a fixed name,
+    sector and industry and a new headline every few hours (70% of rows)."""
+    rng = np.random.default_rng(seed)
+    names = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {'Holdings Inc.' if i % 3 else 'Corp.'}"
+             for i in range(universe)]
+    sector = rng.integers(0, len(SECTORS), universe)
+    industry = sector * 6 + rng.integers(0, 6, universe)
+    price = np.exp(rng.normal(3, 1, universe))
+    conn = ticker_db.connect(path)
+    with conn:
+        stories = {}
+        rows = []
+        for ts, symbols in boards(snapshots, board, max(1, board // 10), universe, seed):
+            for sym in symbols:
+                i = int(sym[1:])
+                price[i] *= np.exp(rng.normal(0, 0.02))
+                story = None
+                if (i + ts // HOUR_US) % 10 < 7:
+                    key = (i, (ts // HOUR_US + i) // 6)
+                    if key not in stories:
+                        published = pd.Timestamp(ts, unit="us").isoformat()
+                        title = f"{names[i]} ({sym}) {EVENTS[hash(key) % len(EVENTS)]}, {published[:10]}"
+                        stories[key] = conn.execute(
+                            "INSERT INTO news (story_key, published, title) VALUES (?, ?, ?)",
+                            (f"{key}", published, title)).lastrowid
+                    story = stories[key]
+                rows.append((ts, sym, names[i], SECTORS[sector[i]], f"Industry {industry[i]:02d}",
+                             float(price[i]), float(rng.normal(0, 3)), float(rng.lognormal(14, 1.5)),
+                             float(price[i] * 1e7), story))
+        conn.executemany(
+            "INSERT INTO trending_tickers (utc_timestamp, ticker_symbol, company_name, sector, "
+            "industry, last_price, percent_change, trading_volume, market_cap, story_id, boards) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'trending')", rows)
+    ticker_db.close(conn)
+    return len(rows)
+
+
+def run(db, out, cache, mode):
+    env = dict(os.environ, SENTIMENT_BACKEND="lexicon", SENTIMENT_CACHE=cache)
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", CHILD, ML, db, out, mode], env=env,
+                          capture_output=True, text=True, check=True)
+    return time.perf_counter() - t0, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--snapshots", type=int, default=3000)
+    ap.add_argument("--board", type=int, default=300)
+    ap.add_argument("--universe", type=int, default=5000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "archive.db")
+        n = archive(db, args.snapshots, args.board, args.universe)
+        print(f"{n:,} rows, {os.path.getsize(db) / 1e6:,.0f} MB archive")
+        cache = os.path.join(tmp, "sentiment_cache.db")
+        results = {mode: run(db, os.path.join(tmp, mode), cache, mode) for mode in ("default", "lean")}
+
+        full = dataset_store.read(os.path.join(tmp, "default"))
+        lean = dataset_store.read(os.path.join(tmp, "lean"))
+        pd.testing.assert_frame_equal(compact(full), lean, check_exact=True)
+        print("  lean dataset == compact(default dataset)")
+
+        print(f"  {'stage':12} {'default MB':>11} {'lean MB':>9}")
+        peaks = {mode: {name: peak for name, peak, _ in report}
+                 for mode, (_, report) in results.items()}
+        for name in peaks["lean"]:  # the default stages, plus compacting
+            print(f"  {name:12} {peaks['default'].get(name, float('nan')):11,.0f} "
+                  f"{peaks['lean'].get(name, float('nan')):9,.0f}")
+        print(f"  {'max':12} {max(peaks['default'].values()):11,.0f} "
+              f"{max(peaks['lean'].values()):9,.0f}")
+        print(f"  {'seconds':12} {results['default'][0]:11.1f} {results['lean'][0]:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark the trending-table HTML extractor backends on saved page fixtures.
+
+For every fixture in bench/fixtures/ (see make_fixtures.py) and every backend in
+html_extract.BACKENDS this reports the best-of-N ``parse_trending_page`` time and
+peak memory, each backend measured in a fresh subprocess so one backend's heap
+doesn't pollute the next. Peak memory is shown two ways: the tracemalloc peak
+(Python allocations only) and the growth in process max-RSS (includes libxml2's C
+allocations, which tracemalloc can't see). Before timing, every backend's
+DataFrame is checked against the bs4 reference.
+
+    python bench/bench_parse.py
+    python bench/bench_parse.py --repeat 10 --backends lxml stream
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import html_extract  # noqa: E402
+import scrape_tickers  # noqa: E402
+
+
+def _read(path):
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+
+def child(fixture, backend, repeat):
+    import bs4, lxml.html  # noqa: F401,E401 -- import every backend up front so RSS growth is parse-only
+    html = _read(fixture)
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    df = scrape_tickers.parse_trending_page(html, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        scrape_tickers.parse_trending_page(html, backend)
+        best = min(best, time.perf_counter() - t0)
+    print(json.dumps({"rows": len(df), "seconds": best, "py_peak_mb": peak / 1e6,
+                      "rss_growth_mb": (rss1 - rss0) / 1e3}))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fixtures", default=os.path.join(HERE, "fixtures", "yahoo_*.html.gz"))
+    ap.add_argument("--backends", nargs="+", default=list(html_extract.BACKENDS))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--child", nargs=2, metavar=("FIXTURE", "BACKEND"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.repeat)
+        return
+
+    fixtures = sorted(glob.glob(args.fixtures), key=lambda p: (len(p), p))
+    if not fixtures:
+        sys.exit(f"no fixtures match {args.fixtures}; run bench/make_fixtures.py")
+    print(f"  {'fixture':22} {'backend':7} {'rows':>5} {'best ms':>9} {'py peak MB':>11} {'RSS +MB':>8}")
+    for fx in fixtures:
+        html = _read(fx)
+        ref = scrape_tickers.parse_trending_page(html, "bs4")
+        for backend in args.backends:
+            out = scrape_tickers.parse_trending_page(html, backend)
+            if not out.equals(ref):
+                sys.exit(f"{backend} output differs from bs4 on {fx}")
+            res = json.loads(subprocess.check_output(
+                [sys.executable, __file__, "--child", fx, backend, "--repeat", str(args.repeat)]))
+            print(f"  {os.path.basename(fx):22} {backend:7} {res['rows']:5d} "
+                  f"{res['seconds'] * 1e3:9.1f} {res['py_peak_mb']:11.1f} {res['rss_growth_mb']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
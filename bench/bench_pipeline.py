@@ -0,0 +1,256 @@
+"""End-to-end pipeline benchmark: how every stage scales as the archive grows.
+
+For each of --scales, bench/synth_db.py writes a synthetic archive (1x = its
+BASE dimensions, or those of a real archive with --like) and the pipeline runs
+on it from a scratch working directory the way CI runs it:
+
+  one child process   load, score_titles (every headline, empty cache),
+                      add_targets, add_features (headlines now cached)
+  the scripts         build_dataset.py, train.py, bayes_signals.py --save,
+                      emit_signals.py, render_dashboard.py
+
+and each stage's wall time and peak RSS is measured -- VmHWM around each stage
+in the child, the script's own ru_maxrss (os.wait4) for the scripts, startup
+and imports included. A stage that fails (say, out of memory at 100x) is
+recorded as failed, and the scripts that need its output are skipped; their
+logs stay in the working directory with --workdir.
+
+One JSON line per scale is appended to --history: when, commit, host, scale,
+archive dimensions and rows, and {stage: {seconds, peak_mb}}. Before that each
+stage is compared with the median of the last --baseline runs at the same
+scale, dimensions, seed and host; a stage more than --time-tolerance slower (and
+--min-seconds) or --memory-tolerance heavier (and --min-mb) than that, or one
+that failed where the baseline passed, is a regression and the exit status is 1.
+
+    python bench/bench_pipeline.py --scales 1
+    python bench/bench_pipeline.py                          # 1x, 10x, 100x
+    python bench/bench_pipeline.py --scales 1 10 --workdir /tmp/bench --no-record
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+import synth_db  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ML = os.path.join(ROOT, "ml")
+HISTORY = os.path.join(ROOT, "bench", "history.jsonl")
+CHILD_STAGES = ["load", "score_titles", "add_targets", "add_features"]
+
+# Child process: the in-process stages, one JSON line per finished stage.
+CHILD = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+import build_dataset as bd
+import sentiment
+
+def stage(name, fn):
+    bd._reset_peak_rss()
+    t0 = time.perf_counter()
+    out = fn()
+    print(json.dumps([name, time.perf_counter() - t0, bd._rss_mb()[1]]), flush=True)
+    return out
+
+df = stage("load", lambda: bd.load(sys.argv[2]))
+print(json.dumps(["rows", len(df)]), flush=True)
+stage("score_titles", lambda: sentiment.score_titles(df["article_title"].tolist()))
+df = stage("add_targets", lambda: bd.add_targets(df))
+df = stage("add_features", lambda: bd.add_features(df))
+"""
+
+
+def _run(argv, cwd, env, log):
+    """Run ``argv`` -> (exit code, seconds, peak RSS MB of that process)."""
+    with open(log, "w") as out:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(argv, cwd=cwd, env=env, stdout=out, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return proc.returncode, seconds, peak
+
+
+def run_pipeline(db, work, env):
+    """Every stage on ``db`` -> (rows, {stage: {"seconds", "peak_mb"} or {"failed"}})."""
+    stages, rows = {}, None
+    log = os.path.join(work, "logs", "child.log")
+    code, _, _ = _run([sys.executable, "-c", CHILD, ML, db], work, env, log)
+    with open(log) as f:
+        for line in f:
+            if line.startswith("["):
+                name, *vals = json.loads(line)
+                if name == "rows":
+                    rows = vals[0]
+                else:
+                    stages[name] = {"seconds": round(vals[0], 3), "peak_mb": round(vals[1], 1)}
+    for name in CHILD_STAGES:
+        stages.setdefault(name, {"failed": code})
+
+    scripts = [
+        ("build_dataset", [os.path.join(ML, "build_dataset.py"), "--db", db], []),
+        ("train", [os.path.join(ML, "train.py")], ["build_dataset"]),
+        ("bayes_signals", [os.path.join(ML, "bayes_signals.py"), "--save"], ["build_dataset"]),
+        ("emit_signals", [os.path.join(ML, "emit_signals.py"), "--db", db],
+         ["train", "bayes_signals"]),
+        ("render_dashboard", [os.path.join(ROOT, "render_dashboard.py"),
+                              "--template-dir", ROOT, "--out", "dashboard.html"],
+         ["emit_signals"]),
+    ]
+    for name, argv, needs in scripts:
+        if any("failed" in stages[n] or "skipped" in stages[n] for n in needs):
+            stages[name] = {"skipped": True}
+            continue
+        print(f"  {name}...", flush=True)
+        code, seconds, peak = _run([sys.executable, *argv], work, env,
+                                   os.path.join(work, "logs", f"{name}.log"))
+        stages[name] = ({"seconds": round(seconds, 3), "peak_mb": round(peak, 1)} if code == 0
+                        else {"failed": code})
+    return rows, stages
+
+
+def _commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return sha + ("-dirty" if dirty else "")
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(history, record, runs):
+    """Per-stage median seconds / peak_mb over the last ``runs`` runs at the same
+    scale, dimensions, seed and host."""
+    key = ("scale", "dims", "seed", "host")
+    same = [r for r in history if all(r.get(k) == record[k] for k in key)][-runs:]
+    out = {}
+    for name in record["stages"]:
+        ok = [r["stages"][name] for r in same if "seconds" in r["stages"].get(name, {})]
+        if ok:
+            out[name] = {"seconds": statistics.median(s["seconds"] for s in ok),
+                         "peak_mb": statistics.median(s["peak_mb"] for s in ok), "runs": len(ok)}
+    return out
+
+
+def regressions(record, base, args):
+    """[(stage, what)] of the stages that got slower or heavier than ``base``."""
+    out = []
+    for name, got in record["stages"].items():
+        ref = base.get(name)
+        if ref is None:
+            continue
+        if "seconds" not in got:
+            out.append((name, "failed" if "failed" in got else "skipped"))
+            continue
+        if (got["seconds"] > ref["seconds"] * (1 + args.time_tolerance)
+                and got["seconds"] - ref["seconds"] > args.min_seconds):
+            out.append((name, f"time {got['seconds']:.2f}s vs {ref['seconds']:.2f}s"))
+        if (got["peak_mb"] > ref["peak_mb"] * (1 + args.memory_tolerance)
+                and got["peak_mb"] - ref["peak_mb"] > args.min_mb):
+            out.append((name, f"memory {got['peak_mb']:,.0f} MB vs {ref['peak_mb']:,.0f} MB"))
+    return out
+
+
+def _change(now, ref):
+    return f"{(now / ref - 1) * 100:+5.0f}%" if ref else "     "
+
+
+def report(record, base):
+    print(f"\n{record['scale']:g}x: {record['rows']:,} rows" if record["rows"] is not None
+          else f"\n{record['scale']:g}x:")
+    print(f"  {'stage':<17} {'seconds':>9} {'peak MB':>9}   vs median of "
+          f"{max((b['runs'] for b in base.values()), default=0)} run(s)")
+    for name, got in record["stages"].items():
+        if "seconds" not in got:
+            print(f"  {name:<17} {'failed (exit %s)' % got['failed'] if 'failed' in got else 'skipped':>19}")
+            continue
+        ref = base.get(name)
+        vs = (f"{_change(got['seconds'], ref['seconds'])} {_change(got['peak_mb'], ref['peak_mb'])}"
+              if ref else "")
+        print(f"  {name:<17} {got['seconds']:9.2f} {got['peak_mb']:9,.0f}   {vs}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--like", help="take the 1x dimensions from this real archive")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workdir", help="keep archives (reused across runs), outputs and logs "
+                                      "here instead of a temporary directory")
+    ap.add_argument("--history", default=HISTORY)
+    ap.add_argument("--no-record", action="store_true", help="compare only; don't append")
+    ap.add_argument("--baseline", type=int, default=5, help="previous runs to take the median of")
+    ap.add_argument("--time-tolerance", type=float, default=0.25)
+    ap.add_argument("--memory-tolerance", type=float, default=0.15)
+    ap.add_argument("--min-seconds", type=float, default=0.5,
+                    help="ignore slowdowns smaller than this")
+    ap.add_argument("--min-mb", type=float, default=25, help="ignore growth smaller than this")
+    args = ap.parse_args()
+
+    dims = dict(synth_db.BASE, **(synth_db.dimensions(args.like) if args.like else {}))
+    root = args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.makedirs(root, exist_ok=True)
+    history = read_history(args.history)
+    failed = []
+    try:
+        for scale in args.scales:
+            db = os.path.join(root, f"synth_{scale:g}x_{dims['snapshots']}_{dims['board']}_"
+                                    f"{dims['universe']}_{args.seed}.db")
+            if not os.path.exists(db):
+                print(f"generating the {scale:g}x archive...", flush=True)
+                synth_db.generate(db, scale, seed=args.seed, progress=True, **dims)
+            work = os.path.join(root, f"run_{scale:g}x")
+            shutil.rmtree(work, ignore_errors=True)
+            os.makedirs(os.path.join(work, "ml"))
+            os.makedirs(os.path.join(work, "logs"))
+            env = dict(os.environ, SENTIMENT_BACKEND="lexicon",
+                       SENTIMENT_CACHE=os.path.join(work, "sentiment_cache.db"))
+            print(f"running the pipeline at {scale:g}x...", flush=True)
+            rows, stages = run_pipeline(db, work, env)
+            record = {
+                "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": _commit(), "host": platform.node(), "cpus": os.cpu_count(),
+                "python": platform.python_version(), "scale": scale, "dims": dims,
+                "seed": args.seed, "rows": rows, "stages": stages,
+            }
+            base = baseline(history, record, args.baseline)
+            report(record, base)
+            for name, what in regressions(record, base, args):
+                print(f"  REGRESSION {name}: {what}")
+                failed.append((scale, name))
+            if not args.no_record:
+                with open(args.history, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+                history.append(record)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+    if not args.no_record:
+        print(f"\nrecorded {len(args.scales)} run(s) in {args.history}")
+    if failed:
+        print(f"{len(failed)} regression(s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark ml/archive.py's indexed queries against the full-scan path.
+
+Builds a synthetic trending DB (synth_db.boards()), then
+answers each question two ways and checks they agree:
+
+  * full scan: build_dataset.load() the whole table, filter in pandas;
+  * indexed:   one Archive query, filtered inside SQLite.
+
+    python bench/bench_query.py
+    python bench/bench_query.py --snapshots 8760 --board 300
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+import ticker_db  # noqa: E402
+from archive import Archive  # noqa: E402
+from synth_db import HOUR_US, T0_US, boards, insert  # noqa: E402
+from build_dataset import load  # noqa: E402
+
+COLS = ["utc_timestamp", "ticker_symbol", "last_price", "percent_change", "volume", "mktcap"]
+
+
+def best_of(fn, repeat=3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def same(a, b):
+    key = ["utc_timestamp", "ticker_symbol"]
+    a = a[COLS].sort_values(key).reset_index(drop=True)
+    b = b[COLS].sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a, b)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--snapshots", type=int, default=3000)
+    ap.add_argument("--board", type=int, default=300)
+    ap.add_argument("--churn", type=int, default=20)
+    ap.add_argument("--universe", type=int, default=4000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        conn = ticker_db.connect(db)
+        with conn:
+            insert(conn, boards(args.snapshots, args.board, args.churn, args.universe))
+        ticker_db.close(conn)
+        last = pd.to_datetime(T0_US + (args.snapshots - 1) * HOUR_US, unit="us")
+        week0, week1 = last - pd.Timedelta(days=14), last - pd.Timedelta(days=7)
+        since = last - pd.Timedelta(days=30)
+
+        t_load, full = best_of(lambda: load(db), repeat=1)
+        sym = full["ticker_symbol"].value_counts().index[0]
+        scans = {
+            "latest_snapshot": lambda d: d[d["utc_timestamp"] == d["utc_timestamp"].max()],
+            "snapshots_between": lambda d: d[(d["utc_timestamp"] >= week0) & (d["utc_timestamp"] < week1)],
+            "ticker_history": lambda d: d[(d["ticker_symbol"] == sym) & (d["utc_timestamp"] >= since)],
+            "top_movers": lambda d: d[d["utc_timestamp"] == d["utc_timestamp"].max()]
+            .assign(m=lambda x: x["percent_change"].abs())
+            .sort_values("m", ascending=False, kind="stable").head(10),
+        }
+        print(f"{len(full):,} rows; full load {t_load:.3f}s")
+        print(f"  {'query':18} {'rows':>6} {'full scan s':>12} {'indexed s':>10} {'speedup':>8}")
+        with Archive(db) as a:
+            indexed = {
+                "latest_snapshot": a.latest_snapshot,
+                "snapshots_between": lambda: a.snapshots_between(week0, week1),
+                "ticker_history": lambda: a.ticker_history(sym, since=since),
+                "top_movers": a.top_movers,
+            }
+            for name, scan in scans.items():
+                t_scan, ref = best_of(lambda: scan(load(db)), repeat=1)
+                t_idx, got = best_of(indexed[name])
+                same(got, ref)
+                print(f"  {name:18} {len(got):6,} {t_scan:12.3f} {t_idx:10.4f} {t_scan / t_idx:7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Scoring-load benchmark: latest_features() vs add_features(load()) as the
+archive grows.
+
+For synthetic archives of increasing history (same board size, written through
+the ingest path by bench/synth_db.py, so ticker_state is current), the newest
+``--score`` snapshots are computed both ways. Every column except the category
+codes (which scoring takes from the training vocabulary) must match exactly;
+then both are timed. The bounded load should stay flat while the full load
+grows with the archive. Two edge cases are checked the same way on the last
+archive: asking for more snapshots than it holds, and scoring it split into two
+archives that overlap (an archives/*.db file plus the current DB).
+
+    python bench/bench_scoring.py
+    python bench/bench_scoring.py --snapshots 500 2000 8000 --score 3
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Archives and the sentiment cache go in a scratch directory; ml/sentiment.py
+# reads $SENTIMENT_CACHE when it is imported.
+SCRATCH = tempfile.mkdtemp(prefix="bench_scoring_")
+os.environ["SENTIMENT_CACHE"] = os.path.join(SCRATCH, "sentiment_cache.db")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+from build_dataset import add_features, latest_features, load  # noqa: E402
+import synth_db  # noqa: E402
+
+
+def latest_rows(full, k):
+    """The rows of ``full``'s newest ``k`` snapshots."""
+    times = np.sort(full["utc_timestamp"].unique())[-k:]
+    return full[full["utc_timestamp"].isin(times)].reset_index(drop=True)
+
+
+def check(got, ref):
+    cols = [c for c in ref.columns if c not in ("sector_code", "industry_code")]
+    pd.testing.assert_frame_equal(got[cols], ref[cols], check_exact=True)
+
+
+def overlapping(db, tmp):
+    """``db`` as two archives that overlap up to its newest snapshot: a full copy
+    (archived just now) and the current DB with only its newest two thirds."""
+    with sqlite3.connect(db) as conn:
+        times = [t for (t,) in conn.execute(
+            "SELECT DISTINCT utc_timestamp FROM trending_tickers ORDER BY utc_timestamp")]
+    old, new = os.path.join(tmp, "old.db"), os.path.join(tmp, "new.db")
+    shutil.copy(db, old)
+    shutil.copy(db, new)
+    with sqlite3.connect(new) as conn:
+        conn.execute("DELETE FROM trending_tickers WHERE utc_timestamp < ?", (times[len(times) // 3],))
+    return [old, new]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--snapshots", type=int, nargs="+", default=[250, 1000, 4000])
+    ap.add_argument("--board", type=int, default=30)
+    ap.add_argument("--universe", type=int, default=600)
+    ap.add_argument("--score", type=int, default=1, help="snapshots to score")
+    args = ap.parse_args()
+    os.environ.setdefault("SENTIMENT_BACKEND", "lexicon")
+
+    print(f"  {'rows':>9} {'full s':>8} {'bounded s':>10} {'speedup':>8}  identical")
+    tmp = SCRATCH
+    try:
+        for n in args.snapshots:
+            db = os.path.join(tmp, f"archive_{n}.db")
+            rows = synth_db.generate(db, snapshots=n, board=args.board, universe=args.universe)
+            t0 = time.perf_counter()
+            got = latest_features(db, snapshots=args.score)
+            t_new = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            full = add_features(load(db))
+            ref = latest_rows(full, args.score)
+            t_ref = time.perf_counter() - t0
+            check(got, ref)
+            print(f"  {rows:9,} {t_ref:8.2f} {t_new:10.3f} {t_ref / t_new:7.1f}x  yes")
+
+        check(latest_features(db, snapshots=n + 5), full)
+        print(f"  {n + 5} snapshots asked of {n}: all of them, identical")
+        split = overlapping(db, tmp)
+        check(latest_features(split, snapshots=3), latest_rows(full, 3))
+        print("  overlapping archives: the newest 3 distinct snapshots, identical")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
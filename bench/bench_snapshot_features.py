@@ -0,0 +1,96 @@
+"""Equivalence check and scaling benchmark for the cross-sectional feature kernels.
+
+``reference()`` is the groupby code add_features used before
+add_snapshot_features: ``groupby("utc_timestamp")`` rank(pct=True) /
+transform("count") and a second groupby on (utc_timestamp, sector) for
+sector_heat. On synthetic boards with heavy ties (percent_change rounded to
+0.1, a handful of volume levels), -0.0 / inf / NaN values, sectors missing,
+and -- with --edge -- missing snapshot times and tickers, every column must
+match exactly (values, NaNs and dtypes). Then both are timed.
+
+    python bench/bench_snapshot_features.py
+    python bench/bench_snapshot_features.py --edge --sizes 10000 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# These kernels score no headlines, but importing build_dataset imports
+# ml/sentiment.py: keep it off ml/sentiment_cache.db all the same.
+os.environ.setdefault("SENTIMENT_CACHE", os.path.join(tempfile.gettempdir(),
+                                                      "bench_sentiment_cache.db"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+from bench_targets import synthetic  # noqa: E402
+from build_dataset import add_snapshot_features  # noqa: E402
+
+COLUMNS = ["rank_pct_change", "rank_volume", "board_size", "sector_heat"]
+
+
+def reference(df):
+    """The groupby code add_features ran before the snapshot kernels."""
+    out = pd.DataFrame(index=df.index)
+    snap = df.groupby("utc_timestamp", sort=False)
+    out["rank_pct_change"] = snap["percent_change"].rank(pct=True)
+    out["rank_volume"] = snap["volume"].rank(pct=True)
+    out["board_size"] = snap["ticker_symbol"].transform("count")
+    sect_ct = df.groupby(["utc_timestamp", "sector"])["ticker_symbol"].transform("count")
+    out["sector_heat"] = sect_ct / out["board_size"]
+    return out
+
+
+def frame(rows, edge=False, seed=0):
+    df = synthetic(rows, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    n = len(df)
+    pc = np.round(rng.normal(0, 3, n), 1)
+    pc[rng.random(n) < 0.05] = np.nan
+    pc[rng.random(n) < 0.01] = -0.0
+    pc[rng.random(n) < 0.005] = np.inf
+    df["percent_change"] = pc
+    df["volume"] = rng.choice([1e6, 2e6, 3.5e6, np.nan], n)
+    df["sector"] = rng.choice(np.array(["Energy", "Technology", "Utilities", None], dtype=object), n)
+    # one snapshot with no percent_change at all
+    df.loc[df["utc_timestamp"] == df["utc_timestamp"].iloc[0], "percent_change"] = np.nan
+    if edge:
+        df.loc[rng.random(n) < 0.01, "utc_timestamp"] = pd.NaT
+        df.loc[rng.random(n) < 0.01, "ticker_symbol"] = None
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    ap.add_argument("--reference-max", type=int, default=10_000_000,
+                    help="skip the groupby reference above this many rows")
+    ap.add_argument("--edge", action="store_true",
+                    help="also drop ~1%% of snapshot times and tickers (NaN groups)")
+    args = ap.parse_args()
+
+    print(f"  {'rows':>11} {'groupby s':>10} {'kernels s':>10} {'speedup':>8}  identical")
+    for n in args.sizes:
+        df = frame(n, edge=args.edge)
+        got = df.copy()
+        t0 = time.perf_counter()
+        got = add_snapshot_features(got)
+        t_new = time.perf_counter() - t0
+        if len(df) > args.reference_max:
+            print(f"  {len(df):11,} {'-':>10} {t_new:10.3f} {'-':>8}  (reference skipped)")
+            continue
+        t0 = time.perf_counter()
+        ref = reference(df)
+        t_ref = time.perf_counter() - t0
+        pd.testing.assert_frame_equal(got[COLUMNS], ref[COLUMNS], check_exact=True)
+        print(f"  {len(df):11,} {t_ref:10.2f} {t_new:10.3f} {t_ref / t_new:7.1f}x  yes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Equivalence check and scaling benchmark for build_dataset's forward targets.
+
+``reference()`` is the original per-ticker / per-row Python loop that
+add_targets used for fwd_return_24h / fwd_vol_24h; ``forward_return_vol`` is the
+vectorized replacement. On synthetic boards (irregular snapshot times, missing,
+zero and negative prices, tickers dropping on and off) both must agree bit for
+bit, NaNs included; then both are timed at growing sizes.
+
+    python bench/bench_targets.py
+    python bench/bench_targets.py --sizes 10000 100000 1000000 --reference-max 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ml"))
+from build_dataset import RETURN_HORIZON_H, forward_return_vol  # noqa: E402
+
+
+def reference(df, hz=RETURN_HORIZON_H):
+    """The loop add_targets ran before vectorization (unobserved-window masking aside)."""
+    g = df.groupby("ticker_symbol", sort=False)
+    fwd_ret = np.full(len(df), np.nan)
+    fwd_vol = np.full(len(df), np.nan)
+    for _, idx in g.groups.items():
+        idx = np.asarray(idx)
+        t = df["utc_timestamp"].values[idx].astype("datetime64[ns]")
+        p = df["last_price"].values[idx].astype(float)
+        horizon = t + np.timedelta64(int(hz * 3600), "s")
+        for j in range(len(idx)):
+            hi = np.searchsorted(t, horizon[j], side="right")
+            fut = [k for k in range(j + 1, hi) if k > j]
+            if not fut:
+                continue
+            p_last = p[fut[-1]]
+            if p[j] and p_last and p[j] > 0 and p_last > 0:
+                fwd_ret[idx[j]] = p_last / p[j] - 1.0
+            seq = [p[j]] + [p[k] for k in fut]
+            seq = np.array([x for x in seq if x and x > 0], dtype=float)
+            if len(seq) >= 3:
+                logret = np.diff(np.log(seq))
+                fwd_vol[idx[j]] = float(np.std(logret))
+    return fwd_ret, fwd_vol
+
+
+def synthetic(rows, board=300, universe=None, seed=0):
+    """A loaded-frame lookalike: ~``rows`` rows sorted by (ticker, time)."""
+    rng = np.random.default_rng(seed)
+    universe = universe or board * 12
+    n_snap = max(2, rows // board)
+    # mostly hourly, with 10-minute bursts and multi-hour gaps
+    gaps = rng.choice([600, 3600, 3600, 3600, 7200, 6 * 3600], size=n_snap)
+    times = pd.Timestamp("2025-01-01").value + np.cumsum(gaps).astype(np.int64) * 10**9
+    # a sticky board: each ticker has a persistent popularity
+    weight = rng.pareto(1.2, universe) + 0.05
+    weight /= weight.sum()
+    syms, ts = [], []
+    for s in range(n_snap):
+        on = rng.choice(universe, board, replace=False, p=weight)
+        syms.append(on)
+        ts.append(np.full(board, times[s]))
+    df = pd.DataFrame({"ticker_symbol": np.concatenate(syms), "utc_timestamp": np.concatenate(ts)})
+    df["ticker_symbol"] = "T" + df["ticker_symbol"].astype(str)
+    df["utc_timestamp"] = pd.to_datetime(df["utc_timestamp"])
+    price = np.exp(rng.normal(3, 1, len(df))) * (1 + rng.normal(0, 0.02, len(df)))
+    price[rng.random(len(df)) < 0.02] = np.nan
+    price[rng.random(len(df)) < 0.005] = 0.0
+    price[rng.random(len(df)) < 0.002] = -1.0
+    df["last_price"] = price
+    return df.sort_values(["ticker_symbol", "utc_timestamp"]).reset_index(drop=True)
+
+
+def bits(a):
+    return np.ascontiguousarray(a, dtype=np.float64).view(np.int64)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--reference-max", type=int, default=200_000,
+                    help="skip the (slow) reference loop above this many rows")
+    args = ap.parse_args()
+
+    horizon = np.timedelta64(int(RETURN_HORIZON_H * 3600), "s")
+    print(f"  {'rows':>9} {'loop s':>9} {'vectorized s':>13} {'speedup':>8}  identical")
+    for n in args.sizes:
+        df = synthetic(n)
+        t0 = time.perf_counter()
+        ret, vol = forward_return_vol(df["ticker_symbol"].to_numpy(),
+                                      df["utc_timestamp"].to_numpy(dtype="datetime64[ns]"),
+                                      df["last_price"].to_numpy(dtype=float), horizon)
+        t_vec = time.perf_counter() - t0
+        if len(df) > args.reference_max:
+            print(f"  {len(df):9,} {'-':>9} {t_vec:13.3f} {'-':>8}  (reference skipped)")
+            continue
+        t0 = time.perf_counter()
+        ref_ret, ref_vol = reference(df)
+        t_ref = time.perf_counter() - t0
+        assert np.array_equal(bits(ret), bits(ref_ret)), "fwd_return_24h differs"
+        assert np.array_equal(bits(vol), bits(ref_vol)), "fwd_vol_24h differs"
+        print(f"  {len(df):9,} {t_ref:9.2f} {t_vec:13.3f} {t_ref / t_vec:7.0f}x  yes "
+              f"({np.isfinite(vol).sum():,} vol / {np.isfinite(ret).sum():,} return labels)")
+
+
+if __name__ == "__main__":
+    main()
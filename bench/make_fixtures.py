@@ -0,0 +1,92 @@
+"""Generate the Yahoo screener HTML fixtures used by bench/bench_parse.py.
+
+The pages mirror the markup the scraper targets on finance.yahoo.com/markets/
+stocks/{trending,most-active}: a multi-MB document dominated by inline <script>
+JSON and navigation, with one ``<table class="bd">`` whose cells wrap values in
+<fin-streamer>/<span> elements, a ticker <a data-testid="table-cell-ticker">, and
+the concatenated "price+change(pct%)" text the price regex expects. Output is
+deterministic (fixed seed) and gzip-compressed:
+
+    python bench/make_fixtures.py            # -> bench/fixtures/yahoo_{30,100,200}.html.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+
+HEADERS = ["Symbol", "Name", "", "Price", "Change", "Change %", "Volume", "Avg Vol (3M)",
+           "Market Cap", "P/E Ratio (TTM)", "52 Wk Change %", "52 Wk Range"]
+SUFFIX = ["", "K", "M", "B", "T"]
+
+
+def _mag(rng, lo, hi):
+    v = 10 ** rng.uniform(lo, hi)
+    for i, s in enumerate(SUFFIX):
+        if v < 1000 ** (i + 1) or s == "T":
+            return f"{v / 1000 ** i:.3f}{s}" if s else f"{v:.0f}"
+
+
+def _row(rng, i):
+    sym = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(1, 4)))
+    sym = f"{sym}{i}" if rng.random() < 0.2 else sym
+    price = rng.uniform(1, 900)
+    chg = price * rng.uniform(-0.15, 0.15)
+    pct = 100 * chg / price
+    pe = "-" if rng.random() < 0.2 else f"{rng.uniform(3, 120):.2f}"
+    return f"""
+<tr class="row yf-ao6als"><td class="cell yf-ao6als"><span class="ticker-wrapper"><div class="name yf-1m808gl"><a data-testid="table-cell-ticker" href="/quote/{sym}/" title="{sym} Corp"><span class="symbol yf-1m808gl">{sym}</span></a></div></span></td>
+<td class="cell yf-ao6als"><div title="{sym} Holdings Inc." class="yf-362rys"> {sym} Holdings Inc. </div></td>
+<td class="cell yf-ao6als"><div class="spark"><!-- sparkline --><svg width="70" height="30"><path d="M0 10 L70 12"></path></svg></div></td>
+<td class="cell yf-ao6als"><span class="yf-ls9b3u"><fin-streamer data-test="change" data-symbol="{sym}" data-field="regularMarketPrice" data-trend="none" data-pricehint="2" data-value="{price:.2f}" active="">{price:.2f}</fin-streamer></span>
+<div class="yf-1jswjkv"><fin-streamer class="yf-1jswjkv" data-field="regularMarketChange" data-value="{chg:.2f}"><span class="e3b14781">{chg:+.2f}</span></fin-streamer> <fin-streamer data-field="regularMarketChangePercent"><span class="e3b14781">({pct:+.2f}%)</span></fin-streamer></div></td>
+<td class="cell yf-ao6als"><span class="e3b14781">{chg:+.2f}</span></td>
+<td class="cell yf-ao6als"><span class="e3b14781">{pct:+.2f}%</span></td>
+<td class="cell yf-ao6als"><fin-streamer data-field="regularMarketVolume">{_mag(rng, 4, 9)}</fin-streamer></td>
+<td class="cell yf-ao6als">{_mag(rng, 4, 9)}</td>
+<td class="cell yf-ao6als"><fin-streamer data-field="marketCap">{_mag(rng, 7, 12.5)}</fin-streamer></td>
+<td class="cell yf-ao6als">{pe}</td>
+<td class="cell yf-ao6als"><span class="e3b14781">{rng.uniform(-80, 300):+.2f}%</span></td>
+<td class="cell yf-ao6als"><script type="application/json">{{"lo":{price * 0.6:.2f}}}</script><div class="range">{price * 0.6:.2f} - {price * 1.4:.2f}</div></td></tr>"""
+
+
+def make_page(n_rows, seed=0, script_kb=1200):
+    rng = random.Random(seed)
+    blob = json.dumps({"context": {"dispatcher": {"stores": {
+        f"k{i}": {"v": "x" * rng.randint(20, 200), "n": rng.random()} for i in range(script_kb * 6)}}}})
+    nav = "".join(f'<li><a href="/topic/{i}">Topic {i}</a></li>' for i in range(400))
+    head = "".join(f"<th class=\"yf-ao6als\"><div class=\"header\">{h}<span class=\"sort\"></span></div></th>"
+                   for h in HEADERS)
+    rows = "".join(_row(rng, i) for i in range(n_rows))
+    return f"""<!DOCTYPE html>
+<html lang="en-US"><head><meta charset="utf-8"><title>Trending Tickers - Yahoo Finance</title>
+<script>window.YAHOO=window.YAHOO||{{}};</script>
+<script type="application/json" data-sveltekit-fetched>{blob}</script>
+<style>.yf-ao6als{{padding:4px}} table.bd td{{text-align:right}}</style></head>
+<body><header><nav><ul>{nav}</ul></nav></header>
+<main><section><table class="markets-summary"><tr><th>Index</th></tr><tr><td>S&amp;P 500</td></tr></table>
+<div class="tableContainer yf-1ovxvqf"><table class="yf-ao6als bd">
+<thead><tr class="yf-ao6als">{head}</tr></thead>
+<tbody>{rows}
+</tbody></table></div></section></main>
+<footer><script>{blob[:len(blob) // 4]}</script></footer></body></html>"""
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 200])
+    ap.add_argument("--out-dir", default=os.path.join(os.path.dirname(__file__), "fixtures"))
+    args = ap.parse_args()
+    os.makedirs(args.out_dir, exist_ok=True)
+    for n in args.sizes:
+        html = make_page(n, seed=n)
+        path = os.path.join(args.out_dir, f"yahoo_{n}.html.gz")
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=9) as f:
+            f.write(html)
+        print(f"wrote {path}  ({len(html) / 1e6:.2f} MB raw, {os.path.getsize(path) / 1e3:.0f} KB gz)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Realistic synthetic trending-tickers DBs for benchmarks.
+
+generate() writes a DB at the current schema through the same ingest steps as
+scrape_tickers.save_to_sqlite(): headlines go through ticker_db.save_news()
+(``news`` / ``ticker_news``, one story_id per row), volume and market cap
+arrive as Yahoo magnitude strings ('19.87M', '1.211T', '--') and are parsed
+with ticker_db.parse_magnitude(), and every snapshot advances
+``ticker_state`` with ticker_db.record_board(). What goes in:
+
+  * an hourly trending board of ~``board`` tickers that churns -- each member
+    drops off with probability ``churn`` per hour and is replaced by a draw
+    from a Zipf-weighted universe, so a few names keep coming back and most
+    appear once or twice;
+  * per ticker: a company name, a sector/industry (none for the ~8% that are
+    crypto, indices or ETFs), a price random walk, heavy-tailed daily
+    percent changes, and a headline that changes every few appearances
+    (70% of rows carry one).
+
+``scale`` multiplies the history (snapshots); the universe grows with its
+square root, as new names keep appearing. At scale 1 the defaults are about
+six months of a 25-ticker board (~110k rows); ``dimensions()`` measures them
+from a real archive instead.
+
+boards() / insert() are the bare version for the micro-benchmarks: symbols
+S00000..., a fixed churn per hour, constant prices and no news.
+
+    python bench/synth_db.py /tmp/synth.db --scale 10
+    python bench/synth_db.py /tmp/synth.db --like trending-tickers.db
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import ticker_db  # noqa: E402
+
+HOUR_US = 3_600_000_000
+T0_US = 1_735_689_600_000_000  # 2025-01-01 00:00 UTC
+BASE = {"snapshots": 4380, "board": 25, "universe": 1500}
+
+SECTORS = {
+    "Technology": ["Semiconductors", "Software - Infrastructure", "Software - Application",
+                   "Consumer Electronics", "Computer Hardware"],
+    "Healthcare": ["Biotechnology", "Drug Manufacturers - General", "Medical Devices",
+                   "Healthcare Plans"],
+    "Financial Services": ["Banks - Diversified", "Capital Markets", "Asset Management",
+                           "Insurance - Diversified"],
+    "Consumer Cyclical": ["Auto Manufacturers", "Internet Retail", "Restaurants", "Apparel Retail"],
+    "Communication Services": ["Internet Content & Information", "Entertainment",
+                               "Telecom Services"],
+    "Energy": ["Oil & Gas Integrated", "Oil & Gas E&P", "Uranium"],
+    "Industrials": ["Aerospace & Defense", "Airlines", "Specialty Industrial Machinery"],
+    "Consumer Defensive": ["Discount Stores", "Beverages - Non-Alcoholic", "Packaged Foods"],
+    "Utilities": ["Utilities - Regulated Electric", "Utilities - Renewable"],
+    "Real Estate": ["REIT - Specialty", "Real Estate Services"],
+    "Basic Materials": ["Gold", "Specialty Chemicals", "Steel"],
+}
+WORDS = ["Apex", "Blue", "Cedar", "Delta", "Summit", "Harbor", "Nova", "Pioneer", "Quantum",
+         "River", "Solar", "Titan", "Vertex", "Granite", "Atlas", "Beacon", "Lumen", "Orbit"]
+SUFFIXES = ["Inc.", "Corp.", "Holdings, Inc.", "Group Ltd.", "Technologies Inc.", "plc"]
+EVENTS = ["shares surge after earnings beat", "stock slumps as guidance disappoints",
+          "jumps on upgrade from analysts", "falls amid probe into accounting",
+          "rallies to record high on strong demand", "announces layoffs as growth slows",
+          "wins approval for new product", "drops after missing revenue estimates",
+          "soars on takeover speculation", "sinks as short seller targets it",
+          "climbs after raising full-year outlook", "tumbles on weak subscriber growth"]
+_SUFFIX = [(1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")]
+
+
+def magnitude(x):
+    """A float as Yahoo prints it: 4 significant digits and a K/M/B/T suffix."""
+    for div, suffix in _SUFFIX:
+        if x >= div:
+            return f"{x / div:.4g}{suffix}"
+    return f"{x:.4g}"
+
+
+def boards(n_snapshots, board, churn, universe, seed=0):
+    """Yield (epoch_us, symbols) per hourly snapshot, ``churn`` of the ``board``
+    symbols replaced at each one."""
+    rng = np.random.default_rng(seed)
+    on = set(rng.choice(universe, board, replace=False).tolist())
+    for s in range(n_snapshots):
+        out = set(rng.choice(sorted(on), churn, replace=False).tolist())
+        on -= out
+        while len(on) < board:
+            on.add(int(rng.integers(0, universe)))
+        yield T0_US + s * HOUR_US, sorted(f"S{i:05d}" for i in on)
+
+
+def insert(conn, snapshots):
+    """Write boards() snapshots as bare trending rows."""
+    conn.executemany(
+        "INSERT INTO trending_tickers (utc_timestamp, ticker_symbol, last_price, percent_change, "
+        "trading_volume, market_cap, boards) VALUES (?, ?, 1.0, 0.0, 1e6, 1e9, 'trending')",
+        [(ts, sym) for ts, symbols in snapshots for sym in symbols])
+
+
+def dimensions(db_file):
+    """Scale-1 dimensions (snapshots, board, universe) of a real archive."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    snapshots, rows, universe = conn.execute(
+        "SELECT COUNT(DISTINCT utc_timestamp), COUNT(*), COUNT(DISTINCT ticker_symbol) "
+        "FROM trending_tickers").fetchone()
+    conn.close()
+    return {"snapshots": snapshots, "board": max(1, round(rows / max(snapshots, 1))),
+            "universe": universe}
+
+
+def _universe(rng, n):
+    """Per-ticker static attributes."""
+    symbols, seen = [], set()
+    while len(symbols) < n:
+        k = rng.integers(1, 5)
+        sym = "".join(chr(65 + c) for c in rng.integers(0, 26, k))
+        kind = rng.random()
+        if kind < 0.03:
+            sym += "-USD"  # crypto
+        elif kind < 0.05:
+            sym = "^" + sym  # index
+        if sym not in seen:
+            seen.add(sym)
+            symbols.append(sym)
+    sectors = list(SECTORS)
+    tickers = []
+    for sym in symbols:
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(SUFFIXES)}"
+        if sym.endswith("-USD") or sym.startswith("^") or rng.random() < 0.03:  # + ETFs
+            sector = industry = None
+        else:
+            sector = sectors[rng.integers(len(sectors))]
+            industry = SECTORS[sector][rng.integers(len(SECTORS[sector]))]
+        tickers.append((sym, name, sector, industry))
+    return tickers
+
+
+def generate(path, scale=1.0, snapshots=None, board=None, universe=None, churn=0.25, seed=0,
+             progress=False):
+    """Write a synthetic archive to ``path`` (replaced if it exists) -> rows written.
+    ``snapshots`` / ``board`` / ``universe`` are the scale-1 dimensions
+    (default BASE)."""
+    snapshots = int(round((snapshots or BASE["snapshots"]) * scale))
+    board = board or BASE["board"]
+    universe = max(board * 2, int(round((universe or BASE["universe"]) * math.sqrt(scale))))
+    rng = np.random.default_rng(seed)
+    tickers = _universe(rng, universe)
+    weight = 1.0 / np.arange(1, universe + 1) ** 1.1  # Zipf: a few names dominate
+    weight = weight[rng.permutation(universe)]
+    price = np.exp(rng.normal(3.5, 1.2, universe))
+    shares = np.exp(rng.normal(19.5, 1.5, universe))   # market cap = price * shares
+    turnover = np.exp(rng.normal(-4.5, 1.0, universe))  # daily volume / shares
+    last_seen = np.full(universe, -1)
+    story = np.zeros(universe, dtype=np.int64)
+    stories = [[] for _ in range(universe)]             # recent (published, title, summary, link)
+
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+    conn = ticker_db.connect(path)
+    cols = ticker_db.TRENDING_COLUMNS
+    insert = f"INSERT INTO trending_tickers ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+    on = rng.choice(universe, board, replace=False, p=weight / weight.sum())
+    written, t_start = 0, time.perf_counter()
+    conn.execute("BEGIN")
+    for s in range(snapshots):
+        ts = T0_US + s * HOUR_US
+        # churn: members drop off, the board refills from the weighted universe
+        on = on[rng.random(len(on)) >= churn]
+        size = max(1, board + int(rng.integers(-3, 4)))
+        if len(on) < size:
+            w = weight.copy()
+            w[on] = 0
+            on = np.concatenate([on, rng.choice(universe, size - len(on), replace=False,
+                                                p=w / w.sum())])
+        on = np.sort(on)
+        gap = np.where(last_seen[on] < 0, 24, (s - last_seen[on]).clip(1, 24 * 30))
+        price[on] *= np.exp(rng.normal(0, 0.02, len(on)) * np.sqrt(gap))
+        last_seen[on] = s
+        pct = np.round(rng.standard_t(3, len(on)) * 2.5, 2)
+        rows, symbols, news_items = [], [], []
+        for i, p, pc in zip(on.tolist(), price[on].tolist(), pct.tolist()):
+            sym, name, sector, industry = tickers[i]
+            if rng.random() < 0.3 or not stories[i]:
+                story[i] += 1
+                published = datetime.fromtimestamp(ts / 1e6 - rng.integers(60, 3600), timezone.utc)
+                title = f"{name.split(' ')[0]} {name.split(' ')[1]} ({sym}) {EVENTS[rng.integers(len(EVENTS))]}"
+                stories[i] = [(published, title, f"{title}. More at 11.",
+                               f"https://finance.example.com/news/{sym.lower()}-{story[i]}")] + stories[i][:2]
+            items = stories[i] if rng.random() < 0.7 else []
+            vol = "--" if rng.random() < 0.01 else magnitude(shares[i] * turnover[i] * rng.lognormal(0, 0.5))
+            cap = "--" if sector is None and rng.random() < 0.5 else magnitude(shares[i] * p)
+            symbols.append(sym)
+            news_items.append(items)
+            rows.append([ts, "4:00PM EDT", sym, name, sector, industry, round(p, 2),
+                         None if rng.random() < 0.01 else pc, ticker_db.parse_magnitude(vol),
+                         ticker_db.parse_magnitude(cap), None, None, None, None, None, "trending"])
+        for row, sid in zip(rows, ticker_db.save_news(conn, ts, symbols, news_items)):
+            row[14] = sid
+        conn.executemany(insert, rows)
+        ticker_db.record_board(conn, ts, symbols)
+        written += len(rows)
+        if s % 500 == 499:
+            conn.execute("COMMIT")
+            conn.execute("BEGIN")
+            if progress and s % 5000 == 4999:
+                print(f"  {s + 1:,}/{snapshots:,} snapshots, {written:,} rows "
+                      f"({time.perf_counter() - t_start:.0f}s)", flush=True)
+    conn.execute("COMMIT")
+    ticker_db.close(conn)
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out")
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--like", help="take the scale-1 dimensions from this real archive")
+    ap.add_argument("--snapshots", type=int)
+    ap.add_argument("--board", type=int)
+    ap.add_argument("--universe", type=int)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    dims = dimensions(args.like) if args.like else {}
+    dims.update({k: v for k, v in (("snapshots", args.snapshots), ("board", args.board),
+                                   ("universe", args.universe)) if v})
+    t0 = time.perf_counter()
+    n = generate(args.out, args.scale, seed=args.seed, progress=True, **dims)
+    print(f"wrote {n:,} rows to {args.out} ({os.path.getsize(args.out) / 1e6:,.0f} MB) "
+          f"in {time.perf_counter() - t0:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Record / replay raw Yahoo payloads for network-free scraper runs.
+
+``scrape_tickers.py --record DIR`` saves each run under ``DIR/<snapshot>/``:
+
+    manifest.json         snapshot time (UTC), page urls, symbols
+    pages/<NAME>.html.gz  each raw screener page (trending, most-active-0, ...)
+    info/<SYM>.json.gz    each Ticker.info payload (or the error it raised)
+    news/<SYM>.json.gz    each Ticker.news payload (or the error it raised)
+
+``--replay DIR`` feeds one capture (a dir with a manifest.json) or every capture
+under DIR, oldest first, back through the unchanged parse -> enrich ->
+save_to_sqlite -> render_html pipeline with no network, so runs are deterministic
+and a DB can be rebuilt from raw captures after a schema change. Recorded errors
+are re-raised on replay, so per-ticker fallbacks replay exactly too.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+from urllib.parse import quote
+
+MANIFEST = "manifest.json"
+LEGACY_PAGE = "page.html.gz"  # single-board captures: the trending page
+
+
+class ReplayError(RuntimeError):
+    """A payload that raised when recorded (or is missing from the capture)."""
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, default=str)
+
+
+def _read_json(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _payload_path(root, kind, symbol):
+    return os.path.join(root, kind, quote(symbol, safe="") + ".json.gz")
+
+
+class _RecordingTicker:
+    """Proxies a live yf.Ticker, saving every .info/.news result (or error)."""
+
+    def __init__(self, root, symbol, live):
+        self._root, self._symbol, self._live = root, symbol, live
+
+    def _fetch(self, kind):
+        path = _payload_path(self._root, kind, self._symbol)
+        try:
+            value = getattr(self._live, kind)
+        except Exception as e:
+            _write_json(path, {"error": f"{type(e).__name__}: {e}"})
+            raise
+        _write_json(path, {"value": value})
+        return value
+
+    @property
+    def info(self):
+        return self._fetch("info")
+
+    @property
+    def news(self):
+        return self._fetch("news")
+
+
+class _ReplayTicker:
+    def __init__(self, root, symbol):
+        self._root, self._symbol = root, symbol
+
+    def _load(self, kind):
+        path = _payload_path(self._root, kind, self._symbol)
+        if not os.path.exists(path):
+            raise ReplayError(f"{self._symbol}: no {kind} payload in {self._root}")
+        payload = _read_json(path)
+        if "error" in payload:
+            raise ReplayError(payload["error"])
+        return payload["value"]
+
+    @property
+    def info(self):
+        return self._load("info")
+
+    @property
+    def news(self):
+        return self._load("news")
+
+
+class Recorder:
+    """Capture sink for one live run."""
+
+    replaying = False
+
+    def __init__(self, root):
+        self.root = root
+        self.dir = None
+        self.urls = {}
+
+    def start(self, now):
+        """Begin a capture for the run taking its snapshot at ``now``."""
+        self.snapshot_time = now
+        self.dir = os.path.join(self.root, now.strftime("%Y%m%dT%H%M%S%fZ"))
+        os.makedirs(os.path.join(self.dir, "pages"), exist_ok=True)
+        self.urls = {}
+        return now
+
+    def page(self, url, fetch, name="trending"):
+        content = fetch()
+        with gzip.open(os.path.join(self.dir, "pages", name + ".html.gz"), "wb") as f:
+            f.write(content)
+        self.urls[name] = url
+        return content
+
+    def ticker(self, symbol, make_live):
+        return _RecordingTicker(self.dir, symbol, make_live())
+
+    def finish(self, symbols):
+        with open(os.path.join(self.dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"snapshot_time": self.snapshot_time.isoformat(),
+                       "urls": self.urls, "symbols": list(symbols)}, f, indent=1)
+
+
+class Replay:
+    """Capture source for one recorded run."""
+
+    replaying = True
+
+    def __init__(self, capture_dir):
+        self.dir = capture_dir
+        with open(os.path.join(capture_dir, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.snapshot_time = datetime.fromisoformat(self.manifest["snapshot_time"])
+
+    def start(self, now):
+        """Replays keep the recorded snapshot time."""
+        return self.snapshot_time
+
+    def page(self, url, fetch, name="trending"):
+        path = os.path.join(self.dir, "pages", name + ".html.gz")
+        if not os.path.exists(path) and name == "trending":
+            path = os.path.join(self.dir, LEGACY_PAGE)
+        if not os.path.exists(path):
+            raise ReplayError(f"no {name} page in {self.dir}")
+        with gzip.open(path, "rb") as f:
+            return f.read()
+
+    def ticker(self, symbol, make_live):
+        return _ReplayTicker(self.dir, symbol)
+
+    def finish(self, symbols):
+        pass
+
+
+def find_captures(path):
+    """``path`` itself if it is a capture, else every capture below it, oldest first."""
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        return [path]
+    found = [d for d, _, files in os.walk(path) if MANIFEST in files]
+    return sorted(found, key=lambda d: Replay(d).snapshot_time)
@@ -0,0 +1,215 @@
+"""Pluggable extractors for Yahoo's screener table (``<table class="bd">``).
+
+Every backend returns the same ``(headers, rows)`` pair the scraper has always
+built with BeautifulSoup: ``headers`` is the stripped text of every ``<th>``;
+``rows`` has one list per ``<tr>`` after the first that contains ``<td>`` cells,
+each cell being the ticker link's text when the cell holds an
+``a[data-testid="table-cell-ticker"]``, otherwise the cell's text. Text follows
+``get_text(strip=True)``: every text node stripped and concatenated, with
+comments and <script>/<style>/<template> contents ignored.
+
+Backends:
+  * lxml   -- libxml2's C HTML parser + a single XPath to the table (default when
+              lxml is importable; CI installs it).
+  * stream -- stdlib ``html.parser`` fed only from the table's opening tag and
+              stopped at its close, so the rest of the (multi-MB) page is never
+              tokenized. Zero extra deps.
+  * bs4    -- the original BeautifulSoup ``html.parser`` walk; the reference.
+"""
+
+import re
+from html.parser import HTMLParser
+
+_SKIP_TEXT = {"script", "style", "template"}
+_TICKER_TESTID = "table-cell-ticker"
+_TABLE_START = re.compile(r"""<table\b[^>]*\bclass\s*=\s*["'][^"']*\bbd\b""", re.I)
+
+
+class TableNotFound(ValueError):
+    pass
+
+
+def _decode(html):
+    if isinstance(html, bytes):
+        return html.decode("utf-8", errors="replace")
+    return html
+
+
+# --- bs4 (reference) -------------------------------------------------------
+
+def extract_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', {'class': 'bd'})
+    if table is None:
+        raise TableNotFound("Trending stocks table not found")
+    headers = [th.get_text(strip=True) for th in table.find_all('th')]
+    rows = []
+    for row in table.find_all('tr')[1:]:  # Skip the header row
+        cells = row.find_all('td')
+        if cells:
+            row_data = []
+            for cell in cells:
+                link = cell.find('a', {'data-testid': _TICKER_TESTID})
+                if link:
+                    row_data.append(link.get_text(strip=True))  # Ticker symbol
+                else:
+                    row_data.append(cell.get_text(strip=True))  # Other cell values
+            rows.append(row_data)
+    return headers, rows
+
+
+# --- lxml -------------------------------------------------------------------
+
+def _lxml_text(el):
+    parts = []
+
+    def walk(node):
+        if node.text:
+            parts.append(node.text.strip())
+        for child in node:
+            # comments/PIs have a non-str tag; skip their text, keep their tail
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT:
+                walk(child)
+            if child.tail:
+                parts.append(child.tail.strip())
+
+    walk(el)
+    return "".join(parts)
+
+
+def extract_lxml(html):
+    import lxml.html
+
+    doc = lxml.html.fromstring(html)
+    found = doc.xpath("(//table[contains(concat(' ', normalize-space(@class), ' '), ' bd ')])[1]")
+    if not found:
+        raise TableNotFound("Trending stocks table not found")
+    table = found[0]
+    headers = [_lxml_text(th) for th in table.iter('th')]
+    rows = []
+    for row in list(table.iter('tr'))[1:]:
+        cells = list(row.iter('td'))
+        if cells:
+            row_data = []
+            for cell in cells:
+                link = next((a for a in cell.iter('a') if a.get('data-testid') == _TICKER_TESTID),
+                            None)
+                row_data.append(_lxml_text(link if link is not None else cell))
+            rows.append(row_data)
+    return headers, rows
+
+
+# --- streaming --------------------------------------------------------------
+
+class _Done(Exception):
+    pass
+
+
+class _TableParser(HTMLParser):
+    """Collects th/tr/td text of the first ``table.bd``; raises _Done at its end."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = False
+        self.depth = 0          # open <table> elements, counting the target as 1
+        self.skip = 0           # open script/style/template elements
+        self.headers = []
+        self.trs = []           # every <tr>: list of cell texts
+        self.th = None          # text parts of the open <th>
+        self.td = None          # text parts of the open <td>
+        self.link = None        # text parts of the open ticker <a>, if any
+        self.link_text = None   # finished ticker-link text of the open <td>
+
+    def _close_td(self):
+        if self.td is not None and self.trs:
+            text = self.link_text if self.link_text is not None else "".join(self.td)
+            self.trs[-1].append(text)
+        self.td = self.link = self.link_text = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth == 0:
+            if not self.found and tag == "table" \
+                    and "bd" in (dict(attrs).get("class") or "").split():
+                self.found = True
+                self.depth = 1
+            return
+        if tag in _SKIP_TEXT:
+            self.skip += 1
+        elif tag == "table":
+            self.depth += 1
+        elif tag == "tr":
+            self._close_td()
+            self.trs.append([])
+        elif tag == "td":
+            self._close_td()
+            self.td = []
+        elif tag == "th":
+            self.th = []
+        elif tag == "a" and self.td is not None and self.link_text is None \
+                and dict(attrs).get("data-testid") == _TICKER_TESTID:
+            self.link = []
+
+    def handle_endtag(self, tag):
+        if self.depth == 0:
+            return
+        if tag in _SKIP_TEXT:
+            self.skip = max(0, self.skip - 1)
+        elif tag == "table":
+            self.depth -= 1
+            if self.depth == 0:
+                self._close_td()
+                raise _Done
+        elif tag == "tr":
+            self._close_td()
+        elif tag == "td":
+            self._close_td()
+        elif tag == "th" and self.th is not None:
+            self.headers.append("".join(self.th))
+            self.th = None
+        elif tag == "a" and self.link is not None:
+            self.link_text = "".join(self.link)
+            self.link = None
+
+    def handle_data(self, data):
+        if self.depth == 0 or self.skip:
+            return
+        text = data.strip()
+        if not text:
+            return
+        for parts in (self.th, self.td, self.link):
+            if parts is not None:
+                parts.append(text)
+
+
+def extract_stream(html):
+    html = _decode(html)
+    m = _TABLE_START.search(html)
+    parser = _TableParser()
+    try:
+        parser.feed(html[m.start():] if m else html)
+        parser.close()
+    except _Done:
+        pass
+    if not parser.found:
+        raise TableNotFound("Trending stocks table not found")
+    rows = [r for r in parser.trs[1:] if r]
+    return parser.headers, rows
+
+
+BACKENDS = {"lxml": extract_lxml, "stream": extract_stream, "bs4": extract_bs4}
+
+
+def default_backend():
+    try:
+        import lxml.html  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "stream"
+
+
+def extract_table(html, backend=None):
+    """Return ``(headers, rows)`` for the page's ``table.bd`` using ``backend``
+    (one of BACKENDS; default: lxml if importable, else stream)."""
+    return BACKENDS[backend or default_backend()](html)
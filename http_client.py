@@ -0,0 +1,201 @@
+"""One pooled, rate-limited HTTP client for every Yahoo call the scraper makes.
+
+The page fetch and the per-ticker yfinance lookups share one keep-alive session
+(curl_cffi's browser-impersonating Session when available -- yfinance needs it to
+get past Yahoo's bot checks -- else a pooled ``requests.Session``) and one
+token-bucket limiter:
+
+  * every request/lookup takes a token first, so concurrent enrichment workers
+    can't burst past ``rate`` requests/second between them;
+  * a 429 (or a yfinance rate-limit error) halves the rate and the request is
+    retried after a jittered exponential backoff (honouring Retry-After);
+  * each success nudges the rate back up by ``recover`` req/s, up to
+    ``max_rate`` -- additive-increase / multiplicative-decrease, so throughput
+    settles just under whatever Yahoo tolerates that hour.
+
+Transient failures (connection errors, timeouts, 5xx) are retried with the same
+backoff. ``bytes`` counts the body of every response the session returns, so
+yfinance's own .info/.news requests are included along with the page fetches. Nothing here is Yahoo-specific, so it can be pointed at a local fake
+server (see bench/bench_http.py).
+"""
+
+import random
+import threading
+import time
+
+DEFAULT_RATE = 8.0        # requests/second to start at
+DEFAULT_MAX_RATE = 20.0
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_TIMEOUT = 15.0    # seconds, per request
+DEFAULT_RETRIES = 4
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimited(Exception):
+    """Raised when a request is still throttled after every retry."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts (AIMD) to throttling."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=None, min_rate=DEFAULT_MIN_RATE,
+                 max_rate=DEFAULT_MAX_RATE, recover=0.25):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.recover = recover
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available (and any throttle pause has passed)."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self, pause=0.0):
+        """A 429: halve the rate, drop saved-up tokens and pause everyone."""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.recover)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def new_session(pool_size=16):
+    """A keep-alive session: curl_cffi (Chrome impersonation) if importable, else
+    requests with a connection pool sized for the enrichment workers."""
+    try:
+        from curl_cffi import requests as curl_requests
+        return curl_requests.Session(impersonate="chrome")
+    except ImportError:
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+class YahooClient:
+    """Shared session + limiter. ``get`` for raw HTTP, ``call`` to run any other
+    network-bound callable (e.g. a yfinance property) under the same limiter.
+
+    ``rate_limit_errors`` are exception types that mean "throttled" when raised by
+    a ``call``ed function (the scraper registers yfinance's YFRateLimitError).
+    """
+
+    def __init__(self, session=None, rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, rate_limit_errors=(),
+                 pool_size=16):
+        self.session = session if session is not None else new_session(pool_size)
+        self._count_bytes(self.session)
+        self.bucket = TokenBucket(rate=rate, max_rate=max_rate)
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_limit_errors = tuple(rate_limit_errors)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retried = 0
+        self.throttled = 0
+        self.bytes = 0
+
+    @property
+    def impersonating(self):
+        """Does the session send a real browser's headers (curl_cffi)? Callers
+        must not override its User-Agent then: it would contradict the TLS
+        fingerprint being impersonated."""
+        return type(self.session).__module__.startswith("curl_cffi")
+
+    def _count_bytes(self, session):
+        """Add each response's body size to ``bytes``. Wraps the session's
+        ``request``, which its get/post (and so yfinance's calls) go through."""
+        request = session.request
+
+        def counted(*args, **kwargs):
+            response = request(*args, **kwargs)
+            self._count(bytes=len(response.content))
+            return response
+
+        session.request = counted
+
+    def _count(self, **deltas):
+        with self.lock:
+            for name, n in deltas.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def _throttle(self, attempt, retry_after=None):
+        self._count(throttled=1)
+        pause = backoff_delay(attempt)
+        if retry_after:
+            try:
+                pause = max(pause, float(retry_after))
+            except ValueError:
+                pass
+        self.bucket.throttled(pause)
+
+    def get(self, url, **kwargs):
+        """GET ``url`` under the limiter, retrying throttles, 5xx and transient
+        network errors. Returns the final response (raises RateLimited if still
+        429 after every retry, or the last network error)."""
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            self._count(requests=1, retried=1 if attempt else 0)
+            try:
+                response = self.session.get(url, **kwargs)
+            except OSError:  # requests and curl_cffi errors are both OSErrors
+                if attempt == self.retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUS:
+                self.bucket.succeeded()
+                return response
+            if response.status_code == 429:
+                self._throttle(attempt, response.headers.get("Retry-After"))
+            elif attempt < self.retries:
+                time.sleep(backoff_delay(attempt))
+        if response.status_code == 429:
+            raise RateLimited(f"{url}: still throttled after {self.retries} retries")
+        return response
+
+    def call(self, fn):
+        """Run ``fn()`` under the limiter, retrying it when it raises one of
+        ``rate_limit_errors``; any other exception propagates unchanged."""
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            self._count(requests=1, retried=1 if attempt else 0)
+            try:
+                result = fn()
+            except self.rate_limit_errors:
+                if attempt == self.retries:
+                    raise
+                self._throttle(attempt)
+                continue
+            self.bucket.succeeded()
+            return result
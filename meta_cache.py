@@ -0,0 +1,97 @@
+"""Persistent TTL cache for per-ticker sector/industry metadata.
+
+``yf.Ticker(sym).info`` is the heaviest call in the hourly scrape, and the only
+fields we keep from it (sector, industry) almost never change while the same
+regulars sit on the board for days. This caches them in a ``ticker_meta`` table
+inside the scraper's own SQLite file (next to ``trending_tickers``), so it travels
+with the DB the workflow already commits.
+
+  * positive entries live for ``ttl`` seconds (default 7 days), with up to 10%
+    random jitter so a cohort fetched in one run doesn't all expire together;
+  * failed lookups are cached too (negative caching) for the much shorter
+    ``negative_ttl``, so a symbol Yahoo is rejecting isn't retried every hour but
+    is re-checked soon;
+  * the table is bounded to ``max_entries`` rows, evicting least-recently-used.
+
+All methods are meant to be called from one thread (the scraper does its lookups
+before and after the enrichment pool, never inside it).
+"""
+
+import random
+import sqlite3
+import time
+
+import ticker_db
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL = 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class MetadataCache:
+    def __init__(self, db_file="trending-tickers.db", ttl=DEFAULT_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_file = db_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ticker_meta ("
+            " ticker_symbol TEXT PRIMARY KEY, sector TEXT, industry TEXT,"
+            " ok INTEGER NOT NULL, fetched_at REAL NOT NULL, expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ticker_meta_last_used ON ticker_meta (last_used)")
+        self.conn.commit()
+
+    def get_many(self, symbols, now=None):
+        """Return {symbol: (sector, industry)} for every unexpired entry.
+
+        Negative entries come back as ('', '') -- the same blanks the scraper
+        writes for a failed lookup -- so callers treat them as hits and skip Yahoo.
+        """
+        now = time.time() if now is None else now
+        uniq = sorted(set(symbols))
+        found = {}
+        for marks, chunk in ticker_db.in_chunks(uniq):
+            rows = self.conn.execute(
+                "SELECT ticker_symbol, sector, industry, ok FROM ticker_meta "
+                f"WHERE expires_at > ? AND ticker_symbol IN ({marks})", [now] + chunk)
+            for sym, sector, industry, ok in rows:
+                found[sym] = (sector or '', industry or '') if ok else ('', '')
+        if found:
+            self.conn.executemany("UPDATE ticker_meta SET last_used = ? WHERE ticker_symbol = ?",
+                                  [(now, s) for s in found])
+            self.conn.commit()
+        return found
+
+    def put_many(self, entries, now=None):
+        """Store fresh lookups. ``entries`` maps symbol -> (sector, industry), or
+        symbol -> None for a failed lookup (cached for ``negative_ttl``)."""
+        if not entries:
+            return
+        now = time.time() if now is None else now
+        rows = []
+        for sym, meta in entries.items():
+            if meta is None:
+                rows.append((sym, None, None, 0, now, now + self.negative_ttl, now))
+            else:
+                ttl = self.ttl * (1 + 0.1 * random.random())
+                rows.append((sym, meta[0], meta[1], 1, now, now + ttl, now))
+        self.conn.executemany("INSERT OR REPLACE INTO ticker_meta VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              rows)
+        self.evict()
+        self.conn.commit()
+
+    def evict(self):
+        """Trim to ``max_entries`` rows, dropping the least recently used first."""
+        (n,) = self.conn.execute("SELECT COUNT(*) FROM ticker_meta").fetchone()
+        if n > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM ticker_meta WHERE ticker_symbol IN ("
+                " SELECT ticker_symbol FROM ticker_meta ORDER BY last_used LIMIT ?)",
+                (n - self.max_entries,))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,78 @@
+"""Per-run timing and outcome metrics for the scraper.
+
+One ``RunMetrics`` is threaded through a run. Stages are timed with
+``with metrics.stage("fetch"):``; per-ticker lookups report their latency with
+``observe("info", seconds)``; outcomes are tallied with ``count("info_errors")``.
+Everything is safe to call from the enrichment worker threads.
+
+``record()`` flattens it into one JSON-serialisable dict:
+
+    {"started_at": iso, "wall_s": ..., "stages": {"fetch": s, "parse": s, ...},
+     "latency": {"info": {"n", "p50", "p90", "p99", "max", "sum"}, "news": {...},
+                 "ticker": {...}},
+     "counts": {"tickers": n, "info_errors": n, "blank_sector": n, ...}}
+
+which the scraper prints as one line and appends to the ``scrape_runs`` table.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already-sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.samples = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - t0)
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def observe(self, name, seconds):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def record(self):
+        with self.lock:
+            latency = {}
+            for name, values in self.samples.items():
+                values = sorted(values)
+                latency[name] = {
+                    "n": len(values), "p50": percentile(values, 50),
+                    "p90": percentile(values, 90), "p99": percentile(values, 99),
+                    "max": values[-1], "sum": sum(values),
+                }
+            return {
+                "started_at": self.started_at.isoformat(),
+                "wall_s": time.perf_counter() - self._t0,
+                "stages": dict(self.stages),
+                "latency": latency,
+                "counts": dict(self.counts),
+            }
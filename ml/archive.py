@@ -0,0 +1,279 @@
+"""Read-only, index-backed queries over a trending-tickers DB.
+
+Every reader used to pull the whole ``trending_tickers`` table through
+``pd.read_sql`` and filter in pandas. ``Archive`` pushes the filter into SQLite
+so the (ticker_symbol, utc_timestamp) and (utc_timestamp) indexes do the work:
+
+    with Archive("trending-tickers.db") as a:
+        a.latest_snapshot()                       # the current board
+        a.snapshots_between("2026-06-01", "2026-06-08")
+        a.ticker_history("NVDA", since="2026-06-01")
+        a.last_appearances(["NVDA", "AMD"], before="2026-06-01", k=5)
+        a.latest_times(3)                         # the newest 3 snapshot times
+        a.board_counts(["NVDA", "AMD"])           # trending appearances so far
+        a.top_movers()                            # latest board by |percent_change|
+
+Each returns the same typed frame build_dataset.load() produces (utc_timestamp
+as datetime64, ``volume``/``mktcap`` floats, headline joined from ``news``),
+restricted to ``board`` (trending by default; None for every board), ordered
+by (utc_timestamp, ticker_symbol). Timestamps may be datetimes, ISO strings or
+epoch microseconds; naive values are UTC. The connection is opened read-only,
+so it is safe next to a running scraper. build_dataset.load() reads DB archives
+through ``Archive.frame()`` (``Archive.chunks()`` in its lean mode).
+
+Snapshot queries need schema v3+ (typed timestamps); migrate older archives
+with ``python ticker_db.py``.
+"""
+
+import os
+import sqlite3
+import sys
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import ticker_db  # noqa: E402
+
+# ticker_db schema version from which timestamps/magnitudes are stored typed.
+TYPED_SCHEMA_VERSION = 3
+# ... and from which ingest keeps ticker_state.
+BOARD_STATE_SCHEMA_VERSION = 6
+
+
+def to_epoch_us(t):
+    """ticker_db.to_epoch_us(), but raising on a value that isn't a timestamp
+    rather than letting a query bound turn into NULL."""
+    us = ticker_db.to_epoch_us(t)
+    if us is None:
+        raise ValueError(f"not a timestamp: {t!r}")
+    return us
+
+
+def parse_magnitude(series):
+    """ticker_db.parse_magnitude() over a Series -> float (NaN where missing or
+    unparseable)."""
+    return series.map(ticker_db.parse_magnitude).astype(float)
+
+
+class Archive:
+    def __init__(self, db_file, board="trending"):
+        self.db_file = db_file
+        self.board = board
+        self.conn = sqlite3.connect(f"file:{quote(os.path.abspath(db_file))}?mode=ro", uri=True)
+        (self.version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        tables = {name for (name,) in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.has_news = "news" in tables
+        self.has_boards = any(row[1] == "boards" for row in
+                              self.conn.execute("PRAGMA table_info(trending_tickers)"))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def typed(self):
+        return self.version >= TYPED_SCHEMA_VERSION
+
+    def _require_typed(self):
+        if not self.typed:
+            raise ValueError(f"{self.db_file} is at schema v{self.version}; snapshot queries "
+                             f"need v{TYPED_SCHEMA_VERSION}+ (run `python ticker_db.py {self.db_file}`)")
+
+    def _board_clause(self, prefix=""):
+        """(SQL, params) restricting rows to this archive's board, or None."""
+        if self.board is None or not self.has_boards:
+            return None
+        col = prefix + "boards"
+        return f"({col} IS NULL OR instr(',' || {col} || ',', ?) > 0)", [f",{self.board},"]
+
+    def _columns(self):
+        """Output column -> SQL expression (``n.`` is the joined ``news`` row)."""
+        cols = {c: f"t.{c}" for c in ("utc_timestamp", "ticker_symbol", "company_name", "sector",
+                                       "industry", "last_price", "percent_change",
+                                       "trading_volume", "market_cap", "article_timestamp",
+                                       "article_title")}
+        if self.has_news:
+            # Normalized schema: headlines live once in `news`, rows point at them.
+            # COALESCE keeps any inline article text a row still carries.
+            cols["article_timestamp"] = "COALESCE(t.article_timestamp, n.published)"
+            cols["article_title"] = "COALESCE(t.article_title, n.title)"
+        return cols
+
+    def _select(self, where, params, order, columns):
+        """(query, params, output columns or None) for frame() / chunks()."""
+        exprs = self._columns()
+        if columns is None:
+            raw, out = list(exprs), None
+        else:
+            out = list(columns)
+            need = {"volume": "trading_volume", "mktcap": "market_cap"}
+            raw = [c for c in exprs if c in out or c in (need.get(o) for o in out)]
+        query = "SELECT " + ", ".join(f"{exprs[c]} AS {c}" for c in raw) + " FROM trending_tickers t"
+        if self.has_news and any(exprs[c].startswith("COALESCE") for c in raw):
+            query += " LEFT JOIN news n ON n.story_id = t.story_id"
+        clauses, params = ([where] if where else []), list(params)
+        board = self._board_clause("t.")
+        if board:
+            clauses.append(board[0])
+            params += board[1]
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        if order:
+            query += " ORDER BY t.utc_timestamp, t.ticker_symbol"
+        return query, params, out
+
+    def _typed(self, frame, out):
+        if "utc_timestamp" in frame:
+            frame["utc_timestamp"] = (pd.to_datetime(frame["utc_timestamp"], unit="us") if self.typed
+                                      else pd.to_datetime(frame["utc_timestamp"], errors="coerce"))
+        for src, dst in (("trading_volume", "volume"), ("market_cap", "mktcap")):
+            if src in frame:
+                frame[dst] = frame[src].astype(float) if self.typed else parse_magnitude(frame[src])
+        for c in ("last_price", "percent_change"):
+            if c in frame:
+                frame[c] = pd.to_numeric(frame[c], errors="coerce")
+        return frame if out is None else frame[out]
+
+    def frame(self, where="", params=(), order=True, columns=None):
+        """Typed rows of ``trending_tickers`` matching the SQL ``where`` clause
+        (columns qualified with ``t.``), restricted to this archive's board.
+
+        ``columns`` selects output columns (default: all, plus ``volume`` and
+        ``mktcap`` parsed from trading_volume / market_cap); only those are
+        read, and ``news`` is joined only for the article columns."""
+        query, params, out = self._select(where, params, order, columns)
+        return self._typed(pd.read_sql(query, self.conn, params=params), out)
+
+    def chunks(self, where="", params=(), order=True, columns=None, rows=100_000):
+        """frame() as a sequence of typed frames of up to ``rows`` rows, fetched
+        as they are consumed -- the whole result is never held as Python objects."""
+        query, params, out = self._select(where, params, order, columns)
+        for chunk in pd.read_sql(query, self.conn, params=params, chunksize=rows):
+            yield self._typed(chunk, out)
+
+    def snapshot_times(self):
+        """Every snapshot time (epoch us), ascending -- an index-only scan."""
+        self._require_typed()
+        return np.array([ts for (ts,) in self.conn.execute(
+            "SELECT DISTINCT utc_timestamp FROM trending_tickers ORDER BY utc_timestamp")],
+            dtype=np.int64)
+
+    def rows_through(self, t):
+        """Rows (any board) with utc_timestamp <= ``t`` -- an index-only count."""
+        self._require_typed()
+        return self.conn.execute("SELECT COUNT(*) FROM trending_tickers WHERE utc_timestamp <= ?",
+                                 (to_epoch_us(t),)).fetchone()[0]
+
+    def latest_time(self):
+        """Newest snapshot time (epoch us) with rows on this archive's board."""
+        times = self.latest_times(1)
+        return int(times[0]) if len(times) else None
+
+    def latest_times(self, n):
+        """The newest ``n`` snapshot times (epoch us) with rows on this archive's
+        board, newest first -- a backward walk of the utc_timestamp index."""
+        self._require_typed()
+        query, params = "SELECT DISTINCT utc_timestamp FROM trending_tickers", []
+        board = self._board_clause()
+        if board:
+            query += " WHERE " + board[0]
+            params += board[1]
+        return np.array([ts for (ts,) in self.conn.execute(
+            query + " ORDER BY utc_timestamp DESC LIMIT ?", [*params, n])], dtype=np.int64)
+
+    def snapshot(self, t):
+        self._require_typed()
+        return self.frame("t.utc_timestamp = ?", (to_epoch_us(t),))
+
+    def latest_snapshot(self):
+        ts = self.latest_time()
+        return self.frame("t.utc_timestamp = ?", (ts,)) if ts is not None else self.frame("0")
+
+    def snapshots_between(self, t0, t1):
+        """Rows with t0 <= utc_timestamp < t1."""
+        self._require_typed()
+        return self.frame("t.utc_timestamp >= ? AND t.utc_timestamp < ?",
+                          (to_epoch_us(t0), to_epoch_us(t1)))
+
+    def ticker_history(self, symbol, since=None):
+        """One ticker's rows (from ``since`` on, if given), oldest first."""
+        self._require_typed()
+        if since is None:
+            return self.frame("t.ticker_symbol = ?", (symbol,))
+        return self.frame("t.ticker_symbol = ? AND t.utc_timestamp >= ?", (symbol, to_epoch_us(since)))
+
+    def last_appearances(self, symbols, before, k, columns=None):
+        """Each of ``symbols``' last ``k`` rows with utc_timestamp <= ``before``
+        (one LIMIT-k seek down the (ticker_symbol, utc_timestamp) index per symbol)."""
+        self._require_typed()
+        query, params = ("SELECT rowid FROM trending_tickers "
+                         "WHERE ticker_symbol = ? AND utc_timestamp <= ?"), []
+        board = self._board_clause()
+        if board:
+            query += " AND " + board[0]
+            params += board[1]
+        query += " ORDER BY utc_timestamp DESC LIMIT ?"
+        before = to_epoch_us(before)
+        rowids = [rowid for sym in symbols
+                  for (rowid,) in self.conn.execute(query, [sym, before, *params, k])]
+        frames = [self.frame(f"t.rowid IN ({marks})", chunk, order=False, columns=columns)
+                  for marks, chunk in ticker_db.in_chunks(rowids)]
+        return pd.concat(frames, ignore_index=True) if frames else self.frame("0", columns=columns)
+
+    def appearance_times(self, symbols, before):
+        """(ticker_symbol, utc_timestamp as epoch us) of each of ``symbols``' rows
+        with utc_timestamp <= ``before`` -- one range of the (ticker_symbol,
+        utc_timestamp) index per symbol, no other columns read."""
+        self._require_typed()
+        query, params = ("SELECT ticker_symbol, utc_timestamp FROM trending_tickers "
+                         "WHERE ticker_symbol = ? AND utc_timestamp <= ?"), []
+        board = self._board_clause()
+        if board:
+            query += " AND " + board[0]
+            params += board[1]
+        before = to_epoch_us(before)
+        rows = [row for sym in symbols for row in self.conn.execute(query, [sym, before, *params])]
+        return pd.DataFrame(rows, columns=["ticker_symbol", "utc_timestamp"])
+
+    def board_counts(self, symbols):
+        """Each of ``symbols``' trending appearances so far (a Series), from the
+        ``ticker_state`` counters ingest keeps (ticker_db.record_board) instead
+        of its rows -- or None where the counters can't stand in for the rows:
+        another board, before schema v6, behind the newest snapshot, or a ticker
+        whose oldest rows have since been pruned from this file."""
+        if self.board != "trending" or self.version < BOARD_STATE_SCHEMA_VERSION:
+            return None
+        (last,) = self.conn.execute("SELECT MAX(last_seen) FROM ticker_state").fetchone()
+        if last is None or last != self.latest_time():
+            return None
+        state = {}
+        for marks, chunk in ticker_db.in_chunks(symbols):
+            state.update((sym, (first, n)) for sym, first, n in self.conn.execute(
+                "SELECT ticker_symbol, first_seen, appearances FROM ticker_state "
+                f"WHERE ticker_symbol IN ({marks})", chunk))
+        query, params = "SELECT utc_timestamp FROM trending_tickers WHERE ticker_symbol = ?", []
+        board = self._board_clause()
+        if board:
+            query += " AND " + board[0]
+            params += board[1]
+        query += " ORDER BY utc_timestamp LIMIT 1"
+        for sym in symbols:
+            first = self.conn.execute(query, [sym, *params]).fetchone()
+            if sym not in state or first is None or first[0] != state[sym][0]:
+                return None
+        return pd.Series({sym: state[sym][1] for sym in symbols}, dtype="int64")
+
+    def top_movers(self, t=None, n=10):
+        """The ``n`` rows of snapshot ``t`` (default: latest) with the largest
+        absolute percent_change, biggest first."""
+        board = self.latest_snapshot() if t is None else self.snapshot(t)
+        order = board["percent_change"].abs().sort_values(ascending=False, kind="stable").index
+        return board.loc[order[:n]].reset_index(drop=True)
@@ -21,7 +21,6 @@ import json
 import os
 import joblib
 import numpy as np
-import pandas as pd
 from scipy.stats import entropy as scipy_entropy
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
@@ -30,6 +29,7 @@ from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import log_loss, accuracy_score
 
+import dataset_store
 from build_dataset import FEATURE_COLS
 
 ONEHOT = ["sector_code", "hour_utc", "dow", "novelty"]
@@ -225,11 +225,15 @@ def save_models(df, outdir="ml"):
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--data", default="ml/dataset.parquet")
+    ap.add_argument("--data", default="ml/dataset")
+    ap.add_argument("--since", default=None,
+                    help="use only snapshots after this time (default: all)")
     ap.add_argument("--save", action="store_true",
                     help="also fit deployment ensembles on all data and persist them")
     args = ap.parse_args()
-    df = pd.read_parquet(args.data)
+    df = dataset_store.read(
+        args.data, columns=["utc_timestamp"] + FEATURE_COLS + ["fwd_return_24h", "fwd_vol_24h"],
+        filters=[("utc_timestamp", ">", args.since)] if args.since else None)
     # ratios like mom_* / volume_z can produce inf (division by ~0); the median
     # imputer treats only NaN as missing, so coerce inf -> NaN first.
     df[NUMERIC] = df[NUMERIC].replace([np.inf, -np.inf], np.nan)
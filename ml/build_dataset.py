@@ -20,18 +20,49 @@ defined over the ticker's own future appearances:
 
 Rows whose horizon window extends past the last snapshot in the DB are dropped for
 the affected target (the window is not fully observed -> label undefined).
+
+The table is written to ``ml/dataset/`` as month-partitioned Parquet with a
+manifest (see dataset_store.py). ``--incremental`` extends the previous build
+instead: a watermark next to it (``dataset.watermark.json``) records the newest
+snapshot, so only rows whose labels can still change (the last LABEL_HORIZON_H)
+plus each ticker's last ROLL_WINDOW appearances of context are reloaded, and
+only the partitions from that month on are rewritten. The result is identical to a
+full rebuild; anything that would break that (rows inserted before the
+watermark, other sources, a changed dataset definition) triggers a full build.
+
+``--lean`` bounds memory for large archives on small machines: archives are
+read in chunks with repeated strings as categoricals, the dataset is written
+with float32 / small-int columns (LEAN_DTYPES), and each stage's peak RSS is
+reported.
 """
 
 import argparse
 import glob
-import sqlite3
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 import numpy as np
 import pandas as pd
 
+import dataset_store
+import kernels
 import sentiment as _sent
+from archive import Archive, TYPED_SCHEMA_VERSION, parse_magnitude  # noqa: F401
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# Append-only segment files written by `scrape_tickers.py --store segments`.
+from segments import SEGMENT_SUFFIXES, read_segment, segment_files  # noqa: E402
 
 PERSIST_HORIZONS = {"persistence_6h": 6.0, "persistence_24h": 24.0}
 RETURN_HORIZON_H = 24.0
+# Labels of rows within this many hours of the newest snapshot can still change.
+LABEL_HORIZON_H = max(RETURN_HORIZON_H, *PERSIST_HORIZONS.values())
+# Features look back at most this many prior appearances of a ticker (mom_5,
+# pc_vol_5, volume_z).
+ROLL_WINDOW = 5
 
 
 def ece(conf, correct, n_bins=10):
@@ -49,53 +80,228 @@ def ece(conf, correct, n_bins=10):
     return e
 
 
-def parse_magnitude(series):
-    """Parse '19.87M' / '1.211T' / '6368000.0' / '' -> float."""
-    s = series.astype(str).str.strip()
-    mult = pd.Series(1.0, index=s.index)
-    mult[s.str.endswith("K")] = 1e3
-    mult[s.str.endswith("M")] = 1e6
-    mult[s.str.endswith("B")] = 1e9
-    mult[s.str.endswith("T")] = 1e12
-    num = pd.to_numeric(s.str.replace(r"[KMBT]$", "", regex=True), errors="coerce")
-    return num * mult
+def _expand(pattern):
+    """A path/glob -> DB files and segment files. A directory is a segment root
+    (every segment and compacted monthly file below it)."""
+    paths = glob.glob(pattern) if any(ch in pattern for ch in "*?[") else [pattern]
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += segment_files(p)
+        else:
+            out.append(p)
+    return out
 
 
-def load(db_path):
-    """Load one DB path, a list of paths, or a glob (e.g. 'archives/*.db'), concatenating
-    all matching trending_tickers tables (dedup on ticker+timestamp)."""
+def _sources(db_path):
     if isinstance(db_path, str):
-        paths = glob.glob(db_path) if any(ch in db_path for ch in "*?[") else [db_path]
+        db_path = [db_path]
+    return [p for pat in db_path for p in _expand(pat)]
+
+
+# What load() returns per row (plus has_news when article_title is loaded).
+LOAD_COLUMNS = ["utc_timestamp", "ticker_symbol", "company_name", "sector", "industry",
+                "last_price", "percent_change", "volume", "mktcap", "article_timestamp",
+                "article_title"]
+
+
+# load() columns under their segment-file names.
+_SEGMENT_NAMES = {"volume": "trading_volume", "mktcap": "market_cap"}
+
+
+def _categorize(frame):
+    """Repeated strings (tickers, names, sectors, headlines) as categoricals."""
+    return frame.astype({c: "category" for c in frame.columns if frame[c].dtype == object})
+
+
+def _concat(frames):
+    """pd.concat, keeping categorical columns categorical (over the union of the
+    frames' categories, sorted) instead of falling back to object. A file
+    where the column is all missing (an ndjson segment reads it as float)
+    joins in as codes -1."""
+    if len(frames) == 1:
+        return frames[0]
+    for c in frames[0].columns:
+        is_cat = [isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames]
+        if not any(is_cat) or not all(ok or f[c].isna().all() for ok, f in zip(is_cat, frames)):
+            continue
+        cats = pd.Index([])
+        for ok, f in zip(is_cat, frames):
+            if ok:
+                cats = cats.union(f[c].cat.categories)
+        for ok, f in zip(is_cat, frames):
+            f[c] = (f[c].cat.set_categories(cats) if ok else
+                    pd.Categorical.from_codes(np.full(len(f), -1), categories=cats))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _load_one(path, board, since, until, columns, lean=False):
+    """One archive or segment file, filtered, typed and deduplicated on its own;
+    with ``lean``, read in chunks that are categorized as they arrive."""
+    if path.endswith(SEGMENT_SUFFIXES):
+        raw = read_segment(path, [_SEGMENT_NAMES.get(c, c) for c in columns or LOAD_COLUMNS],
+                           board, since, until)
+        frame = raw.rename(columns={v: k for k, v in _SEGMENT_NAMES.items()}).assign(
+            utc_timestamp=pd.to_datetime(raw["utc_timestamp"], unit="us"))
+        for c in ("last_price", "percent_change", "volume", "mktcap"):
+            if c in frame:
+                frame[c] = pd.to_numeric(frame[c], errors="coerce").astype(float)
+        if lean:
+            frame = _categorize(frame)
     else:
-        paths = [p for pat in db_path for p in
-                 (glob.glob(pat) if any(ch in pat for ch in "*?[") else [pat])]
-    frames = []
-    for p in paths:
-        conn = sqlite3.connect(p)
-        frames.append(pd.read_sql(
-            "SELECT utc_timestamp, ticker_symbol, company_name, sector, industry, "
-            "last_price, percent_change, trading_volume, market_cap, "
-            "article_timestamp, article_title FROM trending_tickers", conn))
-        conn.close()
-    df = pd.concat(frames, ignore_index=True)
-    df = df.drop_duplicates(subset=["ticker_symbol", "utc_timestamp"], keep="last")
-    df["utc_timestamp"] = pd.to_datetime(df["utc_timestamp"], errors="coerce")
-    df = df.dropna(subset=["utc_timestamp", "ticker_symbol"])
-    df["last_price"] = pd.to_numeric(df["last_price"], errors="coerce")
-    df["percent_change"] = pd.to_numeric(df["percent_change"], errors="coerce")
-    df["volume"] = parse_magnitude(df["trading_volume"])
-    df["mktcap"] = parse_magnitude(df["market_cap"])
-    df["has_news"] = (df["article_title"].fillna("").str.len() > 0).astype(int)
-    # Collapse exact-duplicate (ticker, timestamp) rows if any.
-    df = df.sort_values(["ticker_symbol", "utc_timestamp"]).reset_index(drop=True)
+        with Archive(path, board=board) as archive:
+            if archive.typed:
+                clauses = [c for c, v in (("t.utc_timestamp > ?", since),
+                                          ("t.utc_timestamp <= ?", until)) if v is not None]
+                query = (" AND ".join(clauses), [v for v in (since, until) if v is not None])
+                if lean:
+                    chunks = [_categorize(chunk) for chunk in archive.chunks(
+                        *query, order=False, columns=columns or LOAD_COLUMNS)]
+                    frame = _concat(chunks) if chunks else _categorize(
+                        archive.frame("0", columns=columns or LOAD_COLUMNS))
+                else:
+                    frame = archive.frame(*query, order=False, columns=columns or LOAD_COLUMNS)
+            else:
+                frame = archive.frame(order=False, columns=columns or LOAD_COLUMNS)
+                t = frame["utc_timestamp"]
+                if since is not None:
+                    frame = frame[t > pd.Timestamp(since, unit="us")]
+                if until is not None:
+                    frame = frame[t <= pd.Timestamp(until, unit="us")]
+                if lean:
+                    frame = _categorize(frame)
+    keep = (frame["utc_timestamp"].notna() & frame["ticker_symbol"].notna()
+            & ~frame.duplicated(subset=["ticker_symbol", "utc_timestamp"], keep="last"))
+    return frame if keep.all() else frame.take(np.flatnonzero(keep.to_numpy()))
+
+
+def load(db_path, board="trending", since=None, until=None, columns=None, workers=None,
+         lean=False):
+    """Load one DB path, a list of paths, or a glob (e.g. 'archives/*.db'), concatenating
+    all matching trending_tickers tables (dedup on ticker+timestamp). Segment files
+    and segment root directories (segments.py) are read the same way and can be
+    mixed freely with DB archives.
+
+    Files at schema v3+ (see ticker_db.py) already store utc_timestamp as epoch
+    microseconds and volume/market cap as REAL, so they are read as-is; older
+    archives get the string parsing.
+
+    Only rows captured from ``board`` are kept (schema v5 records the board(s)
+    per row; older files are trending-only) -- persistence targets are defined by
+    membership of that one board. ``board=None`` keeps every captured row.
+
+    ``since`` < utc_timestamp <= ``until`` (epoch microseconds) and ``columns``
+    (a subset of LOAD_COLUMNS; ticker_symbol and utc_timestamp are always kept)
+    are applied in SQL for typed archives, so only the requested rows and
+    columns are ever materialized. Files are read on ``workers`` threads
+    (default: one per file, up to the CPU count) and deduplicated one by one
+    before the concat; where archives overlap, the later path wins.
+
+    ``lean`` returns the string columns as categoricals (see build(lean=True)),
+    reading archives in chunks so their rows never exist as Python strings all
+    at once."""
+    paths = _sources(db_path)
+    if columns is not None:
+        columns = ["utc_timestamp", "ticker_symbol"] + [
+            c for c in columns if c not in ("utc_timestamp", "ticker_symbol")]
+    workers = max(1, min(len(paths), workers or os.cpu_count() or 1))
+    read = partial(_load_one, board=board, since=since, until=until, columns=columns, lean=lean)
+    if workers == 1:
+        frames = [read(p) for p in paths]
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            frames = list(pool.map(read, paths))
+    return _finish(frames)
+
+
+def _finish(frames):
+    """Concatenate per-file frames into load()'s deduplicated, sorted layout --
+    one gather of the surviving rows, in (ticker, time) order."""
+    df = _concat(frames)
+    rows = np.arange(len(df))
+    if len(frames) > 1:
+        rows = rows[~df.duplicated(subset=["ticker_symbol", "utc_timestamp"], keep="last").to_numpy()]
+    # (ticker, time) is unique now, so any sort by it gives sort_values' order.
+    ticker = pd.factorize(df["ticker_symbol"].iloc[rows], sort=True)[0]
+    rows = rows[np.lexsort((df["utc_timestamp"].to_numpy()[rows], ticker))]
+    df = df.take(rows)
+    df.index = pd.RangeIndex(len(df))
+    if "article_title" in df and "has_news" not in df:
+        title = df["article_title"]
+        if isinstance(title.dtype, pd.CategoricalDtype):  # measure each headline once
+            df["has_news"] = _per_category(title, title.cat.categories.str.len() > 0, False).astype(int)
+        else:
+            df["has_news"] = (title.fillna("").str.len() > 0).astype(int)
     return df
 
 
+def _per_category(col, values, missing):
+    """Row values of categorical ``col`` from one value per category (``missing``
+    where the row is NaN)."""
+    return np.append(np.asarray(values), missing)[col.cat.codes.to_numpy()]
+
+
+def forward_return_vol(symbols, t, p, horizon):
+    """Per-row forward return and volatility over each ticker's appearances in
+    (t, t + horizon], vectorized across all tickers at once.
+
+    For row j with in-window future appearances j+1 .. e-1 (rows of the same
+    ticker in frame order, times ascending):
+      return = p[e-1] / p[j] - 1                  when both prices are > 0
+      vol    = std of the step log-returns across the positive prices of
+               p[j .. e-1], when there are at least 3 of them
+    NaN otherwise. Each window's std is taken with np.std over a row of a 2-D
+    block of windows of the same length, so it is bit-identical to np.std on
+    that window alone.
+    """
+    n = len(p)
+    fwd_ret = np.full(n, np.nan)
+    fwd_vol = np.full(n, np.nan)
+    if n == 0:
+        return fwd_ret, fwd_vol
+    codes = pd.factorize(symbols, sort=False)[0]
+    order = np.argsort(codes, kind="stable")
+    c, tt, pp = codes[order], t[order].astype("int64"), p[order]
+
+    # Window ends with one global searchsorted over (ticker, time rank) keys.
+    uniq = np.unique(tt)
+    width = len(uniq) + 1
+    key = c * width + np.searchsorted(uniq, tt)
+    bound = np.searchsorted(uniq, tt + horizon.astype("timedelta64[ns]").astype("int64"), side="right")
+    end = np.searchsorted(key, c * width + bound, side="left")
+    pos = np.arange(n)
+    has_future = end > pos + 1
+
+    last = pp[np.maximum(end - 1, 0)]
+    ok = has_future & (pp > 0) & (last > 0)
+    ret = np.full(n, np.nan)
+    ret[ok] = last[ok] / pp[ok] - 1.0
+
+    # Step log-returns between consecutive positive prices of the same ticker.
+    valid = pp > 0
+    vpos = np.flatnonzero(valid)
+    logp = np.log(pp[vpos])
+    step = np.full(len(vpos), np.nan)
+    step[1:] = logp[1:] - logp[:-1]
+    first = np.searchsorted(vpos, pos)                 # first positive price at/after j
+    m = np.searchsorted(vpos, end) - first             # positive prices in p[j .. e-1]
+    vol = np.full(n, np.nan)
+    need = has_future & (m >= 3)
+    for k in np.unique(m[need]):
+        rows = np.flatnonzero(need & (m == k))
+        block = step[first[rows, None] + 1 + np.arange(k - 1)]
+        vol[rows] = np.std(block, axis=1)
+
+    fwd_ret[order] = ret
+    fwd_vol[order] = vol
+    return fwd_ret, fwd_vol
+
+
 def add_targets(df):
     max_t = df["utc_timestamp"].max()
-    g = df.groupby("ticker_symbol", sort=False)
-    df["t_next"] = g["utc_timestamp"].shift(-1)
-    df["price_next"] = g["last_price"].shift(-1)
+    seg = kernels.Segments(df["ticker_symbol"])
+    df["t_next"] = seg.lag(df["utc_timestamp"].to_numpy(dtype="datetime64[ns]"), -1)
+    df["price_next"] = seg.lag(df["last_price"].to_numpy(dtype=float), -1)
     gap_next_h = (df["t_next"] - df["utc_timestamp"]).dt.total_seconds() / 3600.0
 
     for col, hz in PERSIST_HORIZONS.items():
@@ -104,31 +310,9 @@ def add_targets(df):
 
     # Forward return / vol over the 24h window, across the ticker's appearances.
     hz = RETURN_HORIZON_H
-    fwd_ret = np.full(len(df), np.nan)
-    fwd_vol = np.full(len(df), np.nan)
-    for _, idx in g.groups.items():
-        idx = np.asarray(idx)
-        t = df["utc_timestamp"].values[idx].astype("datetime64[ns]")
-        p = df["last_price"].values[idx].astype(float)
-        horizon = t + np.timedelta64(int(hz * 3600), "s")
-        for j in range(len(idx)):
-            # in-window future appearances: t in (t[j], t[j]+hz]
-            hi = np.searchsorted(t, horizon[j], side="right")
-            future = range(j + 1, hi)
-            fut = [k for k in future if k > j]
-            if horizon[j] > t[-1] and hi <= len(t):
-                # window may extend past last appearance but still within observed
-                pass
-            if not fut:
-                continue
-            p_last = p[fut[-1]]
-            if p[j] and p_last and p[j] > 0 and p_last > 0:
-                fwd_ret[idx[j]] = p_last / p[j] - 1.0
-            seq = [p[j]] + [p[k] for k in fut]
-            seq = np.array([x for x in seq if x and x > 0], dtype=float)
-            if len(seq) >= 3:
-                logret = np.diff(np.log(seq))
-                fwd_vol[idx[j]] = float(np.std(logret))
+    fwd_ret, fwd_vol = forward_return_vol(
+        df["ticker_symbol"], df["utc_timestamp"].to_numpy(dtype="datetime64[ns]"),
+        df["last_price"].to_numpy(dtype=float), np.timedelta64(int(hz * 3600), "s"))
     # Only keep return/vol where the 24h window is fully observed.
     observed24 = (df["utc_timestamp"] + pd.Timedelta(hours=hz)) <= max_t
     df["fwd_return_24h"] = np.where(observed24, fwd_ret, np.nan)
@@ -137,56 +321,112 @@ def add_targets(df):
     return df
 
 
-def add_features(df):
-    g = df.groupby("ticker_symbol", sort=False)
+def add_ticker_features(df):
+    """Per-ticker time-series features (history up to and including T), from one
+    kernels.Segments over the ticker column -- no groupby passes."""
+    seg = kernels.Segments(df["ticker_symbol"])
+    df["t_prev"] = seg.lag(df["utc_timestamp"].to_numpy(dtype="datetime64[ns]"), 1)
+    df["time_since_last_h"] = (
+        (df["utc_timestamp"] - df["t_prev"]).dt.total_seconds() / 3600.0)
+    df["novelty"] = df["t_prev"].isna().astype(int)
+    df["appearances_so_far"] = seg.cumcount()
+    prior_pc = seg.lags(df["percent_change"].to_numpy(dtype=float), ROLL_WINDOW)
+    df["pct_change_prev"] = prior_pc[0]
+
+    price = df["last_price"].to_numpy(dtype=float)
+    prev_price = seg.lags(price, 5)
+    with np.errstate(divide="ignore", invalid="ignore"):  # 0 / NaN prices, as pandas
+        for k in (1, 3, 5):
+            df[f"mom_{k}"] = price / prev_price[k - 1] - 1.0
+
+    # rolling stats over PRIOR appearances only; each window is reduced on its
+    # own, so a row depends on nothing older than its last ROLL_WINDOW appearances
+    _, df["pc_vol_5"] = kernels.window_stats(prior_pc, min_periods=2)
+    roll_mean, roll_std = kernels.window_stats(
+        seg.lags(df["volume"].to_numpy(dtype=float), ROLL_WINDOW), min_periods=2)
+    df["volume_z"] = (df["volume"] - roll_mean) / roll_std
+    return df
+
+
+def add_snapshot_features(df):
+    """Cross-sectional features within each snapshot, from one kernels.Segments
+    over the timestamp column: percentile ranks (pandas' average-tie
+    rank(pct=True)), the board size, and each row's sector share of it."""
+    snap = kernels.Segments(df["utc_timestamp"])
+    df["rank_pct_change"] = snap.rank_pct(df["percent_change"].to_numpy(dtype=float))
+    df["rank_volume"] = snap.rank_pct(df["volume"].to_numpy(dtype=float))
+    listed = df["ticker_symbol"].notna().to_numpy()
+    board_size = snap.count(listed)
+    # transform("count") is int64 unless a missing snapshot time leaves NaN rows
+    df["board_size"] = board_size.astype(np.int64) if snap.valid.all() else board_size
+    sect_ct = snap.count(listed, by=pd.factorize(df["sector"])[0])
+    df["sector_heat"] = sect_ct / df["board_size"].to_numpy()
+    return df
+
+
+def _category(col):
+    """``col`` as a categorical over exactly the values present, sorted -- also
+    when it is already categorical with categories no row uses any more."""
+    return col.astype("category").cat.remove_unused_categories()
+
+
+def encode_categories(df, vocab):
+    """Set ``df``'s sector_code / industry_code from fixed vocabularies (the
+    ones a model was trained on, see categories_path()) instead of the values
+    loaded; a value outside them gets -1, like a missing one."""
+    for col in ("sector", "industry"):
+        df[f"{col}_code"] = pd.Categorical(df[col], categories=vocab[col]).codes
+    return df
+
 
+def vol_tiers(model, df):
+    """Derive vol-regime tier thresholds from the model's own predictions (log space)."""
+    pred = model.predict(df[FEATURE_COLS])
+    vol = np.expm1(pred)
+    q = np.quantile(vol, [0.50, 0.80, 0.95])
+    return q  # [calm|moderate, moderate|elevated, elevated|high]
+
+
+def load_meta(model_dir):
+    """The scoring metadata train.py froze with the models (category
+    vocabularies, vol-regime tiers), or None if there is none with a vocabulary."""
+    path = os.path.join(model_dir, "model_meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        meta = json.load(f)
+    return meta if "categories" in meta else None
+
+
+def add_features(df):
     df["log_mktcap"] = np.log1p(df["mktcap"])
     df["log_volume"] = np.log1p(df["volume"])
 
     # --- per-ticker time-series (history up to and including T) ---
-    df["t_prev"] = g["utc_timestamp"].shift(1)
-    df["time_since_last_h"] = (
-        (df["utc_timestamp"] - df["t_prev"]).dt.total_seconds() / 3600.0)
-    df["novelty"] = df["t_prev"].isna().astype(int)
-    df["appearances_so_far"] = g.cumcount()
-    df["pct_change_prev"] = g["percent_change"].shift(1)
-
-    for k in (1, 3, 5):
-        prev_price = g["last_price"].shift(k)
-        df[f"mom_{k}"] = df["last_price"] / prev_price - 1.0
-
-    # rolling stats over PRIOR appearances only (shift(1) before rolling)
-    prior_pc = g["percent_change"].shift(1)
-    df["pc_vol_5"] = prior_pc.groupby(df["ticker_symbol"]).rolling(5, min_periods=2)\
-        .std().reset_index(level=0, drop=True)
-    prior_vol = g["volume"].shift(1)
-    roll_mean = prior_vol.groupby(df["ticker_symbol"]).rolling(5, min_periods=2)\
-        .mean().reset_index(level=0, drop=True)
-    roll_std = prior_vol.groupby(df["ticker_symbol"]).rolling(5, min_periods=2)\
-        .std().reset_index(level=0, drop=True)
-    df["volume_z"] = (df["volume"] - roll_mean) / roll_std
+    df = add_ticker_features(df)
 
     # --- cross-sectional (within each snapshot) ---
-    snap = df.groupby("utc_timestamp", sort=False)
-    df["rank_pct_change"] = snap["percent_change"].rank(pct=True)
-    df["rank_volume"] = snap["volume"].rank(pct=True)
-    df["board_size"] = snap["ticker_symbol"].transform("count")
-    sect_ct = df.groupby(["utc_timestamp", "sector"])["ticker_symbol"].transform("count")
-    df["sector_heat"] = sect_ct / df["board_size"]
+    df = add_snapshot_features(df)
 
     # news sentiment of the attached headline (leakage-safe: it is the most recent
     # article <= T). Computed here so training AND emit share the same feature. 0.0 for
     # no-news rows; has_news disambiguates "no news" from genuinely "neutral news".
-    df["sentiment"] = _sent.score_titles(df["article_title"].tolist()) \
-        if "article_title" in df.columns else 0.0
+    if "article_title" not in df.columns:
+        df["sentiment"] = 0.0
+    elif isinstance(df["article_title"].dtype, pd.CategoricalDtype):  # each headline once
+        title = df["article_title"]
+        df["sentiment"] = _per_category(
+            title, _sent.score_titles(title.cat.categories.tolist()), 0.0)  # no title -> 0.0
+    else:
+        df["sentiment"] = _sent.score_titles(df["article_title"].tolist())
 
     # --- calendar ---
     df["hour_utc"] = df["utc_timestamp"].dt.hour
     df["dow"] = df["utc_timestamp"].dt.dayofweek
 
     # categorical codes
-    df["sector_code"] = df["sector"].astype("category").cat.codes
-    df["industry_code"] = df["industry"].astype("category").cat.codes
+    df["sector_code"] = _category(df["sector"]).cat.codes
+    df["industry_code"] = _category(df["industry"]).cat.codes
     return df
 
 
@@ -197,30 +437,306 @@ FEATURE_COLS = [
     "rank_pct_change", "rank_volume", "board_size", "sector_heat",
     "hour_utc", "dow", "sector_code", "industry_code", "has_news", "sentiment",
 ]
+# Bump when a feature definition changes, so the feature store (feature_store.py)
+# and --incremental rebuild instead of mixing old and new rows.
+FEATURE_VERSION = 1
 TARGET_COLS = ["persistence_6h", "persistence_24h",
                "fwd_return_24h", "fwd_absmove_24h", "fwd_vol_24h"]
 
 
+KEEP_COLS = ["utc_timestamp", "ticker_symbol", "sector"] + FEATURE_COLS + TARGET_COLS
+# Bump when a target definition changes, so --incremental rebuilds instead of
+# mixing old and new rows (a feature change bumps FEATURE_VERSION).
+DATASET_VERSION = 1
+
+# Lean-mode column types: counts, flags and codes as small ints; every other
+# float feature/target is float32 (~7 significant digits -- LightGBM bins its
+# inputs as float32 anyway).
+LEAN_DTYPES = {"novelty": "int8", "has_news": "int8", "hour_utc": "int8", "dow": "int8",
+               "board_size": "int16", "sector_code": "int16", "industry_code": "int16",
+               "appearances_so_far": "int32"}
+
+
+def compact(df, columns=KEEP_COLS):
+    """``df[columns]`` with LEAN_DTYPES / float32 columns, built column by column
+    so no second full-width float64 copy exists. Features are computed in
+    float64 and only rounded here, so a lean build equals a full build's output
+    passed through compact()."""
+    cols = {}
+    for c in columns:
+        col = df[c]
+        if c in LEAN_DTYPES:
+            col = col.astype(LEAN_DTYPES[c])
+        elif col.dtype == np.float64:
+            col = col.astype(np.float32)
+        cols[c] = col
+    return pd.DataFrame(cols, copy=False)
+
+
+def _rss_mb():
+    """(current, peak) resident set size in MB. On Linux the peak is VmHWM,
+    which _reset_peak_rss() restarts; elsewhere it is the process's lifetime
+    peak and the current size is unknown (None)."""
+    try:
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f)
+        return int(status["VmRSS"].split()[0]) / 1024, int(status["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError):
+        import resource  # not on Windows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return None, peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")  # resets VmHWM to the current RSS
+    except OSError:
+        pass
+
+
+@contextmanager
+def _stage(name, report=None):
+    """Announce a build stage; with a ``report`` list, measure its peak RSS and
+    append (name, peak MB, MB after)."""
+    print(f"{name}...")
+    if report is None:
+        yield
+        return
+    _reset_peak_rss()
+    yield
+    now, peak = _rss_mb()
+    report.append((name, peak, now))
+    print(f"  peak RSS {peak:,.0f} MB" + ("" if now is None else f", {now:,.0f} MB after"))
+
+
+def build(db_path, board="trending", lean=False, report=None):
+    """Full build -> (dataset frame, {"sector": [...], "industry": [...]}), the
+    category vocabularies behind sector_code / industry_code.
+
+    ``lean`` keeps strings categorical from the load on (see load()) and
+    returns compact() columns; ``report`` (a list) collects each stage's peak
+    RSS (see _stage())."""
+    with _stage("loading", report):
+        df = load(db_path, board, lean=lean)
+        print(f"  {len(df):,} rows, {df.ticker_symbol.nunique():,} tickers")
+    with _stage("targets", report):
+        df = add_targets(df)
+    with _stage("features", report):
+        df = add_features(df)
+    vocab = {c: _category(df[c]).cat.categories.tolist() for c in ("sector", "industry")}
+    if not lean:
+        return df[KEEP_COLS].copy(), vocab
+    with _stage("compacting", report):
+        df = compact(df)  # the wide frame goes as `df` is rebound
+    return df, vocab
+
+
+def categories_path(out):
+    """The sector/industry vocabularies behind the dataset ``out``'s codes
+    (train.py freezes them with the models)."""
+    return os.path.splitext(out.rstrip(os.sep))[0] + ".categories.json"
+
+
+def _history_rows(paths, t_us):
+    """Per-source row counts at or before ``t_us`` -- the fingerprint that tells an
+    incremental build nothing older than its watermark changed. None when a
+    source can't be counted cheaply (segments, pre-v3 archives)."""
+    rows = {}
+    for p in paths:
+        if p.endswith(SEGMENT_SUFFIXES):
+            return None
+        with Archive(p) as archive:
+            if not archive.typed:
+                return None
+            rows[os.path.abspath(p)] = archive.rows_through(t_us)
+    return rows
+
+
+def last_appearances(paths, board, symbols, before_us):
+    """Each of ``symbols``' last ROLL_WINDOW appearances at or before ``before_us``
+    across the typed archives ``paths`` -- all the history their later rows'
+    features look back on."""
+    frames = []
+    for p in paths:
+        with Archive(p, board=board) as archive:
+            frames.append(archive.last_appearances(symbols, before_us, ROLL_WINDOW,
+                                                   columns=LOAD_COLUMNS))
+    return _finish(frames).groupby("ticker_symbol", sort=False).tail(ROLL_WINDOW)
+
+
+def continue_counts(df, context, seen_before):
+    """Make appearances_so_far of ``df``, computed over ``context`` plus later
+    rows, count every earlier appearance: ``seen_before`` (ticker -> appearances
+    already stored) instead of just the context rows."""
+    in_context = context.groupby("ticker_symbol").size()
+    offset = (df["ticker_symbol"].map(seen_before).fillna(0)
+              - df["ticker_symbol"].map(in_context).fillna(0)).astype("int64")
+    df["appearances_so_far"] += offset
+
+
+def _all_typed(paths):
+    """Are all ``paths`` DB archives at schema v3+ (no segments)?"""
+    for p in paths:
+        if p.endswith(SEGMENT_SUFFIXES):
+            return False
+        with Archive(p) as archive:
+            if not archive.typed:
+                return False
+    return True
+
+
+def latest_features(db_path, board="trending", snapshots=1):
+    """add_features() rows of the newest ``snapshots`` snapshots, from a bounded
+    lookback instead of the whole history: the rows of those snapshots, each of
+    their tickers' last ROLL_WINDOW earlier appearances, and appearances_so_far
+    from the ticker_state counters ingest keeps (Archive.board_counts) -- or, for
+    several archives or stale counters, from the times of the earlier
+    appearances (index seeks, Archive.appearance_times). Equal
+    to add_features(load(db_path)) on those rows except for sector_code /
+    industry_code, which only mean something under a fixed vocabulary (see
+    encode_categories()). Segments and pre-v3 archives get the full load."""
+    paths = _sources(db_path)
+    if not _all_typed(paths):
+        df = add_features(load(paths, board))
+        times = np.sort(df["utc_timestamp"].unique())[-snapshots:]
+        return df[df["utc_timestamp"].isin(times)].reset_index(drop=True)
+    times = []
+    for p in paths:
+        with Archive(p, board=board) as archive:
+            times.extend(archive.latest_times(snapshots))
+    times = np.unique(times)  # overlapping archives repeat snapshots
+    before_us = int(times[-min(snapshots, len(times))]) - 1 if len(times) else -1
+    fresh = load(paths, board, since=before_us)
+    symbols = fresh["ticker_symbol"].unique().tolist()
+    context = last_appearances(paths, board, symbols, before_us)
+    seen = None
+    if len(paths) == 1:
+        with Archive(paths[0], board=board) as archive:
+            seen = archive.board_counts(symbols)
+    if seen is not None:
+        # ticker_state counts through the newest snapshot; take the scored ones off.
+        seen -= fresh.groupby("ticker_symbol").size().reindex(seen.index, fill_value=0)
+    else:
+        seen = []
+        for p in paths:
+            with Archive(p, board=board) as archive:
+                seen.append(archive.appearance_times(symbols, before_us))
+        seen = pd.concat(seen, ignore_index=True).drop_duplicates().groupby("ticker_symbol").size()
+    df = add_features(_finish([context, fresh]))
+    continue_counts(df, context, seen)
+    return df[df["utc_timestamp"] > pd.Timestamp(before_us, unit="us")].reset_index(drop=True)
+
+
+def _definition(board, lean):
+    """What a dataset's watermark must match for --incremental to extend it."""
+    return {"version": DATASET_VERSION, "features": FEATURE_VERSION, "board": board,
+            "sentiment": _sent.get_backend(), "lean": lean}
+
+
+def build_incremental(db_path, out, board="trending", lean=False):
+    """Bring ``out`` up to date from its watermark -> (rows to write, vocabularies,
+    first partition to rewrite or None for all), or None if it needs a full build.
+    Same result as build(), bit for bit.
+
+    Rows older than the watermark minus LABEL_HORIZON_H keep their labels (their
+    windows were already fully observed) and their features (which only look
+    back). Everything after that is reloaded and recomputed, together with each
+    of those tickers' last ROLL_WINDOW appearances before it as feature context;
+    appearances_so_far continues from the stored counts, and the category codes
+    are re-derived from the stored vocabularies. ``lean`` (which must match the
+    previous build) returns compact() columns.
+    """
+    paths = _sources(db_path)
+    wm = dataset_store.read_watermark(out, _definition(board, lean),
+                                      partial(_history_rows, paths))
+    if wm is None:
+        return None
+
+    cut_us = wm["max_t_us"] - int(LABEL_HORIZON_H * 3600) * 1_000_000
+    cut = pd.Timestamp(cut_us, unit="us")
+    print("loading rows inside the label horizon...")
+    fresh = load(paths, board, since=cut_us)
+    if fresh["utc_timestamp"].max() <= pd.Timestamp(wm["max_t_us"], unit="us"):
+        print("  no new snapshots")
+        return None, wm["categories"], None
+    context = last_appearances(paths, board, fresh["ticker_symbol"].unique().tolist(), cut_us)
+    print(f"  {len(fresh):,} rows to (re)compute, {len(context):,} rows of context")
+
+    # Only a few columns of the stored rows before the cut are needed: the
+    # appearance counts and the category codes still in use.
+    stored = dataset_store.read(out, columns=["ticker_symbol", "appearances_so_far",
+                                              "sector_code", "industry_code"],
+                                filters=[("utc_timestamp", "<=", cut)])
+    df = add_features(add_targets(_finish([context, fresh])))
+    continue_counts(df, context, stored.groupby("ticker_symbol")["appearances_so_far"].max() + 1)
+    df = df[df["utc_timestamp"] > cut]
+
+    vocab, names = {}, {}
+    for col in ("sector", "industry"):
+        old_vocab = np.asarray(wm["categories"][col] + [None], dtype=object)
+        names[col] = old_vocab[stored[f"{col}_code"].to_numpy()]  # code -1 -> the trailing None
+        cats = pd.Categorical(np.concatenate([names[col], df[col].to_numpy(dtype=object)])).categories
+        df[f"{col}_code"] = pd.Categorical(df[col], categories=cats).codes
+        vocab[col] = cats.tolist()
+    df = df[KEEP_COLS]
+
+    if vocab == wm["categories"]:
+        # Codes are unchanged: rewrite only the partitions from the cut's month on.
+        since = dataset_store.partition_start(cut)
+        kept = dataset_store.read(out, filters=[("utc_timestamp", ">=", since),
+                                                ("utc_timestamp", "<=", cut)])
+    else:
+        # A new sector/industry shifted the codes: recode and rewrite everything.
+        since = None
+        kept = dataset_store.read(out, filters=[("utc_timestamp", "<=", cut)])
+        for col in ("sector", "industry"):  # same rows, same order as `stored`
+            kept[f"{col}_code"] = pd.Categorical(names[col], categories=vocab[col]).codes
+    dataset = pd.concat([kept, df], ignore_index=True)
+    dataset = dataset.sort_values(["ticker_symbol", "utc_timestamp"], ignore_index=True)
+    if lean:
+        dataset = compact(dataset)
+    print(f"  recomputed {len(df):,} rows; rewriting "
+          + ("everything" if since is None else f"from {since.date()}"))
+    return dataset, vocab, since
+
+
 def main():
     ap = argparse.ArgumentParser(description=__doc__,
                                  formatter_class=argparse.RawDescriptionHelpFormatter)
     ap.add_argument("--db", nargs="+", default=["trending-tickers.db"],
-                    help="one or more DB paths/globs to concatenate (archives + current)")
-    ap.add_argument("--out", default="ml/dataset.parquet")
+                    help="one or more DB paths/globs or segment dirs to concatenate "
+                         "(archives + current)")
+    ap.add_argument("--out", default="ml/dataset",
+                    help="output dataset directory (month-partitioned Parquet, see dataset_store.py)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="extend the previous --out from its watermark (<out>.watermark.json) "
+                         "instead of rebuilding; falls back to a full build when it can't")
+    ap.add_argument("--lean", action="store_true",
+                    help="memory-lean build: categorical strings, chunked reads, float32/int16 "
+                         "columns (see LEAN_DTYPES); prints each stage's peak RSS")
     args = ap.parse_args()
 
-    print("loading...")
-    df = load(args.db)
-    print(f"  {len(df):,} rows, {df.ticker_symbol.nunique():,} tickers")
-    print("targets...")
-    df = add_targets(df)
-    print("features...")
-    df = add_features(df)
-
-    keep = ["utc_timestamp", "ticker_symbol", "sector"] + FEATURE_COLS + TARGET_COLS
-    out = df[keep].copy()
-    out.to_parquet(args.out, index=False)
-    print(f"wrote {args.out}  ({len(out):,} rows x {out.shape[1]} cols)\n")
+    report = [] if args.lean else None
+    built = None
+    if args.incremental:
+        print("incremental update...")
+        built = build_incremental(args.db, args.out, lean=args.lean)
+    if built is None:
+        out, vocab = build(args.db, lean=args.lean, report=report)
+        built = out, vocab, None
+    out, vocab, since = built
+    if out is None:
+        print(f"{args.out} is up to date")
+        return
+    with _stage("writing", report):
+        dataset_store.write_tracked(out, args.out, _definition("trending", args.lean),
+                                    partial(_history_rows, _sources(args.db)),
+                                    {"categories": vocab}, since=since)
+    with open(categories_path(args.out), "w") as f:
+        json.dump(vocab, f, indent=1)
+    print(f"wrote {args.out}  ({len(out):,} rows x {out.shape[1]} cols"
+          + (")\n" if since is None else f", rewrote from {since.date()})\n"))
 
     print("=== target coverage / distribution ===")
     for c in ["persistence_6h", "persistence_24h"]:
@@ -233,6 +749,10 @@ def main():
     nulls = out[FEATURE_COLS].isna().mean().sort_values(ascending=False)
     for name, rate in nulls.head(8).items():
         print(f"  {name:20} {rate:.3f}")
+    if report:
+        print("\n=== peak RSS by stage (MB) ===")
+        for name, peak, now in report:
+            print(f"  {name:12} {peak:>9,.0f}" + ("" if now is None else f"  ({now:,.0f} after)"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+"""The feature/label dataset as date-partitioned Parquet with a manifest.
+
+build_dataset.py writes
+
+    ml/dataset/month=YYYY-MM/part.parquet       one file per UTC month, rows sorted
+                                                 by (utc_timestamp, ticker_symbol),
+                                                 one row group per day
+    ml/dataset/_manifest.json                    rows and min/max utc_timestamp,
+                                                 overall and per partition
+
+so readers project the columns and prune the data they need instead of loading
+the whole table:
+
+    read("ml/dataset", columns=["utc_timestamp", "persistence_24h"])
+    read("ml/dataset", filters=[("utc_timestamp", ">", cutoff)])
+    time_range("ml/dataset")            # from the manifest, no data read
+
+An incrementally maintained dataset (build_dataset.py --incremental, the feature
+store) is written with write_tracked(), which leaves a watermark next to it
+(``<root>.watermark.json``): what the rows are (``definition``), their newest
+snapshot and the sources' row counts up to it. read_watermark() trusts it only
+while all three still hold.
+
+``filters`` are pyarrow-style (column, op, value) tuples ANDed together (op
+one of > >= < <= ==, or ``in`` with a list of values). The utc_timestamp
+comparisons pick partitions from the manifest; all of them are pushed
+into the Parquet scan, which skips day row groups by their statistics. A single
+Parquet file (the old ``ml/dataset.parquet``) is read the same way.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+MANIFEST = "_manifest.json"
+PART = "part.parquet"
+_OPS = (">", ">=", "<", "<=", "==", "in")
+
+
+def _month(ts):
+    return pd.Timestamp(ts).strftime("%Y-%m")
+
+
+def partition_start(ts):
+    """First instant of the partition holding ``ts`` (see write(since=...))."""
+    return pd.Timestamp(ts).normalize().replace(day=1)
+
+
+def _partition_path(root, month):
+    return os.path.join(root, f"month={month}", PART)
+
+
+def manifest(root):
+    with open(os.path.join(root, MANIFEST)) as f:
+        return json.load(f)
+
+
+def _write_manifest(root, partitions):
+    info = {
+        "rows": sum(p["rows"] for p in partitions.values()),
+        "min_t": min((p["min_t"] for p in partitions.values()), default=None),
+        "max_t": max((p["max_t"] for p in partitions.values()), default=None),
+        "partitions": dict(sorted(partitions.items())),
+    }
+    tmp = os.path.join(root, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(info, f, indent=1)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+
+
+def _write_partitions(frame, root):
+    """Write ``frame`` one file per month under ``root``, a row group per day;
+    return the manifest entries."""
+    entries = {}
+    # One (time, ticker) ordering, then a month-sized gather per partition --
+    # never a sorted copy of the whole frame.
+    ts = frame["utc_timestamp"]
+    order = np.lexsort((pd.factorize(frame["ticker_symbol"], sort=True)[0], ts.to_numpy()))
+    months = (ts.dt.year * 100 + ts.dt.month).to_numpy()[order]
+    starts = np.flatnonzero(np.diff(months)) + 1
+    for first, end in zip([0, *starts], [*starts, len(order)]):
+        if first == end:
+            continue  # empty frame
+        month = f"{months[first] // 100:04d}-{months[first] % 100:02d}"
+        part = frame.take(order[first:end])
+        path = _partition_path(root, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Categorical strings (a lean build) are stored as plain strings.
+        part = part.astype({c: object for c in part.columns
+                            if isinstance(part[c].dtype, pd.CategoricalDtype)})
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        days = part["utc_timestamp"].dt.normalize().to_numpy()
+        bounds = [0, *(days[1:] != days[:-1]).nonzero()[0] + 1, len(days)]
+        with pq.ParquetWriter(path + ".tmp", table.schema, write_statistics=True) as writer:
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                writer.write_table(table.slice(lo, hi - lo))
+        os.replace(path + ".tmp", path)
+        entries[month] = {"rows": len(part), "min_t": part["utc_timestamp"].min().isoformat(),
+                          "max_t": part["utc_timestamp"].max().isoformat()}
+    return entries
+
+
+def write(frame, root, since=None):
+    """Write the dataset ``frame`` under ``root``.
+
+    With ``since`` (a timestamp), only the partitions of that month and later
+    are replaced and ``frame`` must hold every row from partition_start(since)
+    on; older partitions are left untouched. Otherwise the whole dataset is rebuilt next to ``root``
+    and swapped in.
+    """
+    if since is not None and os.path.exists(os.path.join(root, MANIFEST)):
+        first = _month(since)
+        partitions = {m: p for m, p in manifest(root)["partitions"].items() if m < first}
+        for month in set(manifest(root)["partitions"]) - set(partitions):
+            shutil.rmtree(os.path.dirname(_partition_path(root, month)))
+        partitions.update(_write_partitions(frame, root))
+        _write_manifest(root, partitions)
+        return
+    tmp = root.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    _write_manifest(tmp, _write_partitions(frame, tmp))
+    old = root.rstrip(os.sep) + ".old"
+    if os.path.exists(root):
+        os.replace(root, old)
+    os.replace(tmp, root)
+    if os.path.isdir(old):
+        shutil.rmtree(old)
+    elif os.path.exists(old):
+        os.remove(old)
+
+
+def _keep(entry, filters):
+    """Can partition ``entry`` hold rows passing the utc_timestamp filters?"""
+    lo, hi = pd.Timestamp(entry["min_t"]), pd.Timestamp(entry["max_t"])
+    for col, op, value in filters:
+        if col != "utc_timestamp" or op == "in":
+            continue
+        value = pd.Timestamp(value)
+        if ((op == ">" and hi <= value) or (op == ">=" and hi < value)
+                or (op == "<" and lo >= value) or (op == "<=" and lo > value)
+                or (op == "==" and not lo <= value <= hi)):
+            return False
+    return True
+
+
+def files(root, filters=()):
+    """The Parquet files of ``root`` that can match ``filters``, oldest first."""
+    if os.path.isfile(root):
+        return [root]
+    return [_partition_path(root, month) for month, entry in manifest(root)["partitions"].items()
+            if _keep(entry, filters)]
+
+
+def read(root, columns=None, filters=None):
+    """Rows of the dataset at ``root`` (partitioned directory or single file)
+    passing ``filters``, restricted to ``columns``; time-ordered for a
+    partitioned dataset."""
+    filters = [(c, op, pd.Timestamp(v) if c == "utc_timestamp" and op != "in" else v)
+               for c, op, v in (filters or [])]
+    for _, op, _ in filters:
+        if op not in _OPS:
+            raise ValueError(f"unsupported filter operator {op!r}")
+    paths = files(root, filters)
+    if not paths:
+        return pd.DataFrame(columns=columns)
+    # A month whose sector/industry are all missing stores them as null-typed.
+    schema = pa.unify_schemas([pq.read_schema(p) for p in paths], promote_options="permissive")
+    scan = ds.dataset(paths, schema=schema, format="parquet")
+    return scan.to_table(columns=columns, filter=pq.filters_to_expression(filters)
+                         if filters else None).to_pandas()
+
+
+def time_range(root):
+    """(min, max) utc_timestamp of the dataset -- the manifest for a partitioned
+    dataset, the row-group statistics for a single file."""
+    if os.path.isdir(root):
+        info = manifest(root)
+        return pd.Timestamp(info["min_t"]), pd.Timestamp(info["max_t"])
+    meta = pq.ParquetFile(root).metadata
+    col = meta.schema.names.index("utc_timestamp")
+    stats = [meta.row_group(i).column(col).statistics for i in range(meta.num_row_groups)]
+    return (pd.Timestamp(min(s.min for s in stats)), pd.Timestamp(max(s.max for s in stats)))
+
+
+def watermark_path(root):
+    return os.path.splitext(root.rstrip(os.sep))[0] + ".watermark.json"
+
+
+def read_watermark(root, definition, history_rows):
+    """The watermark of the dataset at ``root``, or None (with the reason) if it
+    must be rebuilt: the dataset or its watermark is missing, it was written
+    with another ``definition``, or ``history_rows(t_us)`` -- the sources' row
+    counts up to its newest snapshot, None if they can't be counted -- has
+    changed."""
+    path = watermark_path(root)
+    if not (os.path.exists(os.path.join(root, MANIFEST)) and os.path.exists(path)):
+        print("  nothing to extend yet -> full build")
+        return None
+    with open(path) as f:
+        wm = json.load(f)
+    if {k: wm.get(k) for k in definition} != definition:
+        print("  definition changed since the last build -> full build")
+        return None
+    rows = history_rows(wm["max_t_us"])
+    if rows is None:
+        print("  incremental updates need typed (v3+) DB archives -> full build")
+        return None
+    if rows != wm["rows"]:
+        print("  sources or rows at/before the watermark changed -> full build")
+        return None
+    return wm
+
+
+def write_tracked(frame, root, definition, history_rows, extra=None, since=None):
+    """write() ``frame`` (``since`` as there), then its watermark: ``definition``,
+    the newest snapshot, ``history_rows()`` up to it and ``extra``. Sources that
+    can't be counted get no watermark, so the next update is a full build."""
+    path = watermark_path(root)
+    # No watermark while partitions are being replaced: an interrupted write
+    # forces the next update into a full build.
+    if os.path.exists(path):
+        os.remove(path)
+    write(frame, root, since=since)
+    if not len(frame):
+        return
+    max_us = int(frame["utc_timestamp"].max().value // 1000)
+    rows = history_rows(max_us)
+    if rows is None:
+        return
+    with open(path, "w") as f:
+        json.dump({**definition, "max_t_us": max_us, "rows": rows, **(extra or {})}, f, indent=1)
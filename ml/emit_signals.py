@@ -12,6 +12,13 @@ one JSONL record per ticker (mirroring the harness's data/*.jsonl convention):
 `reasons` are derived from LightGBM per-row feature contributions (pred_contrib), so the
 agent can *cite why* a ticker is flagged rather than treating the score as a black box.
 Features are the exact same leakage-safe set used in training (info <= snapshot time).
+They are computed from a bounded lookback (build_dataset.latest_features: the scored
+snapshots plus each ticker's last few appearances), with sector/industry codes and
+vol-regime tiers frozen at training time (model_meta.json, written by train.py), so the
+cost does not grow with the archive. Models trained before model_meta.json existed are
+scored from the feature store (feature_store.py) instead -- only its newest partitions
+are read. Their vol-regime tiers are computed over the whole store once and frozen into
+model_meta.json (see frozen_tiers), so they keep their meaning from run to run.
 """
 
 import argparse
@@ -22,7 +29,9 @@ import pandas as pd
 import lightgbm as lgb
 import joblib
 
-from build_dataset import load, add_features, FEATURE_COLS
+import dataset_store
+import feature_store
+from build_dataset import FEATURE_COLS, encode_categories, latest_features, load_meta, vol_tiers
 from bayes_signals import ensemble_predict, NUMERIC, apply_iso
 from scipy.stats import entropy as scipy_entropy
 import sentiment as sent
@@ -68,14 +77,6 @@ def verbalize(contribs, row, k=3):
     return out
 
 
-def vol_tiers(model, df):
-    """Derive vol-regime tier thresholds from the model's own predictions (log space)."""
-    pred = model.predict(df[FEATURE_COLS])
-    vol = np.expm1(pred)
-    q = np.quantile(vol, [0.50, 0.80, 0.95])
-    return q  # [calm|moderate, moderate|elevated, elevated|high]
-
-
 def tier_label(v, q):
     if v < q[0]:
         return "calm"
@@ -133,10 +134,31 @@ def compute_bayes(cur, model_dir):
     return blocks
 
 
+def frozen_tiers(reg, features, model_dir):
+    """Vol-regime tiers for models trained without a frozen vocabulary: those in
+    model_meta.json, or -- the first time -- vol_tiers() over every row of the
+    feature store, written there so later runs reuse them."""
+    path = os.path.join(model_dir, "model_meta.json")
+    meta = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            meta = json.load(f)
+    if "vol_tiers" not in meta:
+        df = dataset_store.read(features, columns=FEATURE_COLS)
+        meta["vol_tiers"] = vol_tiers(reg, df).tolist()
+        meta["tiers_through"] = dataset_store.time_range(features)[1].isoformat()
+        with open(path, "w") as f:
+            json.dump(meta, f, indent=1)
+        print(f"  froze the vol-regime tiers over the whole feature store into {path}")
+    return np.asarray(meta["vol_tiers"])
+
+
 def main():
     ap = argparse.ArgumentParser(description=__doc__,
                                  formatter_class=argparse.RawDescriptionHelpFormatter)
     ap.add_argument("--db", default="trending-tickers.db")
+    ap.add_argument("--features", default="ml/features",
+                    help="feature store directory (see feature_store.py)")
     ap.add_argument("--persist-model", default="ml/model_persistence_24h.txt")
     ap.add_argument("--vol-model", default="ml/model_fwd_vol_24h.txt")
     ap.add_argument("--out", default="ml/signals.jsonl")
@@ -144,17 +166,23 @@ def main():
                     help="Score the last N snapshots (default 1 = latest).")
     args = ap.parse_args()
 
-    df = load(args.db)
-    df = add_features(df)
-
-    snaps = sorted(df["utc_timestamp"].unique())[-args.snapshots:]
-    cur = df[df["utc_timestamp"].isin(snaps)].copy()
-    print(f"scoring {len(cur)} rows across {len(snaps)} snapshot(s); "
-          f"latest = {pd.Timestamp(snaps[-1])}")
-
     clf = lgb.Booster(model_file=args.persist_model)
     reg = lgb.Booster(model_file=args.vol_model)
-    q = vol_tiers(reg, df)
+    meta = load_meta(os.path.dirname(args.persist_model) or ".")
+    if meta is not None:
+        cur = encode_categories(latest_features(args.db, snapshots=args.snapshots),
+                                meta["categories"])
+        q = np.asarray(meta["vol_tiers"])
+    else:
+        print("  (no category vocabulary in model_meta.json — run `train.py` to freeze "
+              "it; scoring from the feature store)")
+        feature_store.update(args.db, args.features)
+        cur = feature_store.latest(args.features, args.snapshots)
+        q = frozen_tiers(reg, args.features, os.path.dirname(args.persist_model) or ".")
+    cur = cur.sort_values(["ticker_symbol", "utc_timestamp"])
+    snaps = sorted(cur["utc_timestamp"].unique())
+    print(f"scoring {len(cur)} rows across {len(snaps)} snapshot(s); "
+          f"latest = {pd.Timestamp(snaps[-1])}")
 
     X = cur[FEATURE_COLS]
     p_persist = clf.predict(X)
@@ -179,8 +207,8 @@ def main():
     if bayes is None:
         print("  (bayes models not found — run `bayes_signals.py --save` to enable)")
 
-    titles = cur["article_title"].fillna("").tolist() if "article_title" in cur else [""] * len(cur)
-    sent_scores = sent.score_titles(titles)
+    titles = cur["article_title"].fillna("").tolist()
+    sent_scores = cur["sentiment"].tolist()  # the stored feature, scored once per headline
     print(f"  sentiment backend: {sent.get_backend()}")
 
     records = []
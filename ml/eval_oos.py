@@ -1,12 +1,16 @@
 """Out-of-sample evaluation on fresh data pulled from GitHub.
 
 The deployed models were trained/validated on data up to a cutoff (default: the max
-timestamp in dataset.parquet). After a `git pull`, the DB contains snapshots that
+timestamp in ml/dataset). After a `git pull`, the DB contains snapshots that
 postdate that cutoff -- never seen in train OR validation. This scores the deployed
 committee on those rows against their REALIZED outcomes, so we learn whether the
 val-fold metrics (persistence AUC ~0.74, direction top-decile precision ~0.71) hold
 up on genuinely unseen data, or were optimistic.
 
+Features come from the feature store (feature_store.py, updated first), with the
+sector/industry codes re-encoded in the vocabulary frozen with the models (model_meta.json);
+targets only look forward, so they are computed from the DB rows after the cutoff alone.
+
 Run AFTER `git pull`:  python ml/eval_oos.py
 """
 
@@ -19,12 +23,18 @@ import lightgbm as lgb
 from scipy.stats import spearmanr
 from sklearn.metrics import roc_auc_score, average_precision_score, accuracy_score
 
-from build_dataset import load, add_targets, add_features, FEATURE_COLS
+import dataset_store
+import feature_store
+from archive import to_epoch_us
+from build_dataset import (load, add_targets, encode_categories, load_meta, FEATURE_COLS,
+                           TARGET_COLS)
 from bayes_signals import ensemble_predict, NUMERIC, make_direction, make_regime
 
 
-def parquet_cutoff(path="ml/dataset.parquet"):
-    return pd.read_parquet(path, columns=["utc_timestamp"])["utc_timestamp"].max()
+def parquet_cutoff(path="ml/dataset"):
+    """Newest snapshot in the training dataset, from its manifest (or a single
+    file's row-group statistics) -- no rows are read."""
+    return dataset_store.time_range(path)[1]
 
 
 def main():
@@ -32,20 +42,32 @@ def main():
                                  formatter_class=argparse.RawDescriptionHelpFormatter)
     ap.add_argument("--db", default="trending-tickers.db")
     ap.add_argument("--since", default=None,
-                    help="OOS cutoff (default: max timestamp in dataset.parquet)")
+                    help="OOS cutoff (default: max timestamp in ml/dataset)")
     ap.add_argument("--model-dir", default="ml")
+    ap.add_argument("--features", default="ml/features",
+                    help="feature store directory (see feature_store.py)")
     args = ap.parse_args()
 
     cutoff = pd.Timestamp(args.since) if args.since else parquet_cutoff()
     print(f"OOS cutoff (training max): {cutoff}")
 
-    df = add_features(add_targets(load(args.db)))
-    df[NUMERIC] = df[NUMERIC].replace([np.inf, -np.inf], np.nan)
-    oos = df[df["utc_timestamp"] > cutoff].copy()
+    feature_store.update(args.db, args.features)
+    oos = dataset_store.read(args.features, filters=[("utc_timestamp", ">", cutoff)])
     if len(oos) == 0:
         print("\nNo OOS rows yet — run `git pull --rebase` to fetch newer snapshots "
               "from GitHub, then re-run this.")
         return
+    keys = ["ticker_symbol", "utc_timestamp"]
+    targets = add_targets(load(args.db, since=to_epoch_us(cutoff), columns=["last_price"]))
+    oos = oos.merge(targets[keys + TARGET_COLS], on=keys, validate="one_to_one")
+    oos = oos.sort_values(keys, ignore_index=True)
+    meta = load_meta(args.model_dir)
+    if meta is not None:
+        encode_categories(oos, meta["categories"])
+    else:
+        print("(model_meta.json not found — sector/industry codes are the feature store's, "
+              "which may not be the ones the models were trained on)")
+    oos[NUMERIC] = oos[NUMERIC].replace([np.inf, -np.inf], np.nan)
     print(f"OOS rows: {len(oos):,}  ({oos.utc_timestamp.min()} -> {oos.utc_timestamp.max()})")
 
     md = args.model_dir
@@ -0,0 +1,149 @@
+"""Materialized feature rows: the FEATURE_COLS of every (ticker, snapshot).
+
+emit_signals.py and eval_oos.py used to load() the whole archive and run
+add_features() on every call -- re-scoring every headline and recomputing every
+rolling statistic -- just to look at the newest rows. They read the store
+instead:
+
+    ml/features/                  month-partitioned Parquet (dataset_store.py
+                                  layout), one row of STORE_COLS per
+                                  (ticker_symbol, utc_timestamp)
+    ml/features.watermark.json    the feature definition it holds (FEATURE_VERSION,
+                                  the columns, board, sentiment backend), its
+                                  newest snapshot, the archives' row counts up to
+                                  it and the sector/industry vocabularies
+
+update() brings the store up to date first. Only snapshots after the watermark
+are loaded and only the tickers on them are computed -- on top of each one's
+last ROLL_WINDOW appearances and its stored appearance count -- and appended to
+the partitions from their month on. Features only look back, so stored rows
+never change and the store equals add_features() over the whole archive, bit
+for bit. A new sector/industry that shifts the category codes rewrites the
+stored codes (nothing is recomputed); a store with another feature definition,
+or whose archives changed at or before the watermark, is rebuilt from scratch.
+
+The store is not committed. CI keeps it between runs in the Actions cache
+(.github/workflows/main.yml, one entry per day and feature-code hash), so each
+hourly run only appends the snapshots since the cached watermark; a cache miss
+(first run, or after eviction) costs one full build.
+
+    python ml/feature_store.py --db trending-tickers.db
+    python ml/feature_store.py --rebuild
+"""
+
+import argparse
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+import dataset_store
+import sentiment as _sent
+from build_dataset import (FEATURE_COLS, FEATURE_VERSION, _category, _finish, _history_rows,
+                           _sources, add_features, continue_counts, last_appearances, load)
+
+# What scoring needs besides the features: the key, what it reports per row, and
+# the names behind the codes (to encode them with a model's own vocabulary).
+STORE_COLS = ["utc_timestamp", "ticker_symbol", "sector", "industry", "article_title"] + FEATURE_COLS
+
+
+def _definition(board):
+    return {"version": FEATURE_VERSION, "columns": STORE_COLS, "board": board,
+            "sentiment": _sent.get_backend()}
+
+
+def _codes(df, vocab):
+    """Set ``df``'s sector_code / industry_code to the codes a full build over
+    the stored rows (whose values are ``vocab``) plus ``df`` gives -> the new
+    vocabularies."""
+    out = {}
+    for col in ("sector", "industry"):
+        cats = pd.Categorical(np.concatenate([np.asarray(vocab[col], dtype=object),
+                                              df[col].to_numpy(dtype=object)])).categories
+        df[f"{col}_code"] = pd.Categorical(df[col], categories=cats).codes
+        out[col] = cats.tolist()
+    return out
+
+
+def build(db_path, board="trending"):
+    """Every feature row of ``db_path`` -> (frame of STORE_COLS, vocabularies)."""
+    df = add_features(load(db_path, board))
+    vocab = {c: _category(df[c]).cat.categories.tolist() for c in ("sector", "industry")}
+    return df[STORE_COLS], vocab
+
+
+def update(db_path, root="ml/features", board="trending", rebuild=False):
+    """Bring the store at ``root`` up to date with ``db_path``, building it if
+    it is missing or stale (see the module docstring); returns the number of
+    feature rows computed."""
+    paths = _sources(db_path)
+    print(f"updating feature store {root}...")
+    wm = None if rebuild else dataset_store.read_watermark(
+        root, _definition(board), partial(_history_rows, paths))
+    if wm is None:
+        frame, vocab = build(paths, board)
+        _write(frame, root, paths, board, vocab)
+        print(f"  built {len(frame):,} feature rows")
+        return len(frame)
+
+    fresh = load(paths, board, since=wm["max_t_us"])
+    if not len(fresh):
+        print("  up to date")
+        return 0
+    symbols = fresh["ticker_symbol"].unique().tolist()
+    context = last_appearances(paths, board, symbols, wm["max_t_us"])
+    stored = dataset_store.read(root, columns=["ticker_symbol", "appearances_so_far"],
+                                filters=[("ticker_symbol", "in", symbols)])
+    df = add_features(_finish([context, fresh]))
+    continue_counts(df, context, stored.groupby("ticker_symbol")["appearances_so_far"].max() + 1)
+    df = df[df["utc_timestamp"] > pd.Timestamp(wm["max_t_us"], unit="us")]
+    vocab = _codes(df, wm["categories"])
+    df = df[STORE_COLS]
+
+    if vocab == wm["categories"]:
+        since = dataset_store.partition_start(df["utc_timestamp"].min())
+        kept = dataset_store.read(root, filters=[("utc_timestamp", ">=", since)])
+    else:
+        # A new sector/industry shifted the codes: recode every stored row.
+        since = None
+        kept = dataset_store.read(root)
+        for col in ("sector", "industry"):
+            kept[f"{col}_code"] = pd.Categorical(kept[col], categories=vocab[col]).codes
+    frame = pd.concat([kept, df], ignore_index=True) if len(kept) else df
+    _write(frame, root, paths, board, vocab, since)
+    print(f"  {len(df):,} new rows for {len(symbols):,} tickers; rewrote "
+          + ("everything" if since is None else f"from {since.date()}"))
+    return len(df)
+
+
+def latest(root="ml/features", snapshots=1):
+    """The stored rows of the newest ``snapshots`` snapshots, reading partitions
+    newest first only until there are enough."""
+    frames, times = [], set()
+    for path in reversed(dataset_store.files(root)):
+        frames.insert(0, dataset_store.read(path))
+        times.update(frames[0]["utc_timestamp"].unique())
+        if len(times) >= snapshots:
+            break
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return df[df["utc_timestamp"].isin(sorted(times)[-snapshots:])]
+
+
+def _write(frame, root, paths, board, vocab, since=None):
+    dataset_store.write_tracked(frame, root, _definition(board), partial(_history_rows, paths),
+                                {"categories": vocab}, since=since)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", nargs="+", default=["trending-tickers.db"],
+                    help="one or more DB paths/globs or segment dirs (as build_dataset.py)")
+    ap.add_argument("--out", default="ml/features", help="feature store directory")
+    ap.add_argument("--rebuild", action="store_true", help="rebuild even if it is up to date")
+    args = ap.parse_args()
+    update(args.db, args.out, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Array kernels over key-grouped rows, replacing pandas groupby passes.
+
+``Segments`` factorizes a key column once (tickers for the per-ticker
+time-series features, snapshot times for the cross-sectional ones), finds where
+each group's run of rows starts, and then answers shift / cumcount /
+rolling-window / count / rank questions with index arithmetic on plain numpy
+arrays -- no per-call hashing, no MultiIndex intermediates:
+
+    seg = Segments(df["ticker_symbol"])
+    prev = seg.lag(df["last_price"], 1)          # == groupby(...).shift(1)
+    mean, std = window_stats(seg.lags(df["volume"], 5), min_periods=2)
+    Segments(df["utc_timestamp"]).rank_pct(df["volume"])  # == ...rank(pct=True)
+
+Semantics follow pandas groupby: group membership is by key, order within a
+group is frame order, and missing keys form no group (NaN / -1 results). A
+frame whose groups are already contiguous (build_dataset.load() sorts by
+ticker, time) is used in place; otherwise rows are stably reordered by group
+once and results are put back in frame order.
+
+Rolling windows are gathered into a (window, n) array and reduced per column
+rather than with running/cumulative sums: a window's value then depends only
+on the values in it, which keeps the incremental dataset build bit-identical
+to a full one, and avoids the cancellation of sum-of-squares on raw volumes.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _stable_argsort(codes):
+    """Stable argsort of non-negative integer codes, in the narrowest dtype that
+    holds them (numpy radix-sorts 8/16-bit keys)."""
+    codes = np.asarray(codes)
+    return np.argsort(codes.astype(np.min_scalar_type(int(codes.max(initial=0))), copy=False),
+                      kind="stable")
+
+
+class Segments:
+    def __init__(self, keys):
+        codes = pd.factorize(keys, sort=False)[0]
+        n = len(codes)
+        self.valid = codes >= 0
+        change = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        if n == 0 or (self.valid.all() and len(change) + 1 == codes.max() + 1):
+            self.order = None  # every group is already one contiguous run
+        else:
+            self.order = _stable_argsort(codes + 1)  # missing (-1) first
+            grouped = codes[self.order]
+            change = np.flatnonzero(grouped[1:] != grouped[:-1]) + 1
+        bounds = np.concatenate([[0], change, [n]]).astype(np.int64)
+        lengths = np.diff(bounds)
+        # Per row (in grouped order): rows of its group before and after it.
+        self.pos = np.arange(n, dtype=np.int64) - np.repeat(bounds[:-1], lengths)
+        self.rest = np.repeat(bounds[1:] - 1, lengths) - np.arange(n, dtype=np.int64)
+        self.n = n
+        self.bounds = bounds
+        # Group number per row (grouped order); missing keys form no group, but
+        # their rows sort into one run, so mask them with ``valid``.
+        self.group = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+
+    def take(self, values):
+        """``values`` (frame order) -> grouped order."""
+        values = np.asarray(values)
+        return values if self.order is None else values[self.order]
+
+    def put(self, values):
+        """Grouped order -> frame order (along the last axis)."""
+        if self.order is None:
+            return values
+        out = np.empty_like(values)
+        out[..., self.order] = values
+        return out
+
+    @staticmethod
+    def _prepare(values):
+        """(values, missing marker) -- ints/bools widen to float for NaN."""
+        if values.dtype.kind in "iub":
+            values = values.astype(float)
+        return values, np.datetime64("NaT") if values.dtype.kind == "M" else np.nan
+
+    def _shift(self, values, k):
+        """Grouped-order ``values`` shifted by k within each group (k < 0 leads):
+        a plain slice copy, then the rows whose source lies in another group
+        are blanked."""
+        values, missing = self._prepare(values)
+        out = np.full(self.n, missing, dtype=values.dtype)
+        if k > 0:
+            out[k:] = values[:-k]
+            out[self.pos < k] = missing
+        elif k < 0:
+            out[:k] = values[-k:]
+            out[self.rest < -k] = missing
+        else:
+            out[:] = values
+        return out
+
+    def lag(self, values, k):
+        """groupby(keys)[values].shift(k), as an array in frame order."""
+        out = self.put(self._shift(self.take(values), k))
+        out[~self.valid] = self._prepare(out)[1]
+        return out
+
+    def lags(self, values, window):
+        """(window, n) float array: row k-1 is shift(k), in frame order."""
+        v = self.take(values).astype(float, copy=False)
+        out = np.full((window, self.n), np.nan)
+        for k in range(1, window + 1):
+            out[k - 1, k:] = v[:-k]
+            out[k - 1, self.pos < k] = np.nan
+        out = self.put(out)
+        out[:, ~self.valid] = np.nan
+        return out
+
+    def cumcount(self):
+        """groupby(keys).cumcount(), in frame order."""
+        return self.put(self.pos)
+
+    def _finish(self, out):
+        """Grouped-order float result -> frame order, NaN for missing keys."""
+        out = self.put(out.astype(float, copy=False))  # bincount of nothing is int
+        out[~self.valid] = np.nan
+        return out
+
+    def count(self, present, by=None):
+        """groupby(keys)[col].transform("count"), where ``present`` is
+        col.notna(); with ``by`` (integer codes, -1 = missing) the count is per
+        (key, by) pair, NaN where ``by`` is missing -- as groupby([keys, by]).
+        Float, like pandas' transform whenever a key is missing."""
+        present = self.take(np.asarray(present, dtype=bool))
+        if by is None:
+            per_group = np.bincount(self.group, weights=present, minlength=len(self.bounds) - 1)
+            return self._finish(per_group[self.group])
+        by = self.take(np.asarray(by, dtype=np.int64))
+        pair = self.group * (int(by.max(initial=0)) + 2) + (by + 1)  # -1 stays in-group
+        inverse = pd.factorize(pair)[0]
+        counts = np.bincount(inverse, weights=present)[inverse].astype(float, copy=False)
+        counts[by < 0] = np.nan
+        return self._finish(counts)
+
+    def rank_pct(self, values):
+        """groupby(keys)[values].rank(pct=True): average rank of tied values
+        over the group's non-NaN count; NaN values stay NaN.
+
+        Groups are sorted by value -- each as a row of a NaN-padded (group,
+        slot) grid when the groups are of similar size (boards are), else with
+        one global sort -- and each run of equal values gets the mean of its
+        first and last 1-based position, which is exact: the same bits as
+        pandas' running sum-of-ranks / ties."""
+        v = self.take(values).astype(float, copy=False)
+        lengths = np.diff(self.bounds)
+        width = int(lengths.max(initial=0))
+        if len(lengths) * width <= 2 * self.n:
+            grid = np.full((len(lengths), width), np.nan)
+            grid[self.group, self.pos] = v
+            flat = grid.ravel()
+            order = np.argsort(grid, axis=1)  # NaN (and padding) last
+            order += (np.arange(len(lengths)) * width)[:, None]
+            order = order.ravel()
+            gstart = np.arange(len(lengths), dtype=np.int64) * width
+            sg = np.repeat(np.arange(len(lengths), dtype=np.int64), width)
+        else:
+            # Sort by value (NaN last; tie order is irrelevant), then stably by group.
+            flat = v
+            order = np.argsort(v)
+            order = order[_stable_argsort(self.group[order])]
+            gstart = self.bounds[:-1]
+            sg = self.group[order]
+        sv = flat[order]
+        start = np.ones(len(sv), dtype=bool)
+        start[1:] = (sg[1:] != sg[:-1]) | (sv[1:] != sv[:-1])
+        first = np.flatnonzero(start)
+        last = np.append(first[1:], len(sv)) - 1
+        base = gstart[sg[first]] - 1
+        avg = ((first - base) + (last - base)) / 2.0
+        ranks = np.empty(len(sv))
+        ranks[order] = avg[np.cumsum(start) - 1]
+        if flat is not v:
+            ranks = ranks.reshape(grid.shape)[self.group, self.pos]
+        sizes = np.bincount(self.group, weights=~np.isnan(v), minlength=len(lengths))
+        with np.errstate(divide="ignore", invalid="ignore"):  # all-NaN groups
+            out = ranks / sizes[self.group]
+        out[np.isnan(v)] = np.nan
+        return self._finish(out)
+
+
+def window_stats(prior, min_periods):
+    """Per-column mean and sample std (ddof=1) over the non-NaN entries of each
+    column of ``prior`` (window, n); NaN with fewer than ``min_periods`` values,
+    and exactly 0 std for a window of equal values (as pandas' rolling std
+    reports).
+
+    The window is folded elementwise, first row to last, which is the order
+    np.nanmean / np.nansum add a short row in -- same bits, without reducing
+    along a 5-wide axis.
+    """
+    missing = np.isnan(prior)
+    n = prior.shape[0] - missing.sum(axis=0)
+    work = np.where(missing, 0.0, prior)
+    total = np.zeros(prior.shape[1])
+    for row in work:
+        total += row
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        np.subtract(prior, mean, out=work)
+        work *= work
+        np.putmask(work, missing, 0.0)
+        ssq = np.zeros(prior.shape[1])
+        for row in work:
+            ssq += row
+        std = np.sqrt(ssq / (n - 1))
+    std[np.fmax.reduce(prior, axis=0) == np.fmin.reduce(prior, axis=0)] = 0.0
+    short = n < min_periods
+    mean[short] = np.nan
+    std[short] = np.nan
+    return mean, std
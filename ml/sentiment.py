@@ -6,15 +6,17 @@ Backends (auto-selected):
                 transparent; handles simple negation. Less nuanced than the transformer.
 
 `score_titles(titles)` returns a list of floats in [-1, 1] (negative..positive), with a
-small SQLite cache so repeated/duplicate headlines are scored once. Use `label(score)`
-for a {negative, neutral, positive} bucket.
+small SQLite cache (ml/sentiment_cache.db, or $SENTIMENT_CACHE) so repeated/duplicate
+headlines are scored once. Use `label(score)` for a {negative, neutral, positive} bucket.
 """
 
 import os
 import re
 import sqlite3
 
-CACHE_PATH = os.path.join(os.path.dirname(__file__), "sentiment_cache.db")
+# SENTIMENT_CACHE points the cache elsewhere (benchmarks start from an empty one).
+CACHE_PATH = (os.environ.get("SENTIMENT_CACHE")
+              or os.path.join(os.path.dirname(__file__), "sentiment_cache.db"))
 _TOKEN = re.compile(r"[a-z']+")
 _NEGATORS = {"not", "no", "never", "without", "n't", "less", "fails", "fail"}
 
@@ -13,6 +13,7 @@ expect more, and treat anything near 0.5 as a leakage bug, not a triumph.
 """
 
 import argparse
+import json
 import os
 import numpy as np
 import pandas as pd
@@ -22,7 +23,8 @@ from scipy.stats import spearmanr
 from sklearn.isotonic import IsotonicRegression
 from sklearn.metrics import roc_auc_score, average_precision_score, brier_score_loss
 
-from build_dataset import FEATURE_COLS, ece
+import dataset_store
+from build_dataset import FEATURE_COLS, categories_path, ece, vol_tiers
 
 CATEGORICAL = ["sector_code", "industry_code", "hour_utc", "dow", "novelty"]
 
@@ -129,9 +131,13 @@ def feature_importance(model, name):
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--data", default="ml/dataset.parquet")
+    ap.add_argument("--data", default="ml/dataset")
+    ap.add_argument("--since", default=None,
+                    help="train/validate only on snapshots after this time (default: all)")
     args = ap.parse_args()
-    df = pd.read_parquet(args.data)
+    df = dataset_store.read(
+        args.data, columns=["utc_timestamp"] + FEATURE_COLS + ["persistence_24h", "fwd_vol_24h"],
+        filters=[("utc_timestamp", ">", args.since)] if args.since else None)
 
     clf, _, _ = train_classifier(df)
     feature_importance(clf, "persistence")
@@ -141,6 +147,25 @@ def main():
     clf.save_model("ml/model_persistence_24h.txt")
     reg.save_model("ml/model_fwd_vol_24h.txt")
     print("\nsaved models to ml/model_*.txt")
+    save_meta(args.data, df, reg)
+
+
+def save_meta(data, df, reg, path="ml/model_meta.json"):
+    """Freeze what scoring must reproduce from training: the sector/industry
+    vocabularies behind the codes the models saw, and the vol-regime tier
+    thresholds over the training rows -- so emit_signals never has to look at
+    the whole history."""
+    meta = {"trained_through": df["utc_timestamp"].max().isoformat(),
+            "vol_tiers": vol_tiers(reg, df).tolist()}
+    if os.path.exists(categories_path(data)):
+        with open(categories_path(data)) as f:
+            meta["categories"] = json.load(f)
+    else:
+        print(f"  {categories_path(data)} not found -- rebuild the dataset so the "
+              "category vocabulary can be frozen with the models")
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=1)
+    print(f"saved {path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""Minimal in-process scheduler for ``scrape_tickers.py --daemon``.
+
+Runs a job on a fixed cadence aligned to the wall clock (every 10 minutes means
+:00, :10, :20 ... UTC), keeping whatever the job closes over -- imports, HTTP
+session, caches -- warm between runs.
+
+  * overlap: runs are strictly sequential in-process, and each run holds an
+    exclusive lock file, so a daemon and a one-shot/cron run never scrape or
+    write the DB at the same time (the loser skips its tick);
+  * missed ticks: if a run overruns one or more ticks (or the host slept), the
+    missed ticks are coalesced into ONE immediate catch-up run -- there is no
+    way to scrape a past board, so replaying each would just duplicate work --
+    and the schedule re-aligns after it;
+  * shutdown: SIGINT/SIGTERM let the in-flight run finish, then exit cleanly;
+    the wait between runs is interruptible.
+
+A job that raises is logged and the loop carries on with the next tick.
+"""
+
+import os
+import signal
+import threading
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, rely on in-process sequencing
+    fcntl = None
+
+
+class LockBusy(RuntimeError):
+    pass
+
+
+@contextmanager
+def run_lock(path):
+    """Hold an exclusive, non-blocking lock on ``path`` for the block; raise
+    LockBusy if another process holds it."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise LockBusy(f"{path} is held by another run") from None
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        yield
+    finally:
+        os.close(fd)  # closing the fd releases the lock
+
+
+def _log(msg):
+    print(f"[{datetime.now(timezone.utc).isoformat(timespec='seconds')}] {msg}", flush=True)
+
+
+class Scheduler:
+    def __init__(self, job, interval_s, lock_path=None, max_runs=None, run_immediately=True):
+        self.job = job
+        self.interval = float(interval_s)
+        self.lock_path = lock_path
+        self.max_runs = max_runs
+        self.run_immediately = run_immediately
+        self.stop = threading.Event()
+        self.runs = 0
+        self.missed = 0
+
+    def next_tick(self, now):
+        """First tick strictly after ``now`` on the interval grid (epoch-aligned)."""
+        return (now // self.interval + 1) * self.interval
+
+    def request_stop(self, signum=None, frame=None):
+        if not self.stop.is_set():
+            _log("shutdown requested; finishing the current run")
+        self.stop.set()
+
+    def _run_job(self):
+        try:
+            with run_lock(self.lock_path) if self.lock_path else nullcontext():
+                self.job()
+        except LockBusy as e:
+            _log(f"skipped tick: {e}")
+            return
+        except Exception:
+            _log("run failed:\n" + traceback.format_exc())
+        self.runs += 1
+
+    def run(self):
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.request_stop)
+        due = time.time() if self.run_immediately else self.next_tick(time.time())
+        while not self.stop.is_set():
+            wait = due - time.time()
+            if wait > 0 and self.stop.wait(wait):
+                break
+            started = time.time()
+            self._run_job()
+            if self.max_runs is not None and self.runs >= self.max_runs:
+                break
+            finished = time.time()
+            due = self.next_tick(started)
+            if finished >= due:
+                missed = int((finished - due) // self.interval) + 1
+                self.missed += missed
+                _log(f"run took {finished - started:.1f}s and overran {missed} tick(s); "
+                     "catching up now")
+                due = finished
+        _log(f"scheduler stopped after {self.runs} run(s), {self.missed} missed tick(s)")
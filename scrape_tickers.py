@@ -1,11 +1,37 @@
-import sqlite3
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 from jinja2 import Environment, FileSystemLoader
 from datetime import datetime, timezone
+import argparse
 import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import yfinance as yf
+from yfinance.exceptions import YFRateLimitError
+
+import capture
+import html_extract
+import http_client
+import scheduler
+import segments
+import ticker_db
+from meta_cache import MetadataCache
+from metrics import RunMetrics
+
+# Concurrent per-ticker enrichment lookups (override with SCRAPE_WORKERS or --workers).
+DEFAULT_WORKERS = int(os.environ.get("SCRAPE_WORKERS", "8"))
+
+# Yahoo screener boards. most-active is paginated via start/count.
+BOARD_URLS = {
+    'trending': "https://finance.yahoo.com/markets/stocks/trending/",
+    'most-active': "https://finance.yahoo.com/markets/stocks/most-active/?start={start}&count={count}",
+}
+DEFAULT_BOARDS = ('trending',)
+MOST_ACTIVE_PAGE_SIZE = 100
+# Quote types Yahoo gives no sector/industry; a blank .info for anything else
+# is a throttled or partial response, not an answer.
+NO_SECTOR_QUOTE_TYPES = {'ETF', 'MUTUALFUND', 'INDEX', 'CRYPTOCURRENCY', 'CURRENCY', 'FUTURE'}
 
 def _parse_news_timestamp(value):
     """Parse a yfinance news pubDate/displayTime (ISO 8601, e.g. '2026-06-24T15:55:32Z')
@@ -18,22 +44,26 @@ def _parse_news_timestamp(value):
     except ValueError:
         return None
 
-def get_recent_news(ticker, ticker_data=None):
-    """Return (timestamp, title, summary, link) for the most recent news story
-    about ``ticker``.
+def get_news(ticker, ticker_data=None, client=None, metrics=None):
+    """Return every news story yfinance has for ``ticker`` as a list of
+    (timestamp, title, summary, link), most recent first.
 
     The legacy Yahoo RSS endpoint (feeds.finance.yahoo.com/rss/2.0/headline) was
     retired in 2025 and now returns HTTP 429 for every request, which is why news
     coverage dropped to 0%. yfinance exposes the same Yahoo Finance news via
     ``Ticker.news``, so we use that instead. A ``ticker_data`` object can be passed
-    in to reuse an existing yf.Ticker and avoid a duplicate lookup.
+    in to reuse an existing yf.Ticker and avoid a duplicate lookup, and a
+    ``client`` (http_client.YahooClient) to run the lookup under its rate limiter.
+    Failed lookups are tallied as ``news_errors`` on ``metrics``, if given.
     """
     if ticker_data is None:
-        ticker_data = yf.Ticker(ticker)
+        ticker_data = _ticker(ticker, client)
 
     try:
-        items = ticker_data.news or []
+        items = (client.call(lambda: ticker_data.news) if client else ticker_data.news) or []
     except Exception:
+        if metrics is not None:
+            metrics.count('news_errors')
         items = []
 
     stories = []
@@ -50,46 +80,133 @@ def get_recent_news(ticker, ticker_data=None):
             or content.get('link') or ''
         stories.append((ts, title, summary, link))
 
-    if not stories:
-        return None, '', '', ''
-
     # Most recent story first (items without a timestamp sort last).
     stories.sort(key=lambda s: s[0] or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+    return stories
+
+def get_recent_news(ticker, ticker_data=None):
+    """Return (timestamp, title, summary, link) for the most recent news story
+    about ``ticker``, or (None, '', '', '') if there is none."""
+    stories = get_news(ticker, ticker_data)
+    if not stories:
+        return None, '', '', ''
     return stories[0]
 
-def scrape_trending_tickers():
-    current_time = datetime.now()
-    url = "https://finance.yahoo.com/markets/stocks/trending/"
-    # url = "https://finance.yahoo.com/markets/stocks/most-active/?start=0&count=200"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
+def _ticker(ticker, client=None):
+    """yf.Ticker bound to the client's shared session, if there is one."""
+    if client is None:
+        return yf.Ticker(ticker)
+    return yf.Ticker(ticker, session=client.session)
+
+def new_client(**kwargs):
+    """A YahooClient that also treats yfinance's rate-limit error as a 429."""
+    return http_client.YahooClient(rate_limit_errors=(YFRateLimitError,), **kwargs)
+
+def _enrich_ticker(ticker, meta=None, client=None, capture=None, metrics=None):
+    """Look up sector/industry and the latest news story for one ticker.
+
+    ``meta`` is a cached (sector, industry) pair; when given, the ``.info`` call is
+    skipped and only the news is fetched. Each lookup falls back independently: a
+    failed ``.info`` leaves sector/industry blank but still tries the news, and a
+    failed news lookup leaves the article fields blank. Never raises, so one bad
+    symbol cannot sink the whole board. With a ``capture`` (capture.Recorder or
+    capture.Replay) the Ticker's payloads are recorded or replayed. Lookup
+    latencies and errors are reported to ``metrics`` (metrics.RunMetrics).
+
+    Returns ``(meta, stories)``: meta is (sector, industry), or None if the
+    ``.info`` lookup failed or came back without either for a quote type that
+    has them (so the cache keeps it only for the negative TTL); stories is every
+    (timestamp, title, summary, link) from ``get_news``, most recent first.
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+
+    def make_live():
+        return _ticker(ticker, client)
+
+    t0 = time.perf_counter()
+    ticker_data = None
+    try:
+        ticker_data = capture.ticker(ticker, make_live) if capture is not None else make_live()
+        if meta is None:
+            try:
+                info = client.call(lambda: ticker_data.info) if client else ticker_data.info
+            finally:
+                metrics.observe('info', time.perf_counter() - t0)
+            meta = (info.get('sector') or '', info.get('industry') or '')
+            if not any(meta) and info.get('quoteType') not in NO_SECTOR_QUOTE_TYPES:
+                metrics.count('info_empty')
+                meta = None
+    except Exception:
+        metrics.count('info_errors')
+
+    t1 = time.perf_counter()
+    try:
+        stories = get_news(ticker, ticker_data, client, metrics)
+    except Exception:
+        metrics.count('news_errors')
+        stories = []
+    t2 = time.perf_counter()
+    metrics.observe('news', t2 - t1)
+    metrics.observe('ticker', t2 - t0)
+
+    return meta, stories
+
+def enrich_tickers(ticker_symbols, max_workers=DEFAULT_WORKERS, meta_cache=None, client=None, capture=None, metrics=None):
+    """Enrich every ticker with sector/industry/news, ``max_workers`` at a time.
+
+    The per-ticker lookups are independent network round-trips, so they run on a
+    bounded thread pool; ``executor.map`` yields results in input order, so the
+    returned lists line up with ``ticker_symbols`` exactly as the serial loop did.
+    ``max_workers=1`` reproduces the old one-at-a-time behaviour.
+
+    With a ``meta_cache`` (see meta_cache.MetadataCache), sector/industry come from
+    the cache where an unexpired entry exists and Yahoo's ``.info`` is only hit on a
+    miss; fresh results (and failures, negatively) are written back afterwards. The
+    cache is only touched from the calling thread. With a ``client``, every Yahoo
+    lookup shares its session and rate limiter.
+
+    Returns seven parallel lists: sector, industry, article_timestamp, article_title,
+    article_summary, article_link (all for the most recent story), and news_items
+    (every story per ticker, for the normalized news table).
+    """
+    if not ticker_symbols:
+        return [], [], [], [], [], [], []
+    if metrics is None:
+        metrics = RunMetrics()
+    cached = meta_cache.get_many(ticker_symbols) if meta_cache is not None else {}
+    metas = [cached.get(t) for t in ticker_symbols]
+    if meta_cache is not None:
+        metrics.count('meta_cache_hits', len(cached))
+        metrics.count('meta_cache_misses', len(set(ticker_symbols)) - len(cached))
 
-    # Fetch the webpage
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.content, 'html.parser')
-
-    # Find the trending stocks table
-    table = soup.find('table', {'class': 'bd'})
-    if table is None:
-        raise ValueError("Trending stocks table not found")
-
-    # Extract table headers
-    headers = [th.get_text(strip=True) for th in table.find_all('th')]
-
-    # Extract table rows
-    data = []
-    for row in table.find_all('tr')[1:]:  # Skip the header row
-        cells = row.find_all('td')
-        if cells:
-            row_data = []
-            for cell in cells:
-                link = cell.find('a', {'data-testid': 'table-cell-ticker'})
-                if link:
-                    row_data.append(link.get_text(strip=True))  # Ticker symbol
-                else:
-                    row_data.append(cell.get_text(strip=True))  # Other cell values
-            data.append(row_data)
+    enrich = partial(_enrich_ticker, client=client, capture=capture, metrics=metrics)
+    workers = max(1, min(int(max_workers), len(ticker_symbols)))
+    if workers == 1:
+        results = [enrich(t, m) for t, m in zip(ticker_symbols, metas)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(enrich, ticker_symbols, metas))
+
+    if meta_cache is not None:
+        meta_cache.put_many({t: meta for t, (meta, _) in zip(ticker_symbols, results)
+                             if t not in cached})
+
+    rows = [(meta or ('', '')) + tuple(stories[0] if stories else (None, '', '', '')) + (stories,)
+            for meta, stories in results]
+    return tuple(list(col) for col in zip(*rows))
+
+def _client_counts(client):
+    names = ('requests', 'retried', 'throttled', 'bytes')
+    return {name: getattr(client, name, 0) for name in names}
+
+def parse_trending_page(html, parser=None):
+    """Parse a Yahoo screener page into the cleaned trending DataFrame.
+
+    ``parser`` picks the html_extract backend (lxml, stream or bs4; default lxml
+    when importable); every backend yields the same DataFrame.
+    """
+    headers, data = html_extract.extract_table(html, parser)
 
     # Create a DataFrame
     df = pd.DataFrame(data, columns=headers)
@@ -106,14 +223,97 @@ def scrape_trending_tickers():
     numeric_columns = ['Volume', 'Avg Vol (3M)', 'Market Cap', 'P/E Ratio (TTM)', '52 Wk Change %']
     for column in numeric_columns:
         if column in df.columns:
-            df[column] = pd.to_numeric(df[column]
-                                      .str.replace('M', 'e6', regex=False)
-                                      .str.replace('B', 'e9', regex=False)
-                                      .str.replace('%', '', regex=False),
-                                      errors='coerce')
+            df[column] = pd.to_numeric(df[column].map(ticker_db.parse_magnitude), errors='coerce')
         else:
             df[column] = ''  # Add a column with NaNs if it doesn't exist
-    
+
+    return df
+
+def board_pages(boards=DEFAULT_BOARDS, most_active_pages=1, page_size=MOST_ACTIVE_PAGE_SIZE):
+    """Expand board names into (page_name, board, url) triples; most-active is
+    paginated into ``most_active_pages`` pages of ``page_size`` rows."""
+    pages = []
+    for board in boards:
+        if board == 'most-active':
+            for i in range(most_active_pages):
+                start = i * page_size
+                pages.append((f'{board}-{start}', board, BOARD_URLS[board].format(start=start, count=page_size)))
+        else:
+            pages.append((board, board, BOARD_URLS[board]))
+    return pages
+
+def merge_boards(frames):
+    """Concatenate per-page DataFrames (list of (board, df)) into one row per
+    symbol, keeping the first occurrence (board order) and listing every board it
+    appeared on, comma-separated, in a ``Boards`` column."""
+    df = pd.concat([f.assign(_board=board) for board, f in frames], ignore_index=True)
+    boards = df.groupby('Symbol', sort=False)['_board'].agg(lambda b: ','.join(dict.fromkeys(b)))
+    df = df.drop_duplicates('Symbol', keep='first').reset_index(drop=True)
+    df['Boards'] = df['Symbol'].map(boards)
+    return df.drop(columns='_board')
+
+def scrape_trending_tickers(max_workers=DEFAULT_WORKERS, meta_cache=None, parser=None, client=None, capture=None, metrics=None, boards=DEFAULT_BOARDS, most_active_pages=1):
+    """Fetch, parse and enrich one snapshot of the trending board.
+
+    ``boards`` lists the Yahoo screener boards to capture (see BOARD_URLS). Their
+    pages are fetched concurrently and symbols de-duplicated across boards before
+    enrichment, so each ticker is looked up once; the returned ``row_boards`` says
+    which board(s) each row came from. A trending page without the table raises;
+    a failing extra-board page is counted as a ``page_errors`` and skipped, and
+    raises too if no page parsed at all.
+
+    ``capture`` records every raw payload (capture.Recorder) or replays a recorded
+    run with no network at all (capture.Replay, which also supplies the snapshot
+    time). Stage timings and outcome counts go to ``metrics`` (metrics.RunMetrics).
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+    replaying = capture is not None and capture.replaying
+    if client is None and not replaying:
+        client = new_client(pool_size=max_workers)
+    current_time = datetime.now(timezone.utc)
+    if capture is not None:
+        current_time = capture.start(current_time)
+    # A curl_cffi session sends its impersonated browser's own headers; only a
+    # plain requests session needs a User-Agent of ours.
+    headers = {} if getattr(client, 'impersonating', False) else {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    }
+    pages = board_pages(boards, most_active_pages)
+
+    # Fetch the webpages
+    def fetch_page(page):
+        name, _, url = page
+
+        def fetch():
+            return client.get(url, headers=headers).content
+
+        return capture.page(url, fetch, name) if capture is not None else fetch()
+
+    client_before = _client_counts(client)
+    with metrics.stage('fetch'):
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as pool:
+            htmls = list(pool.map(fetch_page, pages))
+    metrics.count('pages', len(pages))
+    metrics.count('bytes_page', sum(len(h) for h in htmls))
+    with metrics.stage('parse'):
+        frames = []
+        for (name, board, _), html in zip(pages, htmls):
+            try:
+                frames.append((board, parse_trending_page(html, parser)))
+            except Exception:
+                if board == 'trending':
+                    raise
+                metrics.count('page_errors')
+                print(f"skipping {name}: no parseable table")
+        if not frames:
+            raise html_extract.TableNotFound(
+                f"no parseable table on any of the {len(pages)} board page(s): "
+                + ", ".join(name for name, _, _ in pages))
+        df = merge_boards(frames)
+    for board in boards:
+        metrics.count(f'board_{board}', int(df['Boards'].str.split(',').map(lambda b: board in b).sum()))
+
     # Prepare the data to match the existing schema
     ticker_symbols = df['Symbol'].tolist()
     company_names = df['Name'].tolist()
@@ -121,56 +321,66 @@ def scrape_trending_tickers():
     percent_changes = df['Change %'].tolist()
     trading_volume = df['Volume'].tolist()
     market_cap = df['Market Cap'].tolist()
+    row_boards = df['Boards'].tolist()
 
     # For the missing Market Time, we'll pass None
     market_time = [None] * len(ticker_symbols)
 
-    sector = []
-    industry = []
-    article_timestamp = []
-    article_title = []
-    article_summary = []
-    article_link = []
-    for ticker in ticker_symbols:
-        try:
-            ticker_data = yf.Ticker(ticker)
-            sector.append(ticker_data.info.get('sector', ''))
-            industry.append(ticker_data.info.get('industry', ''))
-        except Exception as e:
-            ticker_data = None
-            sector.append('')
-            industry.append('')
-
-        try:
-            timestamp, title, summary, link = get_recent_news(ticker, ticker_data)
-            article_timestamp.append(timestamp)
-            article_title.append(title)
-            article_summary.append(summary)
-            article_link.append(link)
-        except Exception as e:
-            article_timestamp.append(None)
-            article_title.append('')
-            article_summary.append('')
-            article_link.append('')
-
-    return current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link
-
-def save_to_sqlite(current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link):
-    db_file = 'trending-tickers.db'
-    conn = sqlite3.connect(db_file)
-    c = conn.cursor()
-
-    # Create the table if it doesn't exist
-    c.execute('''CREATE TABLE IF NOT EXISTS trending_tickers
-                 (utc_timestamp TEXT, market_time TEXT, ticker_symbol TEXT, company_name TEXT, sector TEXT, industry TEXT, last_price REAL, percent_change REAL, trading_volume TEXT, market_cap TEXT, article_timestamp TEXT, article_title TEXT, article_summary TEXT, article_link TEXT)''')
-
-    # Insert the data
-    for market_time, ticker_symbol, company_name, sector, industry, last_price, percent_change, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link in zip(market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link):
-
-        c.execute("INSERT INTO trending_tickers (utc_timestamp, market_time, ticker_symbol, company_name, sector, industry, last_price, percent_change, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (current_time, market_time, ticker_symbol, company_name, sector, industry, last_price, percent_change, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link))
-
-    conn.commit()
-    conn.close()
+    with metrics.stage('enrich'):
+        sector, industry, article_timestamp, article_title, article_summary, article_link, news_items = \
+            enrich_tickers(ticker_symbols, max_workers=max_workers, meta_cache=meta_cache, client=client, capture=capture, metrics=metrics)
+    for name, n in _client_counts(client).items():
+        metrics.count(f'http_{name}', n - client_before[name])
+    metrics.count('tickers', len(ticker_symbols))
+    metrics.count('blank_sector', sum(not s for s in sector))
+    metrics.count('blank_industry', sum(not s for s in industry))
+    metrics.count('blank_news', sum(not t for t in article_title))
+    metrics.count('blank_price', int(df['Price'].isna().sum()))
+    metrics.count('blank_volume', int(pd.isna(df['Volume']).sum()))
+    metrics.count('blank_market_cap', int(pd.isna(df['Market Cap']).sum()))
+    if capture is not None:
+        capture.finish(ticker_symbols)
+    if meta_cache is not None:
+        hits, misses = metrics.counts.get('meta_cache_hits', 0), metrics.counts.get('meta_cache_misses', 0)
+        print(f"metadata cache: {hits}/{hits + misses} hits ({hits / max(1, hits + misses):.1%})")
+
+    return current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link, news_items, row_boards
+
+def save_to_sqlite(current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link, news_items=None, db_file='trending-tickers.db', row_boards=None):
+    """Write one snapshot in a single transaction.
+
+    Rows are upserted on (ticker_symbol, utc_timestamp), so re-running an hour
+    replaces that hour's rows instead of duplicating them. News goes to the
+    normalized ``news``/``ticker_news`` tables and each row keeps only the
+    ``story_id`` of its most recent story; ``news_items`` is every story per ticker
+    (defaults to just the article_* story passed in). The snapshot time is stored
+    as UTC epoch microseconds and volume/market cap as REAL. ``row_boards`` is
+    the comma-separated board list per row (default: all 'trending'); the
+    trending rows also advance ``ticker_state``. Returns the
+    number of rows written.
+    """
+    if row_boards is None:
+        row_boards = ['trending'] * len(ticker_symbols)
+    if news_items is None:
+        news_items = [[story] if story[1] else [] for story in zip(article_timestamp, article_title, article_summary, article_link)]
+    snapshot_us = ticker_db.to_epoch_us(current_time)
+    conn = ticker_db.connect(db_file)
+    with conn:
+        story_ids = ticker_db.save_news(conn, snapshot_us, ticker_symbols, news_items)
+        rows = [(snapshot_us, mt, sym, name, sec, ind, price, pct, ticker_db.parse_magnitude(vol), ticker_db.parse_magnitude(cap), None, None, None, None, sid, brd)
+                for mt, sym, name, sec, ind, price, pct, vol, cap, sid, brd in zip(market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, story_ids, row_boards)]
+        updates = ", ".join(f"{col} = excluded.{col}" for col in ticker_db.TRENDING_COLUMNS
+                            if col not in ("ticker_symbol", "utc_timestamp"))
+        conn.executemany(
+            f"INSERT INTO trending_tickers ({', '.join(ticker_db.TRENDING_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(ticker_db.TRENDING_COLUMNS))}) "
+            f"ON CONFLICT (ticker_symbol, utc_timestamp) DO UPDATE SET {updates}",
+            rows)
+        on_trending = [sym for sym, brd in zip(ticker_symbols, row_boards) if 'trending' in brd.split(',')]
+        if on_trending:
+            ticker_db.record_board(conn, snapshot_us, on_trending)
+    ticker_db.close(conn)
+    return len(rows)
 
 def render_html(current_time, market_time, tickers, names, last_price, percent_changes, volume, market_cap):
     env = Environment(loader=FileSystemLoader("."))
@@ -180,7 +390,94 @@ def render_html(current_time, market_time, tickers, names, last_price, percent_c
     with open("index.html", "w") as f:
         f.write(html)
 
+def run_once(args, client=None, meta_cache=None, capture=None):
+    """Scrape (or replay) one snapshot, store it and render the page.
+
+    ``args.store`` picks the storage: the SQLite DB (``args.db``) or a new
+    immutable segment under ``args.segments`` (see segments.py). Prints the run's
+    metrics record as one JSON line and appends it to the ``scrape_runs`` table
+    (or the segment root's runs.ndjson).
+    """
+    metrics = RunMetrics()
+    current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link, news_items, row_boards = scrape_trending_tickers(max_workers=args.workers, meta_cache=meta_cache, parser=args.parser, client=client, capture=capture, metrics=metrics, boards=args.boards, most_active_pages=args.most_active_pages)
+    with metrics.stage('save'):
+        if args.store == 'segments':
+            _, rows = segments.write_segment(args.segments, current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, news_items, row_boards)
+        else:
+            rows = save_to_sqlite(current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link, news_items, db_file=args.db, row_boards=row_boards)
+    metrics.count('rows_written', rows)
+    with metrics.stage('render'):
+        # The page charts the trending board only, whatever else was captured.
+        on_page = [i for i, b in enumerate(row_boards) if 'trending' in b.split(',')] \
+            if 'trending' in args.boards else range(len(ticker_symbols))
+        render_html(current_time, market_time, *([col[i] for i in on_page] for col in (ticker_symbols, company_names, last_price, percent_changes, trading_volume, market_cap)))
+
+    record = metrics.record()
+    record['snapshot'] = current_time.isoformat()
+    record['mode'] = 'replay' if capture is not None and capture.replaying else 'live'
+    print(json.dumps(record))
+    if args.store == 'segments':
+        segments.append_run(args.segments, current_time, record)
+    else:
+        conn = ticker_db.connect(args.db)
+        with conn:
+            ticker_db.save_run(conn, current_time, record)
+        ticker_db.close(conn)
+    return current_time, ticker_symbols
+
 if __name__ == "__main__":
-    current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link = scrape_trending_tickers()
-    save_to_sqlite(current_time, market_time, ticker_symbols, company_names, sector, industry, last_price, percent_changes, trading_volume, market_cap, article_timestamp, article_title, article_summary, article_link)
-    render_html(current_time, market_time, ticker_symbols, company_names, last_price, percent_changes, trading_volume, market_cap)
+    ap = argparse.ArgumentParser(description="Scrape the Yahoo trending-tickers board.")
+    ap.add_argument("--db", default="trending-tickers.db")
+    ap.add_argument("--store", choices=["sqlite", "segments"], default="sqlite",
+                    help="write snapshots to the --db file, or as one immutable file per "
+                         "snapshot under --segments (the DB then only holds the metadata cache)")
+    ap.add_argument("--segments", default="segments", metavar="DIR",
+                    help="segment root for --store segments (compact with segments.py compact)")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                    help="concurrent per-ticker enrichment lookups (1 = serial)")
+    ap.add_argument("--parser", choices=sorted(html_extract.BACKENDS), default=None,
+                    help="HTML extractor backend (default: lxml if installed, else stream)")
+    ap.add_argument("--rate", type=float, default=http_client.DEFAULT_RATE,
+                    help="initial Yahoo requests/second (adapts down on 429s, back up on success)")
+    ap.add_argument("--boards", nargs="+", choices=sorted(BOARD_URLS), default=list(DEFAULT_BOARDS),
+                    help="Yahoo screener boards to capture; symbols are de-duplicated "
+                         "across boards and enriched once (default: trending)")
+    ap.add_argument("--most-active-pages", type=int, default=1,
+                    help=f"pages of {MOST_ACTIVE_PAGE_SIZE} rows to fetch from the most-active board")
+    ap.add_argument("--no-meta-cache", action="store_true",
+                    help="always fetch sector/industry from Yahoo (skip the ticker_meta cache)")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR",
+                      help="save the raw page and every info/news payload under DIR/<snapshot>/")
+    mode.add_argument("--replay", metavar="DIR",
+                      help="re-run parse/enrich/save/render from a capture (or every capture "
+                           "under DIR, oldest first) with no network")
+    ap.add_argument("--daemon", action="store_true",
+                    help="stay resident and scrape every --interval minutes with warm "
+                         "imports, HTTP session and caches (SIGINT/SIGTERM to stop)")
+    ap.add_argument("--interval", type=float, default=60.0,
+                    help="daemon cadence in minutes, aligned to the clock (default 60)")
+    args = ap.parse_args()
+    lock_path = args.db + ".lock"
+
+    if args.replay:
+        # No meta cache either way: a replay must read the recorded .info payloads.
+        with scheduler.run_lock(lock_path):
+            for capture_dir in capture.find_captures(args.replay):
+                snapshot, symbols = run_once(args, capture=capture.Replay(capture_dir))
+                print(f"replayed {capture_dir}: {len(symbols)} tickers @ {snapshot.isoformat()}")
+    else:
+        # Recording bypasses the meta cache so every .info payload is captured.
+        use_cache = not (args.no_meta_cache or args.record)
+        meta_cache = MetadataCache(args.db) if use_cache else None
+        client = new_client(rate=args.rate, pool_size=args.workers)
+        recorder = capture.Recorder(args.record) if args.record else None
+        if args.daemon:
+            # The closure keeps the client (session + limiter) and cache warm across runs.
+            scheduler.Scheduler(lambda: run_once(args, client=client, meta_cache=meta_cache, capture=recorder),
+                                args.interval * 60, lock_path=lock_path).run()
+        else:
+            with scheduler.run_lock(lock_path):
+                run_once(args, client=client, meta_cache=meta_cache, capture=recorder)
+        if meta_cache is not None:
+            meta_cache.close()
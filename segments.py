@@ -0,0 +1,203 @@
+"""Append-only segment storage: one small immutable file per snapshot.
+
+An alternative to growing (and re-committing) one SQLite file every hour.
+``scrape_tickers.py --store segments`` writes each run's rows to
+
+    <root>/<YYYY-MM>/<YYYYMMDDTHHMMSSffffffZ>.parquet   (or .ndjson.gz)
+
+and never touches an existing file, so an hourly git commit adds ~10 KB instead
+of rewriting the whole DB. ``compact`` periodically merges every finished
+month's snapshot files into one ``<root>/<YYYY-MM>.parquet`` and removes them:
+
+    python segments.py compact segments/            # months before this one
+    python segments.py compact segments/ --all      # including the current month
+
+Each row is self-contained (one trending_tickers row plus the text of its most
+recent story), with the snapshot stored as epoch microseconds like schema v3+
+of ticker_db.py. Parquet needs pyarrow; without it segments are gzipped NDJSON.
+``build_dataset.load()`` reads a segment root, a segment file or a glob of them
+exactly like DB archives, and readers treat both kinds interchangeably.
+
+Run metrics (metrics.RunMetrics records) are appended to ``<root>/runs.ndjson``.
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import ticker_db
+
+SEGMENT_COLUMNS = [
+    "utc_timestamp", "market_time", "ticker_symbol", "company_name", "sector", "industry",
+    "last_price", "percent_change", "trading_volume", "market_cap", "article_timestamp",
+    "article_title", "article_summary", "article_link", "boards",
+]
+SEGMENT_SUFFIXES = (".parquet", ".ndjson.gz")
+RUNS = "runs.ndjson"
+_MONTH_DIR = re.compile(r"^\d{4}-\d{2}$")
+
+
+def default_format():
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "ndjson"
+
+
+def _write_atomic(frame, path, fmt):
+    """Write to a temp name and rename, so a reader (or a crashed run) never sees
+    a half-written segment."""
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp, index=False, compression="zstd")
+    else:
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            frame.to_json(f, orient="records", lines=True)
+    os.replace(tmp, path)
+
+
+def read_segment(path, columns=None, board=None, since=None, until=None):
+    """One segment file's rows (SEGMENT_COLUMNS, or just ``columns``).
+
+    Rows can be limited to those captured from ``board`` (rows without a
+    ``boards`` value are kept) and to ``since`` < utc_timestamp <= ``until``
+    (epoch microseconds). A parquet file reads only the columns needed;
+    NDJSON is read whole.
+    """
+    if path.endswith(".parquet"):
+        needed = None if columns is None else sorted(
+            set(columns) | ({"boards"} if board is not None else set())
+            | ({"utc_timestamp"} if since is not None or until is not None else set()))
+        frame = pd.read_parquet(path, columns=needed)
+    else:
+        frame = pd.read_json(path, orient="records", lines=True, compression="gzip",
+                             dtype={"utc_timestamp": "int64"}, convert_dates=False)
+    keep = np.ones(len(frame), dtype=bool)
+    if board is not None:
+        keep &= (frame["boards"].isna()
+                 | ("," + frame["boards"].fillna("") + ",").str.contains(f",{board},", regex=False)).to_numpy()
+    if since is not None:
+        keep &= frame["utc_timestamp"].to_numpy() > since
+    if until is not None:
+        keep &= frame["utc_timestamp"].to_numpy() <= until
+    frame = frame if keep.all() else frame[keep]
+    return frame if columns is None else frame[list(columns)]
+
+
+def segment_files(path):
+    """Every segment/compacted file under ``path`` (or ``path`` itself), sorted."""
+    if os.path.isfile(path):
+        return [path]
+    found = [os.path.join(d, f) for d, _, files in os.walk(path)
+             for f in files if f.endswith(SEGMENT_SUFFIXES)]
+    return sorted(found)
+
+
+def write_segment(root, current_time, market_time, ticker_symbols, company_names, sector,
+                  industry, last_price, percent_changes, trading_volume, market_cap,
+                  news_items, row_boards, fmt=None):
+    """Write one snapshot as a new segment and return ``(path, rows)``.
+
+    Takes the same per-ticker lists as scrape_tickers.save_to_sqlite; each row
+    carries its most recent story from ``news_items`` inline.
+    """
+    fmt = fmt or default_format()
+    snapshot_us = ticker_db.to_epoch_us(current_time)
+    latest = [stories[0] if stories else (None, None, None, None) for stories in news_items]
+    frame = pd.DataFrame({
+        "utc_timestamp": pd.Series([snapshot_us] * len(ticker_symbols), dtype="int64"),
+        "market_time": market_time,
+        "ticker_symbol": ticker_symbols,
+        "company_name": company_names,
+        "sector": sector,
+        "industry": industry,
+        "last_price": pd.to_numeric(pd.Series(last_price, dtype=object), errors="coerce"),
+        "percent_change": pd.to_numeric(pd.Series(percent_changes, dtype=object), errors="coerce"),
+        "trading_volume": [ticker_db.parse_magnitude(v) for v in trading_volume],
+        "market_cap": [ticker_db.parse_magnitude(v) for v in market_cap],
+        "article_timestamp": [None if s[0] is None else str(s[0]) for s in latest],
+        "article_title": [s[1] for s in latest],
+        "article_summary": [s[2] for s in latest],
+        "article_link": [s[3] for s in latest],
+        "boards": row_boards,
+    }, columns=SEGMENT_COLUMNS)
+    frame[["trading_volume", "market_cap"]] = frame[["trading_volume", "market_cap"]].astype(float)
+    month_dir = os.path.join(root, current_time.strftime("%Y-%m"))
+    os.makedirs(month_dir, exist_ok=True)
+    suffix = ".parquet" if fmt == "parquet" else ".ndjson.gz"
+    path = os.path.join(month_dir, current_time.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ") + suffix)
+    _write_atomic(frame, path, fmt)
+    return path, len(frame)
+
+
+def append_run(root, snapshot_time, record):
+    """Append one metrics record to ``<root>/runs.ndjson`` (the segment-store
+    counterpart of ticker_db.save_run)."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, RUNS), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"snapshot": snapshot_time.isoformat(), **record}) + "\n")
+
+
+def compact(root, include_current=False, fmt=None):
+    """Merge each month directory's snapshot segments into ``<root>/<YYYY-MM>``
+    (plus any previously compacted file for that month), then delete them.
+
+    The merged file is written before anything is removed, so an interrupted
+    compaction leaves at worst duplicate rows, which readers drop on
+    (ticker_symbol, utc_timestamp). Returns ``{month: rows}``.
+    """
+    fmt = fmt or default_format()
+    current = datetime.now(timezone.utc).strftime("%Y-%m")
+    done = {}
+    for month in sorted(os.listdir(root)):
+        month_dir = os.path.join(root, month)
+        if not (_MONTH_DIR.match(month) and os.path.isdir(month_dir)):
+            continue
+        if month >= current and not include_current:
+            continue
+        parts = segment_files(month_dir)
+        if not parts:
+            continue
+        existing = [p for p in glob.glob(os.path.join(root, month + ".*")) if p.endswith(SEGMENT_SUFFIXES)]
+        frame = pd.concat([read_segment(p) for p in existing + parts], ignore_index=True)
+        frame = (frame.drop_duplicates(["ticker_symbol", "utc_timestamp"], keep="last")
+                 .sort_values(["utc_timestamp", "ticker_symbol"], kind="stable")
+                 .reset_index(drop=True))
+        out = os.path.join(root, month + (".parquet" if fmt == "parquet" else ".ndjson.gz"))
+        _write_atomic(frame, out, fmt)
+        for p in parts + [p for p in existing if p != out]:
+            os.remove(p)
+        if not os.listdir(month_dir):
+            os.rmdir(month_dir)
+        done[month] = len(frame)
+    return done
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    cp = sub.add_parser("compact", help="merge per-snapshot segments into monthly files")
+    cp.add_argument("root", help="segment root directory")
+    cp.add_argument("--all", action="store_true",
+                    help="also compact the current (still growing) month")
+    cp.add_argument("--format", choices=["parquet", "ndjson"], default=None,
+                    help="monthly file format (default: parquet if pyarrow is installed)")
+    args = ap.parse_args()
+    done = compact(args.root, include_current=args.all, fmt=args.format)
+    for month, rows in done.items():
+        print(f"{month}: {rows:,} rows")
+    if not done:
+        print("nothing to compact")
+
+
+if __name__ == "__main__":
+    main()
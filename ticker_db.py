@@ -0,0 +1,389 @@
+"""Connection setup, schema and migrations for trending-tickers.db.
+
+The schema version lives in SQLite's ``PRAGMA user_version``; ``ensure_schema``
+applies any migrations newer than the file's version, so the scraper can open a
+years-old archive and bring it up to date in place. Run it one-shot against an
+existing file with:
+
+    python ticker_db.py trending-tickers.db [archives/*.db ...]
+
+Migrations
+----------
+  1 : de-duplicate (ticker_symbol, utc_timestamp), keeping the last-written row,
+      then enforce it with a UNIQUE index (which also serves ticker-history
+      lookups) plus an index on utc_timestamp for snapshot lookups.
+  2 : normalize news. Every story is stored once in ``news`` (keyed by its
+      canonical link, or a content hash when it has none), ``ticker_news`` links
+      each ticker to every story seen for it, and ``trending_tickers.story_id``
+      points at the row's most recent story. Existing article_* text is moved
+      into ``news`` and blanked on the hourly rows.
+  3 : typed columns. ``utc_timestamp`` (and ``ticker_news.first_seen``) become
+      INTEGER epoch microseconds in UTC, ``trading_volume``/``market_cap`` become
+      REAL (e.g. '19.87M' -> 19870000.0). Tables are rebuilt, backfilling every
+      existing row; rows whose timestamp can't be parsed are dropped.
+  4 : ``scrape_runs``, one row per scraper run: snapshot time, wall time, ticker
+      and written-row counts, error/blank totals, bytes downloaded, and the full
+      metrics record as JSON (see metrics.py) for anything not broken out.
+  5 : ``trending_tickers.boards``: comma-separated Yahoo board(s) a row was
+      captured from ('trending', 'most-active', ...). Existing rows are all
+      'trending'.
+  6 : ``ticker_state``, each ticker's running trending-board counters (first,
+      previous and last appearance, appearances, entries onto the board, whether
+      it is on the board now), advanced at ingest by record_board. Backfilled
+      from the existing trending rows.
+  7 : ``trending_tickers_v1``, a read-only view of the hourly rows in the
+      pre-migration layout for readers written against it (the Colab notebook):
+      ``utc_timestamp`` as 'YYYY-MM-DD HH:MM:SS.ffffff' UTC text and article_*
+      joined back from ``news``. ``trading_volume``/``market_cap`` stay numeric;
+      the original '19.87M' strings are not kept.
+
+Any migration leaves the file VACUUMed, whether it was applied here or by
+connect() in the scraper.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import math
+import numbers
+import sqlite3
+from datetime import datetime, timezone
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache
+)
+
+TRENDING_COLUMNS = [
+    "utc_timestamp", "market_time", "ticker_symbol", "company_name", "sector", "industry",
+    "last_price", "percent_change", "trading_volume", "market_cap", "article_timestamp",
+    "article_title", "article_summary", "article_link", "story_id", "boards",
+]
+
+
+IN_CHUNK = 400  # values per IN (...) query, under SQLite's bound-variable limit
+
+_MAGNITUDE = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_magnitude(value):
+    """Parse '19.87M' / '1.211T' / '6368000.0' / 12.5 / '' -> float, or None when
+    the value is missing or unparseable (archive.parse_magnitude applies it to a
+    Series)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if math.isnan(value) else float(value)
+    s = str(value).strip().rstrip("%")
+    mult = _MAGNITUDE.get(s[-1:], 1.0)
+    if mult != 1.0:
+        s = s[:-1]
+    try:
+        return float(s) * mult
+    except ValueError:
+        return None
+
+
+def to_epoch_us(value):
+    """datetime / ISO-8601 string / epoch-us int -> int microseconds since the
+    epoch, or None. Naive values are taken to already be UTC (the scraper has
+    always run on UTC CI runners)."""
+    if value is None:
+        return None
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def in_chunks(values):
+    """Split ``values`` for ``IN (...)`` queries that stay under SQLite's variable
+    limit -> (placeholders, chunk) pairs:
+
+        for marks, chunk in in_chunks(symbols):
+            conn.execute(f"SELECT ... WHERE ticker_symbol IN ({marks})", chunk)
+    """
+    values = list(values)
+    for i in range(0, len(values), IN_CHUNK):
+        chunk = values[i:i + IN_CHUNK]
+        yield ",".join("?" * len(chunk)), chunk
+
+
+def connect(db_file):
+    """Open ``db_file`` with the write-path pragmas and an up-to-date schema."""
+    conn = sqlite3.connect(db_file)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    ensure_schema(conn)
+    return conn
+
+
+def close(conn):
+    """Checkpoint the WAL back into the main file before closing, so the single
+    .db file the workflow commits is complete on its own."""
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+def _create_trending_indexes(conn):
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS trending_tickers_ticker_ts "
+                 "ON trending_tickers (ticker_symbol, utc_timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS trending_tickers_ts "
+                 "ON trending_tickers (utc_timestamp)")
+
+
+def _migrate_1(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS trending_tickers
+                 (utc_timestamp TEXT, market_time TEXT, ticker_symbol TEXT, company_name TEXT, sector TEXT, industry TEXT, last_price REAL, percent_change REAL, trading_volume TEXT, market_cap TEXT, article_timestamp TEXT, article_title TEXT, article_summary TEXT, article_link TEXT)""")
+    conn.execute("""DELETE FROM trending_tickers WHERE rowid NOT IN (
+                        SELECT MAX(rowid) FROM trending_tickers
+                        GROUP BY ticker_symbol, utc_timestamp)""")
+    _create_trending_indexes(conn)
+
+
+def story_key(title, summary, link):
+    """Stable identity for a news story: its link (minus any #fragment) when it
+    has one, otherwise a hash of the text."""
+    link = (link or '').strip().split('#', 1)[0]
+    if link:
+        return link
+    digest = hashlib.sha1(f"{title or ''}\n{summary or ''}".encode("utf-8")).hexdigest()
+    return f"sha1:{digest}"
+
+
+def _migrate_2(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS news
+                 (story_id INTEGER PRIMARY KEY, story_key TEXT NOT NULL UNIQUE, published TEXT, title TEXT, summary TEXT, link TEXT)""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS ticker_news
+                 (ticker_symbol TEXT NOT NULL, story_id INTEGER NOT NULL REFERENCES news (story_id), first_seen TEXT,
+                  PRIMARY KEY (ticker_symbol, story_id)) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS ticker_news_story ON ticker_news (story_id)")
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(trending_tickers)")}
+    if "story_id" not in cols:
+        conn.execute("ALTER TABLE trending_tickers ADD COLUMN story_id INTEGER REFERENCES news (story_id)")
+
+    # Backfill: move the per-row article text into news, oldest row first so a
+    # story keeps the first-seen copy, then point each row at it.
+    conn.create_function("story_key", 3, story_key, deterministic=True)
+    conn.execute("""INSERT INTO news (story_key, published, title, summary, link)
+                    SELECT story_key(article_title, article_summary, article_link),
+                           article_timestamp, article_title, article_summary, article_link
+                    FROM trending_tickers WHERE COALESCE(article_title, '') != ''
+                    ORDER BY rowid
+                    ON CONFLICT (story_key) DO NOTHING""")
+    conn.execute("""UPDATE trending_tickers SET story_id = (
+                        SELECT story_id FROM news
+                        WHERE news.story_key = story_key(article_title, article_summary, article_link))
+                    WHERE COALESCE(article_title, '') != ''""")
+    conn.execute("""INSERT OR IGNORE INTO ticker_news (ticker_symbol, story_id, first_seen)
+                    SELECT ticker_symbol, story_id, MIN(utc_timestamp) FROM trending_tickers
+                    WHERE story_id IS NOT NULL GROUP BY ticker_symbol, story_id""")
+    conn.execute("""UPDATE trending_tickers
+                    SET article_timestamp = NULL, article_title = NULL,
+                        article_summary = NULL, article_link = NULL""")
+
+
+def save_news(conn, utc_timestamp, ticker_symbols, news_items):
+    """Store every (timestamp, title, summary, link) story in ``news_items`` once,
+    link it to its ticker, and return the story_id of each ticker's first (most
+    recent) story, or None for tickers with no news. ``utc_timestamp`` is the
+    snapshot time in epoch microseconds."""
+    keys = [[story_key(title, summary, link) for _, title, summary, link in stories]
+            for stories in news_items]
+    conn.executemany(
+        "INSERT INTO news (story_key, published, title, summary, link) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (story_key) DO NOTHING",
+        [(k,) + tuple(story) for ks, stories in zip(keys, news_items)
+         for k, story in zip(ks, stories)])
+    uniq = sorted({k for ks in keys for k in ks})
+    ids = {}
+    for marks, chunk in in_chunks(uniq):
+        ids.update(conn.execute(f"SELECT story_key, story_id FROM news WHERE story_key IN ({marks})",
+                                chunk))
+    conn.executemany(
+        "INSERT OR IGNORE INTO ticker_news (ticker_symbol, story_id, first_seen) VALUES (?, ?, ?)",
+        [(sym, ids[k], utc_timestamp) for sym, ks in zip(ticker_symbols, keys) for k in ks])
+    return [ids[ks[0]] if ks else None for ks in keys]
+
+
+def _migrate_3(conn):
+    conn.create_function("magnitude", 1, parse_magnitude, deterministic=True)
+    conn.create_function("epoch_us", 1, to_epoch_us, deterministic=True)
+
+    conn.execute("""CREATE TABLE trending_tickers_typed
+                 (utc_timestamp INTEGER NOT NULL, market_time TEXT, ticker_symbol TEXT, company_name TEXT, sector TEXT, industry TEXT, last_price REAL, percent_change REAL, trading_volume REAL, market_cap REAL, article_timestamp TEXT, article_title TEXT, article_summary TEXT, article_link TEXT, story_id INTEGER REFERENCES news (story_id))""")
+    conn.execute("CREATE UNIQUE INDEX trending_tickers_typed_ticker_ts "
+                 "ON trending_tickers_typed (ticker_symbol, utc_timestamp)")
+    # Distinct legacy strings can land on the same instant ('...T00:00' vs
+    # '... 00:00'); OR REPLACE in rowid order keeps the last-written row.
+    conn.execute("""INSERT OR REPLACE INTO trending_tickers_typed
+                    SELECT epoch_us(utc_timestamp), market_time, ticker_symbol, company_name, sector, industry,
+                           last_price, percent_change, magnitude(trading_volume), magnitude(market_cap),
+                           article_timestamp, article_title, article_summary, article_link, story_id
+                    FROM trending_tickers WHERE epoch_us(utc_timestamp) IS NOT NULL ORDER BY rowid""")
+    conn.execute("DROP TABLE trending_tickers")
+    conn.execute("ALTER TABLE trending_tickers_typed RENAME TO trending_tickers")
+    conn.execute("DROP INDEX trending_tickers_typed_ticker_ts")
+    _create_trending_indexes(conn)
+
+    conn.execute("""CREATE TABLE ticker_news_typed
+                 (ticker_symbol TEXT NOT NULL, story_id INTEGER NOT NULL REFERENCES news (story_id), first_seen INTEGER,
+                  PRIMARY KEY (ticker_symbol, story_id)) WITHOUT ROWID""")
+    conn.execute("""INSERT INTO ticker_news_typed
+                    SELECT ticker_symbol, story_id, epoch_us(first_seen) FROM ticker_news""")
+    conn.execute("DROP TABLE ticker_news")
+    conn.execute("ALTER TABLE ticker_news_typed RENAME TO ticker_news")
+    conn.execute("CREATE INDEX IF NOT EXISTS ticker_news_story ON ticker_news (story_id)")
+
+
+def _migrate_4(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS scrape_runs
+                 (run_id INTEGER PRIMARY KEY, snapshot INTEGER NOT NULL, started_at TEXT, wall_s REAL, tickers INTEGER, rows_written INTEGER, info_errors INTEGER, news_errors INTEGER, blank_fields INTEGER, bytes INTEGER, metrics TEXT)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS scrape_runs_snapshot ON scrape_runs (snapshot)")
+
+
+def save_run(conn, snapshot_time, record):
+    """Append one metrics.RunMetrics record to ``scrape_runs``."""
+    counts = record.get("counts", {})
+    blanks = sum(n for name, n in counts.items() if name.startswith("blank_"))
+    conn.execute(
+        "INSERT INTO scrape_runs (snapshot, started_at, wall_s, tickers, rows_written, info_errors,"
+        " news_errors, blank_fields, bytes, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (to_epoch_us(snapshot_time), record.get("started_at"), record.get("wall_s"),
+         counts.get("tickers", 0), counts.get("rows_written", 0), counts.get("info_errors", 0),
+         counts.get("news_errors", 0), blanks, counts.get("http_bytes") or counts.get("bytes_page", 0),
+         json.dumps(record)))
+
+
+def _migrate_5(conn):
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(trending_tickers)")}
+    if "boards" not in cols:
+        conn.execute("ALTER TABLE trending_tickers ADD COLUMN boards TEXT")
+    conn.execute("UPDATE trending_tickers SET boards = 'trending' WHERE boards IS NULL")
+
+
+def record_board(conn, utc_timestamp, ticker_symbols):
+    """Advance ``ticker_state`` by the trending board at ``utc_timestamp`` (epoch
+    us). Work is proportional to the board size.
+
+    A re-run of the newest hour that adds no ticker changes nothing. Any other
+    snapshot that is not newer than the last one recorded (a re-run hour with
+    new tickers, or an older capture replayed into the DB) can't be applied
+    incrementally, so the state is rebuilt from trending_tickers instead --
+    call this after the snapshot's rows are written.
+    """
+    (last,) = conn.execute("SELECT MAX(last_seen) FROM ticker_state").fetchone()
+    if last is not None and utc_timestamp <= last:
+        recorded = {sym for (sym,) in conn.execute(
+            "SELECT ticker_symbol FROM ticker_state WHERE last_seen = ?", (last,))}
+        if utc_timestamp < last or not set(ticker_symbols) <= recorded:
+            rebuild_ticker_state(conn)
+        return
+    symbols = set(ticker_symbols)
+    left = {sym for (sym,) in conn.execute(
+        "SELECT ticker_symbol FROM ticker_state WHERE on_board = 1")} - symbols
+    conn.executemany(
+        "INSERT INTO ticker_state (ticker_symbol, first_seen, prev_seen, last_seen, appearances, entries, on_board) "
+        "VALUES (?, ?, NULL, ?, 1, 1, 1) ON CONFLICT (ticker_symbol) DO UPDATE SET "
+        "prev_seen = last_seen, last_seen = excluded.last_seen, appearances = appearances + 1, "
+        "entries = entries + (on_board = 0), on_board = 1",
+        [(sym, utc_timestamp, utc_timestamp) for sym in sorted(symbols)])
+    conn.executemany("UPDATE ticker_state SET on_board = 0 WHERE ticker_symbol = ?",
+                     [(sym,) for sym in sorted(left)])
+
+
+def rebuild_ticker_state(conn):
+    """Recompute ``ticker_state`` from every trending snapshot, replaying the
+    boards in memory and writing the table once."""
+    rows = conn.execute("SELECT utc_timestamp, ticker_symbol FROM trending_tickers "
+                        "WHERE boards IS NULL OR instr(',' || boards || ',', ',trending,') > 0 "
+                        "ORDER BY utc_timestamp").fetchall()
+    on_board = set()
+    state = {}  # ticker -> [first_seen, prev_seen, last_seen, appearances, entries]
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i < len(rows) and rows[i][0] == rows[start][0]:
+            continue
+        ts, symbols = rows[start][0], {sym for _, sym in rows[start:i]}
+        for sym in symbols:
+            st = state.get(sym)
+            if st is None:
+                state[sym] = [ts, None, ts, 1, 1]
+            else:
+                st[1], st[2], st[3], st[4] = st[2], ts, st[3] + 1, st[4] + (sym not in on_board)
+        on_board, start = symbols, i
+    conn.execute("DELETE FROM ticker_state")
+    conn.executemany("INSERT INTO ticker_state (ticker_symbol, first_seen, prev_seen, last_seen, "
+                     "appearances, entries, on_board) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     [(sym, *st, int(sym in on_board)) for sym, st in state.items()])
+
+
+def _migrate_6(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS ticker_state
+                 (ticker_symbol TEXT PRIMARY KEY, first_seen INTEGER, prev_seen INTEGER,
+                  last_seen INTEGER, appearances INTEGER NOT NULL, entries INTEGER NOT NULL,
+                  on_board INTEGER NOT NULL) WITHOUT ROWID""")
+    rebuild_ticker_state(conn)
+
+
+def _migrate_7(conn):
+    conn.execute("""CREATE VIEW IF NOT EXISTS trending_tickers_v1 AS
+                    SELECT strftime('%Y-%m-%d %H:%M:%S', t.utc_timestamp / 1000000, 'unixepoch')
+                               || printf('.%06d', t.utc_timestamp % 1000000) AS utc_timestamp,
+                           t.market_time, t.ticker_symbol, t.company_name, t.sector, t.industry,
+                           t.last_price, t.percent_change, t.trading_volume, t.market_cap,
+                           n.published AS article_timestamp, n.title AS article_title,
+                           n.summary AS article_summary, n.link AS article_link
+                    FROM trending_tickers t LEFT JOIN news n USING (story_id)""")
+
+
+MIGRATIONS = [_migrate_1, _migrate_2, _migrate_3, _migrate_4, _migrate_5, _migrate_6,
+              _migrate_7]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def ensure_schema(conn):
+    """Apply every migration newer than the file's user_version, each in its own
+    transaction, then VACUUM to reclaim the space freed by moved/deleted rows.
+    Returns the list of versions applied."""
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    applied = []
+    for v, migrate in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {v}")
+        applied.append(v)
+    if applied:
+        conn.execute("VACUUM")
+    return applied
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("db", nargs="+", help="DB paths/globs to migrate in place")
+    args = ap.parse_args()
+    paths = [p for pat in args.db for p in (glob.glob(pat) if any(ch in pat for ch in "*?[") else [pat])]
+    for p in paths:
+        conn = sqlite3.connect(p)
+        applied = ensure_schema(conn)
+        (n,) = conn.execute("SELECT COUNT(*) FROM trending_tickers").fetchone()
+        conn.close()
+        print(f"{p}: schema v{SCHEMA_VERSION}"
+              + (f" (applied {applied})" if applied else " (already current)")
+              + f", {n:,} rows")
+
+
+if __name__ == "__main__":
+    main()